@@ -7,6 +7,8 @@ import pandas as pd
 from collections import Counter
 import numpy as np
 
+from rule_engine import CompiledRuleEngine, summarize_category_masks
+
 def analyze_others_category():
     """Analyze the Others category to identify improvement opportunities"""
     
@@ -93,6 +95,19 @@ def analyze_others_category():
 
     print()
 
+    # Rows matching several categories, answered from the category bitmask
+    # instead of rescanning employer strings
+    if 'category_mask' in df.columns:
+        print('=== ALTERNATIVE CATEGORIES (category_mask) ===')
+        summary = summarize_category_masks(CompiledRuleEngine(), df['enhanced_category'], df['category_mask'])
+        print(f'Records matching more than one category: {summary["multi_category_rows"]:,}')
+        for category, also_matched in summary['also_matched'].items():
+            alternatives = ', '.join(f'{other} {count:,}' for other, count in also_matched.items())
+            print(f'{category:15} | also matched: {alternatives}')
+        for change, count in summary['priority_conflicts'].items():
+            print(f'{change:35} | {count:6,} records would change under Config.CATEGORIES priorities')
+        print()
+
     # High-value Others that need manual review
     print('=== HIGH-VALUE OTHERS NEEDING REVIEW ===')
     high_value_others = others_df[others_df['contribution_amount'] > 1000].sort_values('contribution_amount', ascending=False)
@@ -0,0 +1,439 @@
+"""
+Array-backed inference for the trained random forest
+
+export_array_model flattens the fitted TF-IDF vectorizer and random forest of
+a ContributionClassifier into plain NumPy arrays (vocabulary, idf weights,
+node features, thresholds, children and leaf class probabilities), one
+uncompressed .npy file each. ArrayForestModel loads them back and predicts
+with NumPy alone, walking every tree of the forest at once over a batch of
+rows. Loading neither imports scikit-learn nor unpickles a hundred tree
+objects, which keeps startup short for small classification jobs.
+
+Predictions match scikit-learn exactly: features are compared as float32
+against float64 thresholds and the per-tree probabilities are summed in
+estimator order, as RandomForestClassifier.predict_proba does.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ARRAY_MODEL_FORMAT = 1
+METADATA_FILE = 'model.json'
+VECTORIZER_ARRAYS = ('terms', 'idf', 'stop_words')
+FOREST_ARRAYS = ('classes', 'roots', 'feature', 'threshold', 'children', 'leaf_index', 'leaf_proba')
+
+
+class ArrayTfidfVectorizer:
+    """Word n-gram TF-IDF transform of a fitted TfidfVectorizer, without scikit-learn"""
+
+    def __init__(self, terms: np.ndarray, idf: np.ndarray, stop_words: np.ndarray,
+                 ngram_range=(1, 1), token_pattern: str = r"(?u)\b\w\w+\b", lowercase: bool = True):
+        """
+        Args:
+            terms: Vocabulary terms, in feature column order
+            idf: Inverse document frequency weight of every term
+            stop_words: Tokens dropped before building n-grams
+            ngram_range: Smallest and largest n-gram length
+            token_pattern: Regular expression matching one token
+            lowercase: Lower-case text before tokenizing
+        """
+        self.terms = terms
+        self.idf = idf
+        self.stop_words = stop_words
+        self.ngram_range = tuple(ngram_range)
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+
+        self.vocabulary_ = {term: column for column, term in enumerate(terms.tolist())}
+        self._stop_words = frozenset(stop_words.tolist())
+        self._token = re.compile(token_pattern)
+        self._idf = idf.tolist()
+
+    @classmethod
+    def from_sklearn(cls, vectorizer) -> 'ArrayTfidfVectorizer':
+        """
+        Flatten a fitted TfidfVectorizer
+
+        Args:
+            vectorizer: Fitted TfidfVectorizer with the default word analyzer
+
+        Returns:
+            ArrayTfidfVectorizer with the same vocabulary and weights
+        """
+        unsupported = {
+            'analyzer': vectorizer.analyzer != 'word',
+            'tokenizer': vectorizer.tokenizer is not None,
+            'preprocessor': vectorizer.preprocessor is not None,
+            'strip_accents': vectorizer.strip_accents is not None,
+            'binary': vectorizer.binary,
+            'norm': vectorizer.norm != 'l2',
+            'use_idf': not vectorizer.use_idf,
+            'sublinear_tf': vectorizer.sublinear_tf
+        }
+        unsupported = [option for option, value in unsupported.items() if value]
+        if unsupported:
+            raise ValueError(f"Cannot export TfidfVectorizer options: {', '.join(unsupported)}")
+
+        terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+        for term, column in vectorizer.vocabulary_.items():
+            terms[column] = term
+        stop_words = sorted(vectorizer.get_stop_words() or ())
+        return cls(
+            terms.astype(str),
+            np.asarray(vectorizer.idf_, dtype=np.float64),
+            np.array(stop_words, dtype=str),
+            vectorizer.ngram_range,
+            vectorizer.token_pattern,
+            vectorizer.lowercase
+        )
+
+    def _analyze(self, text: str) -> list:
+        """Terms of one document, as TfidfVectorizer's word analyzer builds them"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [token for token in self._token.findall(text) if token not in self._stop_words]
+
+        min_n, max_n = self.ngram_range
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def _weights(self, text: str):
+        """Sorted columns and l2-normalized TF-IDF weights of one document"""
+        counts = {}
+        for term in self._analyze(text):
+            column = self.vocabulary_.get(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        columns = sorted(counts)
+        weights = [counts[column] * self._idf[column] for column in columns]
+
+        # Summed in column order, as scikit-learn normalizes CSR rows
+        squares = 0.0
+        for weight in weights:
+            squares += weight * weight
+        norm = math.sqrt(squares)
+        return columns, [weight / norm for weight in weights]
+
+    def transform(self, texts: Iterable[str], dtype=np.float64) -> np.ndarray:
+        """
+        Dense TF-IDF matrix of a batch of documents
+
+        Args:
+            texts: Documents (missing values count as empty text)
+            dtype: Output dtype
+
+        Returns:
+            Array of shape (documents, vocabulary size)
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        X = np.zeros((len(texts), len(self._idf)), dtype=dtype)
+
+        seen = {}
+        for row, text in enumerate(texts):
+            weights = seen.get(text)
+            if weights is None:
+                weights = seen[text] = self._weights(text)
+            columns, values = weights
+            if columns:
+                X[row, columns] = values
+        return X
+
+
+class ArrayForest:
+    """Every tree of a fitted random forest as flat node arrays"""
+
+    def __init__(self, classes: np.ndarray, roots: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 children: np.ndarray, leaf_index: np.ndarray, leaf_proba: np.ndarray):
+        """
+        Args:
+            classes: Class labels, in probability column order
+            roots: Root node of every tree
+            feature: Feature tested at every node (0 at leaves)
+            threshold: Split threshold at every node (+inf at leaves)
+            children: Left and right child of node i at 2i and 2i + 1; a
+                row goes right when its feature value exceeds the threshold,
+                and leaves point back to themselves
+            leaf_index: Row of leaf_proba for every leaf (-1 at split nodes)
+            leaf_proba: Class probabilities of every leaf
+        """
+        self.classes_ = classes
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_index = leaf_index
+        self.leaf_proba = leaf_proba
+
+    @property
+    def n_estimators(self) -> int:
+        """Number of trees"""
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> 'ArrayForest':
+        """
+        Flatten a fitted RandomForestClassifier
+
+        Args:
+            forest: Fitted single-output RandomForestClassifier
+
+        Returns:
+            ArrayForest predicting the same probabilities
+        """
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be exported")
+
+        roots, features, thresholds, children, leaf_indexes, probas = [], [], [], [], [], []
+        offset = n_leaves = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count) + offset
+            leaves = tree.children_left < 0
+            roots.append(offset)
+            features.append(np.where(leaves, 0, tree.feature))
+            thresholds.append(np.where(leaves, np.inf, tree.threshold))
+            children.append(np.column_stack([np.where(leaves, nodes, tree.children_left + offset),
+                                             np.where(leaves, nodes, tree.children_right + offset)]).ravel())
+            leaf_index = np.full(tree.node_count, -1)
+            leaf_index[leaves] = np.arange(leaves.sum()) + n_leaves
+            leaf_indexes.append(leaf_index)
+
+            # DecisionTreeClassifier.predict_proba normalizes the node values
+            proba = tree.value[leaves, 0, :forest.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(proba / normalizer)
+            offset += tree.node_count
+            n_leaves += int(leaves.sum())
+
+        return cls(
+            np.asarray(forest.classes_).astype(str),
+            np.array(roots, dtype=np.intp),
+            np.concatenate(features).astype(np.intp),
+            np.concatenate(thresholds).astype(np.float64),
+            np.concatenate(children).astype(np.intp),
+            np.concatenate(leaf_indexes).astype(np.intp),
+            np.ascontiguousarray(np.concatenate(probas))
+        )
+
+    def apply(self, X: np.ndarray, compact_every: int = 8) -> np.ndarray:
+        """
+        Leaf reached by every row in every tree
+
+        All (row, tree) pairs descend one level per step. Pairs that have
+        reached a leaf stay on it, and are dropped from the working set every
+        compact_every steps.
+
+        Args:
+            X: Dense float32 feature matrix
+            compact_every: Steps between removals of finished pairs
+
+        Returns:
+            Array of shape (rows, trees) of leaf node indices
+        """
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        values = np.ascontiguousarray(X).ravel()
+
+        leaves = np.tile(self.roots, n_rows)
+        pairs = np.arange(n_rows * n_trees)
+        nodes = leaves.copy()
+        offsets = (pairs // n_trees) * n_features
+        step = 0
+        while nodes.size:
+            go_right = values[offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+            step += 1
+            if step % compact_every == 0:
+                done = self.leaf_index[nodes] >= 0
+                if done.any():
+                    leaves[pairs[done]] = nodes[done]
+                    working = ~done
+                    nodes, offsets, pairs = nodes[working], offsets[working], pairs[working]
+        return leaves.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X, batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Class probabilities, columns in classes_ order
+
+        Args:
+            X: Feature matrix (dense, or anything with toarray())
+            batch_size: Rows evaluated at once, defaults to Config.ARRAY_PREDICT_BATCH_SIZE
+
+        Returns:
+            Array of shape (rows, classes)
+        """
+        batch_size = batch_size or Config.ARRAY_PREDICT_BATCH_SIZE
+        proba = np.zeros((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], batch_size):
+            batch = X[start:start + batch_size]
+            batch = batch.toarray() if hasattr(batch, 'toarray') else batch
+            leaves = self.leaf_index[self.apply(np.asarray(batch, dtype=np.float32))]
+            # Summed tree by tree, as RandomForestClassifier accumulates them
+            batch_proba = proba[start:start + batch_size]
+            for tree in range(len(self.roots)):
+                batch_proba += self.leaf_proba[leaves[:, tree]]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X, batch_size: Optional[int] = None) -> np.ndarray:
+        """Most probable class per row"""
+        return self.classes_[self.predict_proba(X, batch_size).argmax(axis=1)]
+
+
+class ArrayForestModel:
+    """TF-IDF vectorizer and random forest of a trained ContributionClassifier, as arrays"""
+
+    def __init__(self, vectorizer: ArrayTfidfVectorizer, forest: ArrayForest, metadata: Optional[Dict] = None):
+        """
+        Args:
+            vectorizer: Flattened TF-IDF vectorizer
+            forest: Flattened random forest
+            metadata: Training details saved with the arrays
+        """
+        self.vectorizer = vectorizer
+        self.forest = forest
+        self.metadata = metadata or {}
+
+    @classmethod
+    def from_classifier(cls, classifier) -> 'ArrayForestModel':
+        """
+        Flatten the model of a trained ContributionClassifier
+
+        Args:
+            classifier: ContributionClassifier trained in forest mode
+
+        Returns:
+            ArrayForestModel predicting the same categories
+        """
+        if not classifier.is_trained or classifier.is_incremental or not hasattr(classifier.classifier, 'estimators_'):
+            raise ValueError("Only a trained random forest (ML_TRAINING_MODE = 'forest') can be exported")
+        trained_through = classifier.trained_through
+        metadata = {
+            'trained_through': None if trained_through is None else str(trained_through),
+            'training_metrics': classifier.training_metrics
+        }
+        return cls(ArrayTfidfVectorizer.from_sklearn(classifier.vectorizer),
+                   ArrayForest.from_sklearn(classifier.classifier), metadata)
+
+    def features(self, texts: Iterable[str], numerical_features) -> np.ndarray:
+        """
+        Feature matrix laid out as ContributionClassifier.combine_features
+
+        Args:
+            texts: Employer and name text per row
+            numerical_features: Array of employer_length, name_length, log_amount per row
+
+        Returns:
+            Dense float32 matrix
+        """
+        X_text = self.vectorizer.transform(texts, dtype=np.float32)
+        return np.hstack([X_text, np.asarray(numerical_features, dtype=np.float32)])
+
+    def predict_proba(self, texts: Iterable[str], numerical_features,
+                      batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Class probabilities of rows given as text and numerical features
+
+        Args:
+            texts: Employer and name text per row
+            numerical_features: Array of employer_length, name_length, log_amount per row
+            batch_size: Rows evaluated at once, defaults to Config.ARRAY_PREDICT_BATCH_SIZE
+
+        Returns:
+            Array of shape (rows, classes), columns in forest.classes_ order
+        """
+        batch_size = batch_size or Config.ARRAY_PREDICT_BATCH_SIZE
+        texts = list(texts)
+        numerical_features = np.asarray(numerical_features)
+        proba = np.empty((len(texts), len(self.forest.classes_)), dtype=np.float64)
+        for start in range(0, len(texts), batch_size):
+            X = self.features(texts[start:start + batch_size], numerical_features[start:start + batch_size])
+            proba[start:start + batch_size] = self.forest.predict_proba(X, batch_size)
+        return proba
+
+    def predict(self, texts: Iterable[str], numerical_features, batch_size: Optional[int] = None) -> np.ndarray:
+        """Most probable category per row"""
+        return self.forest.classes_[self.predict_proba(texts, numerical_features, batch_size).argmax(axis=1)]
+
+    def save(self, directory: str) -> None:
+        """
+        Write every array as an uncompressed .npy file plus model.json
+
+        Args:
+            directory: Output directory (created if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {name: getattr(self.vectorizer, name) for name in VECTORIZER_ARRAYS}
+        arrays.update({name: getattr(self.forest, 'classes_' if name == 'classes' else name)
+                       for name in FOREST_ARRAYS})
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(values), allow_pickle=False)
+
+        metadata = {
+            **self.metadata,
+            'format': ARRAY_MODEL_FORMAT,
+            'ngram_range': list(self.vectorizer.ngram_range),
+            'token_pattern': self.vectorizer.token_pattern,
+            'lowercase': self.vectorizer.lowercase,
+            'n_estimators': self.forest.n_estimators,
+            'n_nodes': int(len(self.forest.feature)),
+            'n_leaves': int(len(self.forest.leaf_proba))
+        }
+        # Written last: a directory without model.json is incomplete
+        with open(os.path.join(directory, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2, default=str)
+        self.metadata = metadata
+        logger.info(f"Array model ({self.forest.n_estimators} trees, {metadata['n_nodes']:,} nodes) saved to {directory}")
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = None) -> 'ArrayForestModel':
+        """
+        Load a model written by save
+
+        Args:
+            directory: Directory written by save / export_array_model
+            mmap_mode: Passed to np.load ('r' maps the arrays instead of reading them)
+
+        Returns:
+            ArrayForestModel
+        """
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        if metadata.get('format') != ARRAY_MODEL_FORMAT:
+            raise ValueError(f"Unsupported array model format {metadata.get('format')} in {directory}")
+
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in VECTORIZER_ARRAYS + FOREST_ARRAYS}
+        vectorizer = ArrayTfidfVectorizer(arrays['terms'], arrays['idf'], arrays['stop_words'],
+                                          metadata['ngram_range'], metadata['token_pattern'], metadata['lowercase'])
+        forest = ArrayForest(*(arrays[name] for name in FOREST_ARRAYS))
+        return cls(vectorizer, forest, metadata)
+
+
+def export_array_model(classifier, directory: str = None) -> ArrayForestModel:
+    """
+    Export the forest of a trained ContributionClassifier as arrays
+
+    Args:
+        classifier: ContributionClassifier trained in forest mode
+        directory: Output directory, defaults to Config.ARRAY_MODEL_DIR
+
+    Returns:
+        The exported ArrayForestModel
+    """
+    model = ArrayForestModel.from_classifier(classifier)
+    model.save(directory or Config.ARRAY_MODEL_DIR)
+    return model
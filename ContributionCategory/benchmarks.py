@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for Enhanced Contribution Classification System
+Run with: python benchmarks.py classify-frame --sizes 10000 100000 1000000
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import logging
+import resource
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contribution_classifier import ContributionClassifier
+from config import Config
+from rule_engine import BUSINESS_ENTITIES, preprocess_series
+from text_normalizer import ABBREVIATIONS, CLEANER, PREPROCESSOR
+from utils import SyntheticDataGenerator
+from streaming import map_chunks, shard_frame, extract_and_classify_chunk
+
+logger = logging.getLogger(__name__)
+
+def benchmark_classify_frame(sizes):
+    """Compare row-wise DataFrame.apply against ContributionClassifier.classify_frame"""
+    classifier = ContributionClassifier()
+    
+    print(f"{'Rows':>10} {'apply rows/s':>15} {'classify_frame rows/s':>22} {'Speedup':>8}")
+    print("-" * 60)
+    
+    for size in sizes:
+        df = SyntheticDataGenerator.generate(size)
+        
+        start = time.perf_counter()
+        applied = df.apply(
+            lambda row: classifier.rule_based_classification(
+                row.get('contributor_employer', ''),
+                row.get('contributor_name', '')
+            ), axis=1
+        )
+        apply_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        vectorized = classifier.classify_frame(df)
+        frame_seconds = time.perf_counter() - start
+        
+        mismatches = int((applied.astype(str) != vectorized.astype(str)).sum())
+        if mismatches:
+            logger.warning(f"{mismatches} rows differ between apply and classify_frame")
+        
+        print(f"{size:>10,} {size / apply_seconds:>15,.0f} {size / frame_seconds:>22,.0f} "
+              f"{apply_seconds / frame_seconds:>7.1f}x")
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def feature_memory_worker(mode, rows, estimators):
+    """Train and predict with dense or sparse features and print peak RSS"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.model_selection import train_test_split
+    
+    Config.N_ESTIMATORS = estimators
+    classifier = ContributionClassifier()
+    df = classifier.extract_features(SyntheticDataGenerator.generate(rows))
+    df['current_category'] = classifier.classify_frame(df).astype(str)
+    baseline_mb = peak_rss_mb()
+    
+    start = time.perf_counter()
+    text_features = (df['contributor_employer'].fillna('') + ' ' +
+                     df['contributor_name'].fillna('')).str.strip()
+    numerical_features = df[['employer_length', 'name_length', 'log_amount']].fillna(0)
+    
+    if mode == 'dense':
+        # Previous pipeline: densify TF-IDF before stacking numerical features
+        vectorizer = TfidfVectorizer(max_features=Config.MAX_FEATURES_TFIDF, ngram_range=Config.NGRAM_RANGE,
+                                     stop_words='english', min_df=Config.MIN_DF_TFIDF)
+        X_combined = np.hstack([vectorizer.fit_transform(text_features).toarray(), numerical_features.values])
+        y = df['current_category']
+        X_train, _, y_train, _ = train_test_split(X_combined, y, test_size=Config.TEST_SIZE,
+                                                  random_state=Config.ML_RANDOM_STATE, stratify=y)
+        model = RandomForestClassifier(n_estimators=estimators, random_state=Config.ML_RANDOM_STATE,
+                                       class_weight='balanced')
+        model.fit(X_train, y_train)
+        X_all = np.hstack([vectorizer.transform(text_features).toarray(), numerical_features.values])
+        model.predict_proba(X_all)
+    else:
+        classifier.train_ml_classifier(df)
+        X_all = classifier.combine_features(classifier.vectorizer.transform(text_features),
+                                            numerical_features.values)
+        classifier.classifier.predict_proba(X_all)
+    
+    print(f"{mode},{rows},{baseline_mb:.1f},{peak_rss_mb():.1f},{time.perf_counter() - start:.1f}")
+
+def benchmark_feature_memory(rows, estimators):
+    """Compare peak RSS of dense vs sparse feature pipelines in separate processes"""
+    print(f"{'Mode':<8} {'Rows':>10} {'Data RSS MB':>12} {'Peak RSS MB':>12} {'Train+predict s':>16}")
+    print("-" * 62)
+    
+    for mode in ['dense', 'sparse']:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), 'feature-memory-worker',
+             '--mode', mode, '--rows', str(rows), '--estimators', str(estimators)],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        mode, rows_done, baseline_mb, peak_mb, seconds = output.split(',')
+        print(f"{mode:<8} {int(rows_done):>10,} {float(baseline_mb):>12,.1f} "
+              f"{float(peak_mb):>12,.1f} {float(seconds):>16.1f}")
+
+def benchmark_parallel_scaling(rows, worker_counts):
+    """Time sharded feature extraction + classification across worker counts"""
+    classifier = ContributionClassifier()
+    df = SyntheticDataGenerator.generate(rows)
+    
+    print(f"CPU cores available: {os.cpu_count()}")
+    print(f"{'Workers':>8} {'Seconds':>10} {'Rows/s':>12} {'Speedup':>8}")
+    print("-" * 42)
+    
+    baseline = None
+    reference = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        shards = shard_frame(df, workers * 4 if workers > 1 else 1)
+        result = pd.concat(map_chunks(extract_and_classify_chunk, classifier, shards, workers))
+        seconds = time.perf_counter() - start
+        
+        categories = result['enhanced_current_category'].astype(str)
+        if reference is None:
+            reference = categories
+        elif not categories.equals(reference):
+            logger.warning(f"Results with {workers} workers differ from the serial run")
+        
+        baseline = baseline or seconds
+        print(f"{workers:>8} {seconds:>10.2f} {rows / seconds:>12,.0f} {baseline / seconds:>7.1f}x")
+
+def benchmark_rule_ordering(rows, dominant_share, repeats):
+    """Priority-order vs profile-driven rule evaluation on skewed workloads"""
+    classifier = ContributionClassifier()
+    engine = classifier.rule_engine
+    workloads = [
+        ('uniform', None),
+        ('business-entities', BUSINESS_ENTITIES),
+        ('retired', ['Retired', 'Not Employed', 'Student']),
+    ]
+    
+    print(f"{'Workload':<18} {'Speculative rules':<28} {'Default s':>10} {'Profiled s':>11} "
+          f"{'Speedup':>8} {'Identical':>10}")
+    print("-" * 90)
+    
+    for workload, keywords in workloads:
+        df = SyntheticDataGenerator.generate(rows, n_contributors=rows, dominant_keywords=keywords,
+                                             dominant_share=dominant_share)
+        employer = df['contributor_employer']
+        employer_clean = preprocess_series(employer)
+        name_clean = preprocess_series(df['contributor_name'])
+        
+        # Profile a previous run on a tenth of the workload
+        classifier.enable_instrumentation()
+        classifier.classify_frame(df.head(max(1, rows // 10)))
+        profile = classifier.get_rule_stats()
+        classifier.enable_instrumentation(False)
+        
+        timings = {}
+        results = {}
+        for mode, mode_profile in (('default', None), ('profiled', profile)):
+            speculative = engine.apply_profile(mode_profile)
+            best = float('inf')
+            for _ in range(repeats):
+                start = time.perf_counter()
+                results[mode] = engine.classify_series(employer, employer_clean, name_clean)
+                best = min(best, time.perf_counter() - start)
+            timings[mode] = best
+        engine.apply_profile(None)
+        
+        identical = results['default'].equals(results['profiled'])
+        print(f"{workload:<18} {', '.join(speculative) or '-':<28} {timings['default']:>10.3f} "
+              f"{timings['profiled']:>11.3f} {timings['default'] / timings['profiled']:>7.2f}x "
+              f"{str(identical):>10}")
+
+def legacy_preprocess_text(text):
+    """Per-cell ContributionClassifier.preprocess_text before the normalization engine"""
+    if pd.isna(text) or text is None:
+        return ""
+    text = str(text).upper().strip()
+    text = re.sub(r'[^\w\s&\-\.]', ' ', text)
+    return re.sub(r'\s+', ' ', text)
+
+def legacy_clean_text(text):
+    """Per-cell TextProcessor.clean_text before the normalization engine"""
+    text = legacy_preprocess_text(text)
+    for abbr, full in ABBREVIATIONS.items():
+        text = re.sub(rf'\b{abbr}\b', full, text)
+    return text.strip()
+
+def benchmark_normalization(rows):
+    """Per-cell preprocess_text/clean_text vs the vectorized normalization engine"""
+    df = SyntheticDataGenerator.generate(rows, n_contributors=rows)
+    workloads = [
+        ('employers', df['contributor_employer']),
+        ('names', df['contributor_name']),
+        ('distinct', df['contributor_employer'].fillna('') + ' #' + pd.Series(np.arange(rows), dtype=str)),
+    ]
+    
+    print(f"{'Workload':<10} {'Unique':>9} {'Function':<16} {'apply s':>8} {'engine s':>9} "
+          f"{'Speedup':>8} {'Identical':>10}")
+    print("-" * 76)
+    
+    for workload, values in workloads:
+        for function, legacy, normalizer in (('preprocess_text', legacy_preprocess_text, PREPROCESSOR),
+                                             ('clean_text', legacy_clean_text, CLEANER)):
+            start = time.perf_counter()
+            applied = values.apply(legacy)
+            apply_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            normalized = normalizer.normalize_series(values)
+            engine_seconds = time.perf_counter() - start
+            
+            identical = applied.tolist() == normalized.tolist()
+            print(f"{workload:<10} {values.nunique():>9,} {function:<16} {apply_seconds:>8.2f} "
+                  f"{engine_seconds:>9.2f} {apply_seconds / engine_seconds:>7.1f}x {str(identical):>10}")
+
+def benchmark_training(rows, new_share):
+    """Random forest vs incremental hashed model on the same split, then folding in new filings"""
+    classifier = ContributionClassifier()
+    df = classifier.extract_features(SyntheticDataGenerator.generate(rows))
+    df['current_category'] = classifier.classify_frame(df).astype(str)
+    
+    # The newest filings arrive after the first training run
+    cutoff = df['contribution_date'].quantile(1 - new_share)
+    history = df[df['contribution_date'] <= cutoff]
+    
+    print(f"{'Mode':<12} {'Train rows':>10} {'Train s':>8} {'Accuracy':>9} {'Macro F1':>9} "
+          f"{'New rows':>9} {'Update s':>9}")
+    print("-" * 72)
+    
+    for mode in ('forest', 'incremental'):
+        model = ContributionClassifier()
+        model.train_ml_classifier(history, mode=mode)
+        metrics = model.training_metrics
+        
+        # The forest has to retrain on the full history; the incremental
+        # model only takes in rows newer than it
+        start = time.perf_counter()
+        if mode == 'forest':
+            model.train_ml_classifier(df, mode=mode)
+        else:
+            model.update_ml_classifier(df)
+        update_seconds = time.perf_counter() - start
+        
+        print(f"{mode:<12} {metrics['train_rows']:>10,} {metrics['training_seconds']:>8.1f} "
+              f"{metrics['accuracy']:>9.4f} {metrics['macro_f1']:>9.4f} "
+              f"{len(df) - len(history):>9,} {update_seconds:>9.1f}")
+
+def benchmark_unique_keys(rows, modes):
+    """Training on every transaction vs one weighted row per contributor key"""
+    classifier = ContributionClassifier()
+    df = classifier.extract_features(SyntheticDataGenerator.generate(rows))
+    df['current_category'] = classifier.classify_frame(df).astype(str)
+    
+    print(f"{'Mode':<12} {'Rows':<12} {'Train rows':>10} {'Fitted':>9} {'Train s':>8} "
+          f"{'Accuracy':>9} {'Macro F1':>9}")
+    print("-" * 75)
+    
+    for mode in modes:
+        for label, unique_keys, weight in (('all', False, None), ('keys/count', True, 'count'),
+                                           ('keys/amount', True, 'amount')):
+            sample_weight = Config.ML_SAMPLE_WEIGHT
+            Config.ML_SAMPLE_WEIGHT = weight or sample_weight
+            try:
+                model = ContributionClassifier()
+                model.train_ml_classifier(df, mode=mode, unique_keys=unique_keys)
+            finally:
+                Config.ML_SAMPLE_WEIGHT = sample_weight
+            metrics = model.training_metrics
+            print(f"{mode:<12} {label:<12} {metrics['train_rows']:>10,} {metrics['train_keys']:>9,} "
+                  f"{metrics['training_seconds']:>8.1f} {metrics['accuracy']:>9.4f} {metrics['macro_f1']:>9.4f}")
+
+def benchmark_batch_predict(rows, single_rows, batch_sizes):
+    """Per-record enhanced_classify vs enhanced_classify_many on the same trained model"""
+    classifier = ContributionClassifier()
+    training = classifier.extract_features(SyntheticDataGenerator.generate(20_000))
+    training['current_category'] = classifier.classify_frame(training).astype(str)
+    classifier.train_ml_classifier(training)
+    records = SyntheticDataGenerator.generate(rows, seed=7)
+    
+    # Cache cleared per record so every call does the full work
+    sample = records.head(single_rows)
+    start = time.perf_counter()
+    single = []
+    for employer, name, amount in zip(sample['contributor_employer'], sample['contributor_name'],
+                                      sample['contribution_amount']):
+        classifier.cache.clear()
+        single.append(classifier.enhanced_classify(employer, name, amount))
+    single_rate = len(sample) / (time.perf_counter() - start)
+    single = pd.DataFrame(single)
+    
+    print(f"{'Path':<28} {'Rows':>10} {'Seconds':>8} {'Rows/s':>10} {'Speedup':>8}")
+    print("-" * 68)
+    print(f"{'enhanced_classify':<28} {len(sample):>10,} {len(sample) / single_rate:>8.2f} "
+          f"{single_rate:>10,.0f} {1.0:>7.1f}x")
+    
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        many = classifier.enhanced_classify_many(records, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        for column in single.columns:
+            assert (many[column].head(single_rows).to_numpy() == single[column].to_numpy()).all(), column
+        print(f"{f'enhanced_classify_many/{batch_size}':<28} {rows:>10,} {seconds:>8.2f} "
+              f"{rows / seconds:>10,.0f} {rows / seconds / single_rate:>7.1f}x")
+
+# Child processes for the array model benchmark; each imports only what its
+# path needs, loads the model, predicts the saved rows and prints the timings
+ARRAY_MODEL_STARTUP = {
+    'sklearn': """
+import time
+start = time.perf_counter()
+import numpy as np
+from scipy import sparse
+import joblib
+artifacts = joblib.load(MODEL)
+loaded = time.perf_counter()
+texts, numerical = np.load(TEXTS).tolist(), np.load(NUMERICAL)
+X = sparse.hstack([artifacts['vectorizer'].transform(texts), sparse.csr_matrix(numerical)], format='csr')
+artifacts['classifier'].predict_proba(X)
+""",
+    'array': """
+import time
+start = time.perf_counter()
+import numpy as np
+from array_model import ArrayForestModel
+model = ArrayForestModel.load(MODEL)
+loaded = time.perf_counter()
+texts, numerical = np.load(TEXTS).tolist(), np.load(NUMERICAL)
+model.predict_proba(texts, numerical)
+"""
+}
+# ru_maxrss survives exec on Linux (it would report this process's peak), so
+# the child reads its own high-water mark from /proc when it can
+ARRAY_MODEL_REPORT = """
+import os, resource
+end = time.perf_counter()
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+if os.path.exists('/proc/self/status'):
+    with open('/proc/self/status') as status:
+        peak_mb = next(int(line.split()[1]) for line in status if line.startswith('VmHWM')) / 1024
+print(f"{loaded - start:.3f},{end - loaded:.3f},{peak_mb:.0f}")
+"""
+
+def benchmark_array_model(rows, predict_rows, job_rows, repeats):
+    """scikit-learn joblib artifact vs exported array model: startup, short jobs and throughput"""
+    import tempfile
+    from array_model import export_array_model
+    from utils import ModelPersistence
+    
+    classifier = ContributionClassifier()
+    df = classifier.extract_features(SyntheticDataGenerator.generate(rows))
+    df['current_category'] = classifier.classify_frame(df).astype(str)
+    classifier.train_ml_classifier(df)
+    records = classifier.extract_features(SyntheticDataGenerator.generate(predict_rows, seed=11))
+    texts = classifier._text_features(records).tolist()
+    numerical = records[['employer_length', 'name_length', 'log_amount']].fillna(0).to_numpy()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {'sklearn': os.path.join(directory, 'trained_model.joblib'),
+                 'array': os.path.join(directory, 'array_model')}
+        ModelPersistence.save_model_artifacts(classifier, paths['sklearn'])
+        model = export_array_model(classifier, paths['array'])
+        texts_path, numerical_path = os.path.join(directory, 'texts.npy'), os.path.join(directory, 'numerical.npy')
+        np.save(texts_path, np.array(texts[:job_rows], dtype=str))
+        np.save(numerical_path, numerical[:job_rows])
+        
+        print(f"{len(classifier.classifier.estimators_)} trees, {model.metadata['n_nodes']:,} nodes; "
+              f"joblib {os.path.getsize(paths['sklearn']) / 1e6:.1f} MB, arrays "
+              f"{sum(entry.stat().st_size for entry in os.scandir(paths['array'])) / 1e6:.1f} MB")
+        print(f"\nFresh process: imports + load, then predict {job_rows:,} records (median of {repeats})")
+        print(f"{'Path':<10} {'Load s':>8} {'Predict s':>10} {'Total s':>8} {'Peak RSS MB':>12}")
+        print("-" * 52)
+        for path, code in ARRAY_MODEL_STARTUP.items():
+            header = (f"import sys\nsys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+                      f"MODEL, TEXTS, NUMERICAL = {paths[path]!r}, {texts_path!r}, {numerical_path!r}\n")
+            runs = []
+            for _ in range(repeats):
+                output = subprocess.run([sys.executable, '-c', header + code + ARRAY_MODEL_REPORT],
+                                        capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+                runs.append([float(value) for value in output.split(',')])
+            load_s, predict_s, rss_mb = np.median(runs, axis=0)
+            print(f"{path:<10} {load_s:>8.2f} {predict_s:>10.2f} {load_s + predict_s:>8.2f} {rss_mb:>12,.0f}")
+    
+    # Throughput in this process, both paths already loaded
+    start = time.perf_counter()
+    X = classifier.combine_features(classifier.vectorizer.transform(texts), numerical)
+    expected = classifier.classifier.predict_proba(X)
+    sklearn_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    proba = model.predict_proba(texts, numerical)
+    array_seconds = time.perf_counter() - start
+    assert np.array_equal(proba, expected), 'array model probabilities differ'
+    assert (model.forest.classes_[proba.argmax(axis=1)] == classifier.classifier.predict(X)).all()
+    
+    print(f"\nThroughput on {predict_rows:,} records (identical probabilities asserted)")
+    print(f"{'Path':<10} {'Seconds':>8} {'Rows/s':>10}")
+    print("-" * 30)
+    print(f"{'sklearn':<10} {sklearn_seconds:>8.2f} {predict_rows / sklearn_seconds:>10,.0f}")
+    print(f"{'array':<10} {array_seconds:>8.2f} {predict_rows / array_seconds:>10,.0f}")
+
+# Worker process for the registry benchmark: loads the model, classifies the
+# saved records, then waits until every worker has done the same before
+# reading its memory, so pages shared between workers show up as shared
+REGISTRY_WORKER = """
+import sys
+sys.path.insert(0, DIRECTORY)
+import logging
+import time
+import pandas as pd
+from contribution_classifier import ContributionClassifier
+from model_registry import ModelRegistry
+
+def memory_mb():
+    with open('/proc/self/smaps_rollup') as rollup:
+        fields = dict(line.split()[:2] for line in rollup if line.split()[0].endswith(':'))
+    memory = {field: int(fields[field + ':']) / 1024 for field in ('Rss', 'Pss')}
+    memory['Private'] = (int(fields['Private_Clean:']) + int(fields['Private_Dirty:'])) / 1024
+    return memory
+
+logging.disable(logging.CRITICAL)
+classifier = ContributionClassifier()
+records = pd.read_pickle(RECORDS)
+before = memory_mb()
+if MODE == 'joblib':
+    classifier.load_model(MODEL)
+else:
+    classifier.load_registered_model(VERSION, ModelRegistry(MODEL), mmap_mode=MMAP, arrays=ARRAYS)
+loaded = memory_mb()
+start = time.perf_counter()
+classifier.enhanced_classify_many(records)
+seconds = time.perf_counter() - start
+print('ready', flush=True)
+sys.stdin.readline()
+after = memory_mb()
+print(f"{loaded['Private'] - before['Private']:.1f},{after['Private'] - before['Private']:.1f},"
+      f"{after['Pss']:.1f},{after['Rss']:.1f},{seconds:.3f}", flush=True)
+"""
+
+def benchmark_registry_workers(rows, predict_rows, workers):
+    """Memory and speed of workers loading the same model: joblib file vs registry, forest vs arrays"""
+    import tempfile
+    from model_registry import ARRAYS_DIR, ModelRegistry
+    from utils import ModelPersistence
+    
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("registry-workers needs /proc/self/smaps_rollup (Linux)")
+        return
+    
+    classifier = ContributionClassifier()
+    df = classifier.extract_features(SyntheticDataGenerator.generate(rows))
+    df['current_category'] = classifier.classify_frame(df).astype(str)
+    classifier.train_ml_classifier(df)
+    records = classifier.extract_features(SyntheticDataGenerator.generate(predict_rows, seed=11))
+    
+    with tempfile.TemporaryDirectory() as directory:
+        joblib_path = os.path.join(directory, 'trained_model.joblib')
+        ModelPersistence.save_model_artifacts(classifier, joblib_path)
+        registry = ModelRegistry(os.path.join(directory, 'registry'))
+        version = registry.register(classifier)
+        records_path = os.path.join(directory, 'records.pkl')
+        records.to_pickle(records_path)
+        arrays_mb = sum(entry.stat().st_size
+                        for entry in os.scandir(os.path.join(registry.path(version), ARRAYS_DIR))) / 1e6
+        
+        print(f"{len(classifier.classifier.estimators_)} trees; joblib {os.path.getsize(joblib_path) / 1e6:.1f} MB, "
+              f"registry arrays {arrays_mb:.1f} MB; each worker classifies {predict_rows:,} records")
+        print("\nPrivate MB: memory a worker adds by loading the model, and after classifying; "
+              "PSS: shared pages split between the workers")
+        print(f"{'Load':<18} {'Workers':>8} {'Private MB (load)':>18} {'(classify)':>11} "
+              f"{'Total PSS MB':>13} {'RSS MB/worker':>14} {'Classify s':>11}")
+        print("-" * 99)
+        paths = [('joblib', joblib_path, None, False), ('registry mmap', registry.root, 'r', False),
+                 ('registry arrays', registry.root, None, True), ('registry arr mmap', registry.root, 'r', True)]
+        for label, model, mmap_mode, arrays in paths:
+            for count in workers:
+                header = (f"DIRECTORY = {os.path.dirname(os.path.abspath(__file__))!r}\n"
+                          f"MODE, MODEL, VERSION, MMAP, ARRAYS = {label.split()[0]!r}, {model!r}, {version!r}, "
+                          f"{mmap_mode!r}, {arrays!r}\n"
+                          f"RECORDS = {records_path!r}\n")
+                processes = [subprocess.Popen([sys.executable, '-c', header + REGISTRY_WORKER], text=True,
+                                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                             for _ in range(count)]
+                for process in processes:
+                    assert process.stdout.readline().strip() == 'ready'
+                for process in processes:
+                    process.stdin.write('\n')
+                    process.stdin.flush()
+                results = np.array([[float(value) for value in process.stdout.readline().split(',')]
+                                    for process in processes])
+                for process in processes:
+                    process.wait()
+                load_mb, private_mb, _, rss_mb, seconds = results.mean(axis=0)
+                print(f"{label:<18} {count:>8} {load_mb:>18.1f} {private_mb:>11.1f} "
+                      f"{results[:, 2].sum():>13,.0f} {rss_mb:>14,.0f} {seconds:>11.2f}")
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Classification performance benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    frame_parser = subparsers.add_parser('classify-frame', help='Row-wise apply vs vectorized classify_frame')
+    frame_parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    
+    memory_parser = subparsers.add_parser('feature-memory', help='Peak RSS of dense vs sparse ML features')
+    memory_parser.add_argument('--rows', type=int, default=200_000)
+    memory_parser.add_argument('--estimators', type=int, default=10)
+    
+    parallel_parser = subparsers.add_parser('parallel-scaling', help='Process-pool scaling of classification')
+    parallel_parser.add_argument('--rows', type=int, default=1_000_000)
+    parallel_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    
+    ordering_parser = subparsers.add_parser('rule-ordering', help='Default vs profile-driven rule evaluation order')
+    ordering_parser.add_argument('--rows', type=int, default=500_000)
+    ordering_parser.add_argument('--dominant-share', type=float, default=0.7)
+    ordering_parser.add_argument('--repeats', type=int, default=3)
+    
+    normalize_parser = subparsers.add_parser('normalize', help='Per-cell vs vectorized text normalization')
+    normalize_parser.add_argument('--rows', type=int, default=1_000_000)
+    
+    training_parser = subparsers.add_parser('training', help='Random forest vs incremental hashed-feature training')
+    training_parser.add_argument('--rows', type=int, default=200_000)
+    training_parser.add_argument('--new-share', type=float, default=0.05)
+    
+    keys_parser = subparsers.add_parser('unique-keys', help='Training on transactions vs weighted unique contributors')
+    keys_parser.add_argument('--rows', type=int, default=200_000)
+    keys_parser.add_argument('--modes', nargs='+', choices=['forest', 'incremental'],
+                             default=['forest', 'incremental'])
+    
+    batch_parser = subparsers.add_parser('batch-predict', help='Per-record vs batched enhanced classification')
+    batch_parser.add_argument('--rows', type=int, default=200_000)
+    batch_parser.add_argument('--single-rows', type=int, default=2_000)
+    batch_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+    
+    array_parser = subparsers.add_parser('array-model', help='joblib forest vs exported array model')
+    array_parser.add_argument('--rows', type=int, default=50_000)
+    array_parser.add_argument('--predict-rows', type=int, default=20_000)
+    array_parser.add_argument('--job-rows', type=int, default=1_000)
+    array_parser.add_argument('--repeats', type=int, default=3)
+    
+    registry_parser = subparsers.add_parser('registry-workers',
+                                            help='Worker memory and speed with joblib vs registry models (forest or arrays)')
+    registry_parser.add_argument('--rows', type=int, default=50_000)
+    registry_parser.add_argument('--predict-rows', type=int, default=2_000)
+    registry_parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    
+    worker_parser = subparsers.add_parser('feature-memory-worker')
+    worker_parser.add_argument('--mode', choices=['dense', 'sparse'], required=True)
+    worker_parser.add_argument('--rows', type=int, required=True)
+    worker_parser.add_argument('--estimators', type=int, required=True)
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    
+    if args.benchmark == 'classify-frame':
+        benchmark_classify_frame(args.sizes)
+    elif args.benchmark == 'feature-memory':
+        benchmark_feature_memory(args.rows, args.estimators)
+    elif args.benchmark == 'parallel-scaling':
+        benchmark_parallel_scaling(args.rows, args.workers)
+    elif args.benchmark == 'rule-ordering':
+        benchmark_rule_ordering(args.rows, args.dominant_share, args.repeats)
+    elif args.benchmark == 'normalize':
+        benchmark_normalization(args.rows)
+    elif args.benchmark == 'training':
+        benchmark_training(args.rows, args.new_share)
+    elif args.benchmark == 'unique-keys':
+        benchmark_unique_keys(args.rows, args.modes)
+    elif args.benchmark == 'batch-predict':
+        benchmark_batch_predict(args.rows, args.single_rows, args.batch_sizes)
+    elif args.benchmark == 'array-model':
+        benchmark_array_model(args.rows, args.predict_rows, args.job_rows, args.repeats)
+    elif args.benchmark == 'registry-workers':
+        benchmark_registry_workers(args.rows, args.predict_rows, args.workers)
+    elif args.benchmark == 'feature-memory-worker':
+        feature_memory_worker(args.mode, args.rows, args.estimators)
+
+if __name__ == "__main__":
+    main()
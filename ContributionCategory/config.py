@@ -14,9 +14,29 @@ class Config:
     VIEW_NAME = "All_Contributions_View"
     FUNCTION_DATASET = "MNHenMplsMayorJacobF"
     
+    # Data source settings
+    DATA_SOURCE = "bigquery"  # bigquery, file (Parquet/CSV snapshot) or duckdb
+    DATA_SOURCE_PATH = None  # Snapshot file/directory or DuckDB database for the file and duckdb sources
+    DATA_SOURCE_TABLE = "contributions"  # DuckDB table (or view over DATA_SOURCE_PATH files) of contributions
+    
     # Data processing settings
     MIN_CONTRIBUTION_AMOUNT = 0
     MAX_CONTRIBUTION_AMOUNT = 100000
+    STREAM_CHUNK_SIZE = 100000
+    N_WORKERS = 1
+    RULE_INSTRUMENTATION = False  # Per-rule hit counts and timings in the JSON report
+    RULE_PROFILE_MIN_SHARE = 0.2  # Rules deciding this share of profiled rows run first
+    WHOLE_WORD_MAX_LENGTH = 3  # Keywords this short ('INC', 'PAC', 'IT') only match whole words; 0 disables
+    FIRM_MATCH_MAX_EDITS = 2  # Misspellings tolerated when matching known firm names
+    FIRM_MATCH_CHARS_PER_EDIT = 6  # One edit per this many letters of the employer
+    FIRM_MATCH_MIN_FUZZY_WORD = 6  # Longest employer word must be this long to allow any edit
+    FIRM_MATCH_MIN_PREFIX = 10  # Shortest employer matched as a truncated firm name
+    FIRM_MATCH_MIN_PREFIX_WORDS = 1  # Complete firm words a truncated employer must keep
+    CATEGORICAL_COLUMNS = ['source_type', 'candidate_category', 'current_category']  # Loaded as pandas categoricals
+    CATEGORY_MAX_UNIQUE_RATIO = 0.5  # Columns with more distinct values than this share stay strings
+    FLOAT32_AMOUNTS = True  # Store amounts as float32 when every value round-trips to the cent
+    DATA_CACHE_ENABLED = True  # Keep pulled contributions in a local Parquet cache, refreshed incrementally
+    OFFLINE = False  # Run from the local contribution cache only, without querying BigQuery
     
     # Machine Learning settings
     ML_RANDOM_STATE = 42
@@ -25,6 +45,19 @@ class Config:
     MAX_FEATURES_TFIDF = 1000
     MIN_DF_TFIDF = 2
     NGRAM_RANGE = (1, 2)
+    ML_TRAINING_MODE = "forest"  # forest (TF-IDF + random forest) or incremental (hashed features + partial_fit)
+    HASHING_N_FEATURES = 2 ** 18  # Hashed text features of the incremental model
+    SGD_ALPHA = 1e-5  # Regularization of the incremental linear model
+    INCREMENTAL_EPOCHS = 5  # Passes over the training rows when the incremental model is trained from scratch
+    ML_UNIQUE_KEYS = False  # Train on one weighted row per normalized (employer, name) key instead of every transaction
+    ML_SAMPLE_WEIGHT = "count"  # Weight of a unique key: its transactions (count) or summed contribution_amount (amount)
+    ML_PREDICT_BATCH_SIZE = 50000  # Unique records per vectorizer transform / predict_proba call in batch prediction
+    ARRAY_PREDICT_BATCH_SIZE = 512  # Rows per pass of the array-backed forest (see array_model.py)
+    
+    # Classification cache settings (0 disables the cache)
+    CLASSIFICATION_CACHE_SIZE = 10000
+    AMOUNT_BINS = [0, 100, 500, 2000]
+    AMOUNT_BIN_LABELS = ['none', 'small', 'medium', 'large', 'very_large']
     
     # Clustering settings
     N_CLUSTERS = 10
@@ -41,11 +74,18 @@ class Config:
     REPORTS_DIR = os.path.join(BASE_DIR, "reports")
     MODELS_DIR = os.path.join(BASE_DIR, "models")
     MODEL_DIR = os.path.join(BASE_DIR, "models")  # Backward compatibility
+    DATA_CACHE_DIR = os.path.join(BASE_DIR, "data_cache")
     
     # Output files
     ANALYSIS_RESULTS_FILE = os.path.join(OUTPUT_DIR, "analysis_results.json")
     ENHANCED_FUNCTION_FILE = os.path.join(OUTPUT_DIR, "enhanced_function.sql")
     TRAINED_MODEL_FILE = os.path.join(MODEL_DIR, "trained_model.joblib")
+    ARRAY_MODEL_DIR = os.path.join(MODEL_DIR, "array_model")  # Forest and TF-IDF exported as .npy arrays
+    MODEL_REGISTRY_DIR = os.path.join(MODEL_DIR, "registry")  # Versioned models (see model_registry.py)
+    MODEL_REGISTRY_KEEP = 10  # Newest registered versions kept, older ones are pruned (0 keeps all)
+    MODEL_REGISTRY_ARRAYS = False  # Load registered forests from their .npy arrays (fast start, slower predictions)
+    CLASSIFICATION_CACHE_FILE = os.path.join(MODEL_DIR, "classification_cache.json")
+    EMPLOYER_DICTIONARY_FILE = os.path.join(MODEL_DIR, "employer_dictionary.joblib")
     CLASSIFICATION_REPORT_FILE = os.path.join(OUTPUT_DIR, "classification_report.html")
     
     # Logging settings
@@ -67,7 +107,8 @@ class Config:
     ENHANCED_PATTERNS = {
         'lawyer_keywords': [
             'LAW', 'ATTORNEY', 'LEGAL', 'ADVOCATE', 'COUNSEL', 'BARRISTER',
-            'SOLICITOR', 'LITIGATION', 'LAW FIRM', 'COUNSELOR', 'PARALEGAL'
+            'SOLICITOR', 'LITIGATION', 'LAW FIRM', 'COUNSELOR', 'PARALEGAL',
+            'LAWYER'
         ],
         
         'developer_keywords': [
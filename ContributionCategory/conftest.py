@@ -0,0 +1,33 @@
+"""
+Shared pytest fixtures for the model tests
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from config import Config
+from contribution_classifier import ContributionClassifier
+from utils import SyntheticDataGenerator
+
+@pytest.fixture
+def training_frame():
+    """Factory of synthetic feature frames labelled by the rules"""
+    def make(classifier=None, rows=5000, **kwargs):
+        classifier = classifier or ContributionClassifier()
+        df = classifier.extract_features(SyntheticDataGenerator.generate(rows, **kwargs))
+        df['current_category'] = classifier.classify_frame(df).astype(str)
+        return df
+    return make
+
+@pytest.fixture
+def trained_classifier(monkeypatch, training_frame):
+    """Factory of small models trained on a frame (a fresh synthetic one by default)"""
+    def make(df=None, mode='forest', estimators=10):
+        monkeypatch.setattr(Config, 'N_ESTIMATORS', estimators)
+        classifier = ContributionClassifier()
+        classifier.train_ml_classifier(training_frame(classifier) if df is None else df, mode=mode)
+        return classifier
+    return make
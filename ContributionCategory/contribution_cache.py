@@ -0,0 +1,227 @@
+"""
+Local contribution cache for Enhanced Contribution Classification System
+
+Keeps the rows pulled from the contributions view in Parquet files, one
+directory per source_type, so a run only has to fetch filings newer than the
+cache's watermark (the latest contribution_date it holds) instead of scanning
+the whole view. Rows dated on the watermark itself are fetched again and
+replace the cached ones, so filings that arrived later on the same day are
+not missed and none are duplicated.
+"""
+
+import json
+import logging
+import os
+from datetime import date
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+import pandas as pd
+
+from data_sources import DATE_COLUMN, DataSource
+
+logger = logging.getLogger(__name__)
+
+# Column the cache is partitioned by (the watermark tracks DATE_COLUMN)
+PARTITION_COLUMN = 'source_type'
+
+# Manifest of the cached files; the leading underscore keeps Parquet readers
+# that scan the directory from treating it as data
+MANIFEST_FILE = '_manifest.json'
+
+# Directory of rows with a missing source_type (the Hive convention)
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def _as_date(value) -> Optional[date]:
+    """Date of a timestamp-like value (None when missing)"""
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).date()
+
+
+class ContributionCache:
+    """Parquet cache of contribution rows with watermark-based incremental refresh"""
+
+    def __init__(self, cache_dir: str):
+        """
+        Open a cache directory (created on the first write)
+
+        Args:
+            cache_dir: Directory holding the Parquet files and manifest
+        """
+        self.cache_dir = cache_dir
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self) -> Dict:
+        manifest_path = os.path.join(self.cache_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return {'watermark': None, 'next_part': 0, 'files': {}}
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self) -> None:
+        # Written last and replaced atomically: an interrupted refresh leaves
+        # the previous manifest in place
+        manifest_path = os.path.join(self.cache_dir, MANIFEST_FILE)
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump(self._manifest, f, indent=1)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    def exists(self) -> bool:
+        """Whether the cache has been filled"""
+        return bool(self._manifest['files']) or self._manifest['watermark'] is not None
+
+    @property
+    def watermark(self) -> Optional[date]:
+        """Latest contribution_date in the cache"""
+        watermark = self._manifest['watermark']
+        return date.fromisoformat(watermark) if watermark else None
+
+    @property
+    def num_rows(self) -> int:
+        """Number of cached rows"""
+        return sum(entry['rows'] for entry in self._manifest['files'].values())
+
+    def partitions(self) -> List[str]:
+        """Partition directories in the cache"""
+        return sorted({os.path.dirname(relpath) for relpath in self._manifest['files']})
+
+    @staticmethod
+    def _partition_dir(value) -> str:
+        if value is None or pd.isna(value):
+            return f"{PARTITION_COLUMN}={NULL_PARTITION}"
+        return f"{PARTITION_COLUMN}={quote(str(value), safe='')}"
+
+    def _write_part(self, partition: str, frame: pd.DataFrame) -> None:
+        """Write one new Parquet file into a partition directory"""
+        os.makedirs(os.path.join(self.cache_dir, partition), exist_ok=True)
+        relpath = os.path.join(partition, f"part-{self._manifest['next_part']:05d}.parquet")
+        self._manifest['next_part'] += 1
+
+        frame.to_parquet(os.path.join(self.cache_dir, relpath), index=False)
+        max_date = _as_date(frame[DATE_COLUMN].max())
+        self._manifest['files'][relpath] = {
+            'rows': len(frame),
+            'max_date': max_date.isoformat() if max_date else None
+        }
+
+    def _append(self, df: pd.DataFrame) -> None:
+        """Write rows into their partitions and advance the watermark"""
+        partitions = df[PARTITION_COLUMN].map(self._partition_dir)
+        for partition, frame in df.groupby(partitions, sort=True):
+            self._write_part(partition, frame)
+
+        newest = _as_date(df[DATE_COLUMN].max()) if len(df) else None
+        if newest is not None and (self.watermark is None or newest > self.watermark):
+            self._manifest['watermark'] = newest.isoformat()
+
+    def _drop_since(self, since: date, relpaths: List[str]) -> int:
+        """
+        Remove cached rows dated on or after since
+
+        Only files whose newest row is that recent are read and rewritten.
+
+        Args:
+            since: First date removed
+            relpaths: Cached files to look at
+
+        Returns:
+            Number of rows removed
+        """
+        removed = 0
+        for relpath in relpaths:
+            entry = self._manifest['files'][relpath]
+            if entry['max_date'] is None or date.fromisoformat(entry['max_date']) < since:
+                continue
+
+            file_path = os.path.join(self.cache_dir, relpath)
+            frame = pd.read_parquet(file_path)
+            dates = pd.to_datetime(frame[DATE_COLUMN], errors='coerce')
+            keep = ~(dates >= pd.Timestamp(since)).to_numpy()
+            removed += int((~keep).sum())
+
+            if keep.any():
+                self._write_part(os.path.dirname(relpath), frame[keep])
+            del self._manifest['files'][relpath]
+            os.remove(file_path)
+        return removed
+
+    @staticmethod
+    def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+        """Give fetched rows the column types stored in the cache"""
+        if DATE_COLUMN not in df.columns:
+            raise ValueError(f"Cached contributions need a {DATE_COLUMN} column")
+        df = df.copy()
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN], errors='coerce')
+        return df
+
+    def refresh(self, source: DataSource, full: bool = False) -> int:
+        """
+        Bring the cache up to date
+
+        An empty cache (or full=True) is filled with every row. Otherwise only
+        rows dated on or after the watermark are fetched; they replace the
+        cached rows from that date on. Rows are written batch by batch as the
+        source yields them.
+
+        Args:
+            source: Data source of the contributions
+            full: Rebuild the cache from scratch
+
+        Returns:
+            Number of rows fetched
+        """
+        since = None if full or not self.exists() else self.watermark
+
+        # New rows go to new files; the files they replace are removed only
+        # once the fetch has finished, so a failed fetch leaves the cache as it was
+        previous = list(self._manifest['files'])
+        if since is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._manifest['files'] = {}
+            self._manifest['watermark'] = None
+
+        fetched = 0
+        for batch in source.iter_batches(since):
+            self._append(self._prepare(batch))
+            fetched += len(batch)
+
+        if since is None:
+            # Only the cache's own files are removed; the directory may be shared
+            for relpath in previous:
+                file_path = os.path.join(self.cache_dir, relpath)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            logger.info(f"Cached {fetched:,} contributions in {self.cache_dir} "
+                        f"(watermark {self._manifest['watermark']})")
+        else:
+            removed = self._drop_since(since, previous)
+            logger.info(f"Fetched {fetched:,} contributions dated {since} or later "
+                        f"(replacing {removed:,} cached); watermark {self._manifest['watermark']}")
+
+        self._write_manifest()
+        return fetched
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the cached rows
+
+        Args:
+            columns: Columns to read (all when None)
+
+        Returns:
+            DataFrame of every cached row, partition by partition
+        """
+        if not self._manifest['files']:
+            if not self.exists():
+                raise FileNotFoundError(f"No cached contributions in {self.cache_dir}")
+            return pd.DataFrame(columns=columns or [])
+
+        frames = [pd.read_parquet(os.path.join(self.cache_dir, relpath), columns=columns)
+                  for relpath in sorted(self._manifest['files'])]
+        df = pd.concat(frames, ignore_index=True)
+        logger.info(f"Loaded {len(df):,} cached contributions from {self.cache_dir} "
+                    f"(watermark {self._manifest['watermark']})")
+        return df
+
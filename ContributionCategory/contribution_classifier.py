@@ -12,17 +12,33 @@ Date: October 2025
 
 import pandas as pd
 import numpy as np
-from google.cloud import bigquery
-import re
-from typing import Dict, List, Tuple, Optional
+from scipy import sparse
+from typing import Dict, Iterable, List, Tuple, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
-import joblib
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score
+import hashlib
+import json
 import logging
+import os
+import time
+from bisect import bisect_left
 from collections import Counter
+from array_model import ArrayForestModel
+from config import Config
+from contribution_cache import ContributionCache
+from data_sources import BigQuerySource, DataSource, create_data_source
+from employer_dictionary import EmployerDictionary
+from incremental_model import OnlineLinearClassifier, filing_hashes, make_hashing_vectorizer
+from model_registry import ModelRegistry, data_fingerprint, is_model_version
+from rule_engine import (CompiledRuleEngine, RuleStats, classify_frame, classify_frame_multilabel,
+                         load_rule_profile, preprocess_series)
+from sql_compiler import compile_classification_udf
+from streaming import chunk_frame
+from text_normalizer import PREPROCESSOR
+from utils import ClassificationCache, FrameOptimizer, KeyDeduplicator
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -35,15 +51,22 @@ class ContributionClassifier:
     Enhanced contribution classification system using ML techniques
     """
     
-    def __init__(self, project_id: str = "campaignanalytics-182101"):
+    def __init__(self, project_id: str = "campaignanalytics-182101", cache_size: Optional[int] = None,
+                 data_source: Optional[DataSource] = None):
         """
-        Initialize the classifier with BigQuery client
+        Initialize the classifier and its data source
         
         Args:
             project_id: Google Cloud project ID
+            cache_size: Maximum enhanced_classify cache entries,
+                defaults to Config.CLASSIFICATION_CACHE_SIZE (0 disables caching)
+            data_source: Source of contribution rows, defaults to the one
+                selected by Config.DATA_SOURCE
         """
         self.project_id = project_id
-        self.client = bigquery.Client(project=project_id)
+        self.data_source = data_source or create_data_source(project_id=project_id)
+        # Created on first use, so runs on local sources never need credentials
+        self._client = None
         self.categories = [
             'Lawyer', 'Developer', 'BusinessOwner', 'Individual', 
             'Pohlad family', 'Association', 'Others'
@@ -54,24 +77,81 @@ class ContributionClassifier:
         self.classifier = None
         self.kmeans = None
         self.is_trained = False
+        # Newest contribution_date the model was trained on, and held-out scores
+        self.trained_through = None
+        self.training_metrics = {}
+        # Hashes of the filings dated trained_through that the model learned
+        # (see filing_hashes), so late filings on that date still fold in
+        self.boundary_filings = None
+        # Content hash of the training data, and the registry version the
+        # model arrays are memory-mapped from (see load_registered_model)
+        self.training_data_hash = None
+        self.model_source = None
+        
+        # Memoized enhanced_classify results
+        self.cache = ClassificationCache(
+            Config.CLASSIFICATION_CACHE_SIZE if cache_size is None else cache_size
+        )
         
         # Pattern dictionaries from existing SQL function
         self.initialize_patterns()
+        
+        # Compile all keyword rules into a single automaton
+        self.rule_engine = CompiledRuleEngine({
+            'lawyer': self.lawyer_patterns,
+            'developer': self.developer_patterns,
+            'business_owner': self.business_owner_patterns
+        })
+        
+        # Canonical employer IDs for the analysis stages
+        self.employer_dictionary = EmployerDictionary(self.rule_engine.firm_index)
+    
+    def __getstate__(self) -> Dict:
+        """Pickle without the data source, cached results or employer IDs (for worker processes)"""
+        state = self.__dict__.copy()
+        state['_client'] = None
+        state['data_source'] = None
+        state['cache'] = ClassificationCache(self.cache.max_size)
+        # Employer IDs are only assigned in the parent process, so they stay consistent
+        state['employer_dictionary'] = None
+        if self.model_source is not None:
+            # Workers map the registered arrays themselves instead of
+            # receiving a private copy of the model
+            state['classifier'] = None
+            state['vectorizer'] = None
+        return state
+    
+    def __setstate__(self, state: Dict) -> None:
+        """Restore a pickled classifier, re-mapping a registered model"""
+        self.__dict__.update(state)
+        if state.get('model_source') is not None:
+            source = self.model_source
+            self.load_registered_model(source['version'], ModelRegistry(source['root']), source['mmap_mode'],
+                                       source.get('arrays'))
+    
+    @property
+    def client(self):
+        """BigQuery client for deploying the enhanced UDF, created on first use"""
+        if self._client is None:
+            source = self.data_source
+            if not isinstance(source, BigQuerySource):
+                source = BigQuerySource(self.project_id)
+            self._client = source.client
+        return self._client
     
     def initialize_patterns(self):
         """Initialize pattern dictionaries based on existing SQL function"""
         
+        # exact_matches list each firm once: misspelled and truncated
+        # employers resolve to the nearest firm (see firm_index.FirmNameIndex)
         self.lawyer_patterns = {
             'exact_matches': [
                 'North State Advisors', 'Lockridge Grindal Nauen', 'Attorney',
                 'McGrann Shea Carnival Straughn and Lamb', 'Dykema',
                 'Faegre Baker Daniels', 'Stinson Leonard Street', 'Goff Public Relations',
                 'Redmond Associates, Inc.', 'Dominium', 'Lobbyist', 'Messerli Kramer',
-                'Kaplan Strangis', 'Faegre Baker Ds', 'Faegre Baker D',
-                'Brlol and Associates', 'Lockridge Grindai Nauen',
-                'Maslon, Edelman, Borman & Brand', 'McGrann Shea C',
-                'McGrahn Shea Carnival Stra', 'North State Adv',
-                'North State Advi', 'Western Litigation'
+                'Kaplan Strangis', 'Brlol and Associates',
+                'Maslon, Edelman, Borman & Brand', 'Western Litigation'
             ],
             'pattern_matches': [
                 'HOFFNER', 'LGN', 'DYKEMA', 'BAKER', 'LINDQUIST', 'ADVOCACY'
@@ -81,11 +161,11 @@ class ContributionClassifier:
         
         self.developer_patterns = {
             'exact_matches': [
-                'Keller Williams Realty', 'Developer', 'Developers',
-                'Hillcrest Develop', 'Kraus Anderson', 'Ryan Construction',
+                'Keller Williams Realty', 'Developer',
+                'Kraus Anderson', 'Ryan Construction',
                 'Weis Builders', 'Brighton Development', 'Mortenson Construction',
-                'Mortensori Construction', 'RSP Architects', 'Building Manager',
-                'Realtor', 'Dunbar Development', 'Keller Williams R',
+                'RSP Architects', 'Building Manager',
+                'Realtor', 'Dunbar Development',
                 'Prospect Park Properties', 'Ryan Companies', 'Kleinman Realty Company',
                 'Opus Group', 'Contractor', 'Hyde Development',
                 'Provident Real Estate Venture', 'Thor Construction',
@@ -151,34 +231,52 @@ class ContributionClassifier:
             ]
         }
     
-    def load_data(self) -> pd.DataFrame:
+    def load_data(self, offline: Optional[bool] = None, full_refresh: bool = False,
+                  source: Optional[DataSource] = None) -> pd.DataFrame:
         """
-        Load contribution data from BigQuery view
+        Load contribution data from the data source
         
+        With Config.DATA_CACHE_ENABLED the rows of remote sources (BigQuery)
+        are kept in a local Parquet cache (Config.DATA_CACHE_DIR) and only
+        filings dated on or after its watermark are queried; local snapshots
+        are read directly.
+        
+        Args:
+            offline: Read the cache only, without querying the source;
+                defaults to Config.OFFLINE
+            full_refresh: Rebuild the cache from a full query
+            source: Data source, defaults to the classifier's data_source
+            
         Returns:
-            DataFrame with contribution data
-        """
-        query = """
-        SELECT 
-            contributor_name,
-            contributor_employer,
-            contributor_first_name,
-            contributor_last_name,
-            contribution_amount,
-            source_type,
-            candidate_category,
-            `campaignanalytics-182101.dq.dq_B_ContriCategory`(
-                contributor_employer, 
-                contributor_name
-            ) AS current_category
-        FROM `campaignanalytics-182101.Munidata.Mpls_All_Contributions_View`
-        WHERE contributor_name IS NOT NULL
-        """
-        
-        logger.info("Loading contribution data from BigQuery...")
-        df = self.client.query(query).to_dataframe()
+            DataFrame with contribution data in memory-efficient dtypes
+            (see FrameOptimizer.optimize); the per-column memory report is in
+            df.attrs['memory_report']
+        """
+        offline = Config.OFFLINE if offline is None else offline
+        source = source or self.data_source
+        
+        if offline or (Config.DATA_CACHE_ENABLED and source.remote):
+            cache = ContributionCache(Config.DATA_CACHE_DIR)
+            if offline:
+                if not cache.exists():
+                    raise FileNotFoundError(f"No cached contributions in {Config.DATA_CACHE_DIR}; "
+                                            f"run once without offline mode to fill the cache")
+                logger.info(f"Offline mode: using cached contributions up to {cache.watermark}")
+            else:
+                cache.refresh(source, full=full_refresh)
+            df = cache.load()
+        else:
+            df = source.fetch()
         logger.info(f"Loaded {len(df):,} contribution records")
         
+        # Shrink the frame before any processing copies it
+        baseline = df.memory_usage(deep=True, index=False)
+        df = FrameOptimizer.optimize(df)
+        report = FrameOptimizer.memory_report(df, baseline)
+        df.attrs['memory_report'] = report
+        logger.info(f"Contribution frame uses {report['total_mb']:,.1f} MB "
+                    f"({report['reduction']:.1f}x smaller than {report['baseline_total_mb']:,.1f} MB)")
+        
         return df
     
     def preprocess_text(self, text: str) -> str:
@@ -191,19 +289,9 @@ class ContributionClassifier:
         Returns:
             Cleaned text string
         """
-        if pd.isna(text) or text is None:
-            return ""
-        
-        # Convert to uppercase and strip whitespace
-        text = str(text).upper().strip()
-        
-        # Remove special characters but keep spaces and common business terms
-        text = re.sub(r'[^\w\s&\-\.]', ' ', text)
-        
-        # Normalize multiple spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text
+        # Uppercase, keep word characters and common business punctuation
+        # (&, -, .) and collapse everything else to single spaces
+        return PREPROCESSOR.normalize(text)
     
     def extract_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -219,8 +307,8 @@ class ContributionClassifier:
         
         # Create feature columns
         df = df.copy()
-        df['employer_clean'] = df['contributor_employer'].apply(self.preprocess_text)
-        df['name_clean'] = df['contributor_name'].apply(self.preprocess_text)
+        df['employer_clean'] = preprocess_series(df['contributor_employer'])
+        df['name_clean'] = preprocess_series(df['contributor_name'])
         
         # Text length features
         df['employer_length'] = df['employer_clean'].str.len()
@@ -257,130 +345,510 @@ class ContributionClassifier:
         Returns:
             Predicted category
         """
-        from config import Config
-        
         employer_clean = self.preprocess_text(employer) if employer else ""
         name_clean = self.preprocess_text(name) if name else ""
-        employer_original = str(employer).strip() if employer else ""
-        
-        # Check specific employer mappings first (case-insensitive partial matches)
-        if hasattr(Config, 'EMPLOYER_MAPPINGS'):
-            for employer_key, category in Config.EMPLOYER_MAPPINGS.items():
-                if employer_key.upper() in employer_clean or employer_key.upper() in employer_original.upper():
-                    return category
-        
-        # Pohlad family check - NOW MERGED INTO BusinessOwner
-        if 'POHLAD' in name_clean or 'POHLAD' in employer_clean:
-            return 'BusinessOwner'
         
-        # Enhanced Lawyer patterns
-        lawyer_keywords = Config.ENHANCED_PATTERNS.get('lawyer_keywords', [])
-        if any(keyword in employer_clean for keyword in lawyer_keywords):
-            return 'Lawyer'
-        
-        # Enhanced Developer patterns  
-        developer_keywords = Config.ENHANCED_PATTERNS.get('developer_keywords', [])
-        if any(keyword in employer_clean for keyword in developer_keywords):
-            return 'Developer'
-        
-        # Enhanced BusinessOwner patterns (including business entity types)
-        business_keywords = Config.ENHANCED_PATTERNS.get('business_owner_keywords', [])
+        # Rules are evaluated in priority order over a single scan of each field
+        return self.rule_engine.classify(employer, employer_clean, name_clean)
+    
+    def classify_frame(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Apply rule-based classification to a whole DataFrame at once
         
-        # Check for business entity indicators
-        business_entities = ['LLC', 'INC', 'CORP', 'COMPANY', 'BUSINESS', 'CONSULTING', 'SERVICES']
-        has_business_entity = any(entity in employer_clean for entity in business_entities)
+        Args:
+            df: DataFrame with contributor_employer and contributor_name columns
+            
+        Returns:
+            Categorical Series of predicted categories aligned with df
+        """
+        return classify_frame(df, self.rule_engine)
+    
+    def classify_frame_multilabel(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply rule-based classification and keep every matched category
         
-        # Check for business/professional keywords
-        has_business_keyword = any(keyword in employer_clean for keyword in business_keywords)
+        Args:
+            df: DataFrame with contributor_employer and contributor_name columns
+            
+        Returns:
+            DataFrame aligned with df with 'category' and 'category_mask'
+            columns; decode masks with rule_engine.mask_categories
+        """
+        return classify_frame_multilabel(df, self.rule_engine)
+    
+    def enable_instrumentation(self, enabled: bool = True) -> None:
+        """
+        Turn per-rule hit counts and timings on or off
         
-        # Check for financial/professional service companies
-        financial_indicators = ['BANK', 'FINANCIAL', 'CAPITAL', 'INVESTMENT', 'REALTY', 'INSURANCE']
-        has_financial_indicator = any(indicator in employer_clean for indicator in financial_indicators)
+        Instrumentation adds a timer call per rule evaluation, so it is off
+        by default. Enabling it again starts from zeroed counters.
         
-        if has_business_entity or has_business_keyword or has_financial_indicator:
-            return 'BusinessOwner'
+        Args:
+            enabled: Whether to record rule statistics
+        """
+        self.rule_engine.stats = RuleStats(self.rule_engine.rules) if enabled else None
+    
+    def get_rule_stats(self) -> Optional[Dict]:
+        """
+        Get per-rule instrumentation counters
         
-        # Enhanced Individual patterns (including government employees)
-        individual_keywords = Config.ENHANCED_PATTERNS.get('individual_keywords', [])
-        if (any(keyword in employer_clean for keyword in individual_keywords) or
-            not employer_clean or employer_clean in ['', 'NONE', 'N/A', 'UNKNOWN']):
-            return 'Individual'
+        Returns:
+            Dictionary of rows, unmatched rows and per-rule evaluated/matched
+            counts and seconds, or None if instrumentation is off
+        """
+        stats = self.rule_engine.stats
+        return stats.to_dict() if stats is not None else None
+    
+    def apply_rule_profile(self, profile) -> List[str]:
+        """
+        Reorder vectorized rule evaluation using a previous run's rule hit counts
         
-        # Enhanced Association patterns
-        association_keywords = Config.ENHANCED_PATTERNS.get('association_keywords', [])
-        association_in_name = any(keyword in name_clean for keyword in association_keywords)
-        association_in_employer = any(keyword in employer_clean for keyword in association_keywords)
+        Results are unchanged; only the order in which rules are evaluated is.
         
-        if association_in_name or association_in_employer:
-            return 'Association'
+        Args:
+            profile: get_rule_stats() output, a path to a JSON file holding it
+                (or an analysis report with a rule_instrumentation section),
+                or None to restore priority-order evaluation
+            
+        Returns:
+            Names of the rules evaluated ahead of priority order
+        """
+        if isinstance(profile, str):
+            profile = load_rule_profile(profile)
+        return self.rule_engine.apply_profile(profile)
+    
+    def explain(self, employer: str, name: str) -> Dict:
+        """
+        Explain the rule-based classification of a contribution
         
-        # Legacy patterns fallback (from original SQL function)
-        if (employer in self.lawyer_patterns.get('exact_matches', []) or
-            any(pattern in employer_clean for pattern in self.lawyer_patterns.get('pattern_matches', []))):
-            return 'Lawyer'
+        Args:
+            employer: Contributor employer
+            name: Contributor name
+            
+        Returns:
+            Decision trace with the category, deciding rule and the
+            matching keywords of every rule
+        """
+        employer_clean = self.preprocess_text(employer) if employer else ""
+        name_clean = self.preprocess_text(name) if name else ""
+        return self.rule_engine.explain(employer, employer_clean, name_clean)
+    
+    @staticmethod
+    def combine_features(X_text, numerical_features) -> sparse.csr_matrix:
+        """
+        Append numerical features to TF-IDF vectors without densifying
         
-        if (employer in self.developer_patterns.get('exact_matches', []) or
-            any(pattern in employer_clean for pattern in self.developer_patterns.get('pattern_matches', []))):
-            return 'Developer'
+        Args:
+            X_text: Sparse TF-IDF matrix
+            numerical_features: Array-like of employer_length, name_length, log_amount
+            
+        Returns:
+            Sparse CSR feature matrix
+        """
+        X_numerical = sparse.csr_matrix(np.asarray(numerical_features, dtype=np.float64))
+        return sparse.hstack([X_text, X_numerical], format='csr')
+    
+    @staticmethod
+    def _text_features(df: pd.DataFrame) -> pd.Series:
+        """Employer and name text the vectorizer sees"""
+        return (df['contributor_employer'].fillna('') + ' ' +
+                df['contributor_name'].fillna('')).str.strip()
+    
+    def _training_matrix(self, df: pd.DataFrame) -> sparse.csr_matrix:
+        """Feature matrix of rows with extracted features (vectorizer already set up)"""
+        numerical_features = df[['employer_length', 'name_length', 'log_amount']].fillna(0)
+        return self.combine_features(self.vectorizer.transform(self._text_features(df)), numerical_features.values)
+    
+    @staticmethod
+    def aggregate_training_rows(df: pd.DataFrame, weight: Optional[str] = None) -> pd.DataFrame:
+        """
+        Collapse training rows to one weighted row per contributor key
         
-        if (employer in self.business_owner_patterns.get('exact_matches', []) or
-            any(pattern in employer_clean for pattern in self.business_owner_patterns.get('pattern_matches', []))):
-            return 'BusinessOwner'
+        A donor who gave 40 times otherwise contributes 40 identical feature
+        vectors. Rows are keyed on the normalized employer and name plus the
+        label, so conflicting labels of one contributor are kept apart. Each
+        key keeps its first row's text and lengths (equal within a key), the
+        mean log_amount and the newest contribution_date.
         
-        return 'Others'
+        Args:
+            df: Training DataFrame with extracted features and current_category
+            weight: 'count' (transactions per key) or 'amount' (summed
+                contribution_amount), defaults to Config.ML_SAMPLE_WEIGHT
+            
+        Returns:
+            One row per key with a sample_weight column
+        """
+        weight = weight or Config.ML_SAMPLE_WEIGHT
+        if weight not in ('count', 'amount'):
+            raise ValueError(f"Unknown sample weight: {weight} (expected count or amount)")
+        
+        # main() drops the *_clean columns once rules have run
+        keys = pd.DataFrame({
+            'employer': df['employer_clean'] if 'employer_clean' in df.columns else preprocess_series(df['contributor_employer']),
+            'name': df['name_clean'] if 'name_clean' in df.columns else preprocess_series(df['contributor_name']),
+            'label': df['current_category'].fillna('Others').astype(str)
+        })
+        codes, first_positions = KeyDeduplicator.factorize(keys, ['employer', 'name', 'label'])
+        counts = np.bincount(codes, minlength=len(first_positions))
+        
+        unique = df.iloc[first_positions][['contributor_employer', 'contributor_name',
+                                           'employer_length', 'name_length']].reset_index(drop=True)
+        unique['current_category'] = keys['label'].iloc[first_positions].to_numpy()
+        log_amount = df['log_amount'].fillna(0).to_numpy(dtype=np.float64)
+        unique['log_amount'] = np.bincount(codes, weights=log_amount, minlength=len(counts)) / counts
+        if 'contribution_date' in df.columns:
+            dates = pd.to_datetime(df['contribution_date'], errors='coerce')
+            unique['contribution_date'] = dates.groupby(codes).max().to_numpy()
+        
+        if weight == 'count':
+            unique['sample_weight'] = counts.astype(np.float64)
+        else:
+            amounts = df['contribution_amount'].fillna(0).clip(lower=0).to_numpy(dtype=np.float64)
+            unique['sample_weight'] = np.bincount(codes, weights=amounts, minlength=len(counts))
+            # Keys that only gave refunds or zero amounts carry no weight
+            unique = unique[unique['sample_weight'] > 0].reset_index(drop=True)
+        
+        ratio = len(df) / len(unique) if len(unique) else 1.0
+        logger.info(f"Training keys: {len(df):,} rows -> {len(unique):,} unique contributors "
+                    f"({ratio:.1f}x fewer, weighted by {weight})")
+        return unique
+    
+    @staticmethod
+    def _balanced_weights(y: pd.Series, sample_weight: np.ndarray) -> np.ndarray:
+        """class_weight='balanced' over weighted rows, times the row weights"""
+        labels, codes = np.unique(np.asarray(y, dtype=object), return_inverse=True)
+        mass = np.bincount(codes, weights=sample_weight, minlength=len(labels))
+        return sample_weight * (mass.sum() / (len(labels) * mass))[codes]
+    
+    @property
+    def model_fingerprint(self) -> Optional[str]:
+        """Identifies the loaded model by its training data and scores (None for rules only)"""
+        if not self.is_trained:
+            return None
+        model = json.dumps([self.training_data_hash, self.training_metrics], sort_keys=True, default=str)
+        return hashlib.sha256(model.encode()).hexdigest()
+    
+    @property
+    def is_incremental(self) -> bool:
+        """Whether the model can be updated with train_incremental"""
+        return isinstance(self.classifier, OnlineLinearClassifier)
     
-    def train_ml_classifier(self, df: pd.DataFrame) -> None:
+    def train_ml_classifier(self, df: pd.DataFrame, mode: Optional[str] = None,
+                            unique_keys: Optional[bool] = None) -> bool:
         """
         Train machine learning classifier
         
+        Both modes train on the same split and are evaluated on the same
+        held-out rows; the scores are kept in self.training_metrics. With
+        unique_keys, only the training rows are collapsed to weighted
+        contributor keys (see aggregate_training_rows); evaluation still runs
+        on every held-out transaction, so reports stay comparable.
+        
         Args:
             df: Training DataFrame with features
+            mode: 'forest' (TF-IDF + random forest) or 'incremental' (hashed
+                features + online linear model), defaults to
+                Config.ML_TRAINING_MODE
+            unique_keys: Train on unique contributor keys, defaults to
+                Config.ML_UNIQUE_KEYS
+            
+        Returns:
+            True when training completed
         """
-        logger.info("Training ML classifier...")
-        
-        # Prepare text features for vectorization
-        # Prepare features for ML training
-        text_features = (df['contributor_employer'].fillna('') + ' ' +
-                        df['contributor_name'].fillna('')).str.strip()
-        
-        # Create TF-IDF vectors
-        self.vectorizer = TfidfVectorizer(
-            max_features=1000,
-            ngram_range=(1, 2),
-            stop_words='english',
-            min_df=2
-        )
-        
-        X_text = self.vectorizer.fit_transform(text_features)
-        
-        # Combine with numerical features
-        numerical_features = df[['employer_length', 'name_length', 'log_amount']].fillna(0)
-        X_combined = np.hstack([X_text.toarray(), numerical_features.values])
+        mode = mode or Config.ML_TRAINING_MODE
+        unique_keys = Config.ML_UNIQUE_KEYS if unique_keys is None else unique_keys
+        if mode not in ('forest', 'incremental'):
+            raise ValueError(f"Unknown training mode: {mode} (expected forest or incremental)")
+        logger.info(f"Training ML classifier ({mode})...")
+        start = time.perf_counter()
         
         # Use current categories as labels for training
-        y = df['current_category'].fillna('Others')
+        y = df['current_category'].fillna('Others').astype(str)
         
         # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_combined, y, test_size=0.2, random_state=42, 
+        train_rows, test_rows = train_test_split(
+            np.arange(len(df)), test_size=Config.TEST_SIZE, random_state=Config.ML_RANDOM_STATE,
             stratify=y if len(np.unique(y)) > 1 else None
         )
-        
-        # Train classifier
-        self.classifier = RandomForestClassifier(
-            n_estimators=100,
-            random_state=42,
-            class_weight='balanced'
-        )
-        self.classifier.fit(X_train, y_train)
+        y_train, y_test = y.iloc[train_rows], y.iloc[test_rows]
+        train_df = df.iloc[train_rows]
+        sample_weight = None
+        if unique_keys:
+            train_df = self.aggregate_training_rows(train_df)
+            y_train = train_df['current_category']
+            sample_weight = train_df['sample_weight'].to_numpy()
+        
+        if mode == 'incremental':
+            # Shuffled passes over the training rows, chunk by chunk
+            self.classifier = None
+            rng = np.random.default_rng(Config.ML_RANDOM_STATE)
+            for _ in range(Config.INCREMENTAL_EPOCHS):
+                self.train_incremental(chunk_frame(train_df.iloc[rng.permutation(len(train_df))]))
+            if unique_keys:
+                self._advance_watermark(df.iloc[train_rows])
+            X_test = self._training_matrix(df.iloc[test_rows])
+        else:
+            # Create TF-IDF vectors
+            self.vectorizer = TfidfVectorizer(
+                max_features=Config.MAX_FEATURES_TFIDF,
+                ngram_range=Config.NGRAM_RANGE,
+                stop_words='english',
+                min_df=Config.MIN_DF_TFIDF
+            )
+            if unique_keys:
+                # Vocabulary from the unique training keys; the balanced class
+                # weights are taken over transactions, not keys
+                self.vectorizer.fit(self._text_features(train_df))
+                X_train = self._training_matrix(train_df)
+                X_test = self._training_matrix(df.iloc[test_rows])
+                class_weight = None
+                sample_weight = self._balanced_weights(y_train, sample_weight)
+            else:
+                X_text = self.vectorizer.fit_transform(self._text_features(df))
+                
+                # Combine with numerical features
+                numerical_features = df[['employer_length', 'name_length', 'log_amount']].fillna(0)
+                X_combined = self.combine_features(X_text, numerical_features.values)
+                X_train, X_test = X_combined[train_rows], X_combined[test_rows]
+                class_weight = 'balanced'
+            
+            # Train classifier
+            self.classifier = RandomForestClassifier(
+                n_estimators=Config.N_ESTIMATORS,
+                random_state=Config.ML_RANDOM_STATE,
+                class_weight=class_weight
+            )
+            self.classifier.fit(X_train, y_train, sample_weight=sample_weight)
+            self.trained_through = self._newest_date(df)
+            self.boundary_filings = None
+        self.model_source = None
         
         # Evaluate
         y_pred = self.classifier.predict(X_test)
         logger.info("Classification Report:")
         logger.info(f"\n{classification_report(y_test, y_pred)}")
+        self.training_metrics = {
+            'mode': mode,
+            'train_rows': int(len(train_rows)),
+            'unique_keys': bool(unique_keys),
+            'train_keys': int(len(train_df)),
+            'test_rows': int(len(test_rows)),
+            'accuracy': float(accuracy_score(y_test, y_pred)),
+            'macro_f1': float(f1_score(y_test, y_pred, average='macro', zero_division=0)),
+            'training_seconds': round(time.perf_counter() - start, 2)
+        }
         
+        if mode == 'incremental':
+            # Scored, the held-out rows are folded in too: later updates skip
+            # filings older than trained_through, so they are learned now or never
+            test_df = df.iloc[test_rows]
+            self.train_incremental(chunk_frame(self.aggregate_training_rows(test_df) if unique_keys else test_df))
+            if unique_keys:
+                self._advance_watermark(test_df)
+        
+        self.training_data_hash = data_fingerprint(df)
         self.is_trained = True
+        # Cached results came from the previous model
+        self.cache.clear()
         logger.info("ML classifier training completed")
+        return True
+    
+    @staticmethod
+    def _newest_date(df: pd.DataFrame) -> Optional[pd.Timestamp]:
+        """Latest contribution_date of a frame (None without dates)"""
+        if 'contribution_date' not in df.columns:
+            return None
+        newest = pd.to_datetime(df['contribution_date'], errors='coerce').max()
+        return None if pd.isna(newest) else newest
+    
+    def train_incremental(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """
+        Fold chunks of training rows into the incremental model
+        
+        Starts a new hashed-feature model unless the current one is
+        incremental; nothing already learned is revisited.
+        
+        Args:
+            chunks: DataFrames with extracted features and current_category
+                (and sample_weight, when aggregated to unique keys)
+            
+        Returns:
+            Number of rows folded in
+        """
+        if not self.is_incremental:
+            self.vectorizer = make_hashing_vectorizer()
+            self.classifier = OnlineLinearClassifier(self.categories)
+            self.trained_through = None
+            self.boundary_filings = None
+            self.training_data_hash = None
+        self.model_source = None
+        
+        rows = 0
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            labels = chunk['current_category'].fillna('Others').astype(str)
+            sample_weight = chunk['sample_weight'].to_numpy() if 'sample_weight' in chunk.columns else None
+            self.classifier.partial_fit(self._training_matrix(chunk), labels, sample_weight)
+            self.training_data_hash = data_fingerprint(chunk, self.training_data_hash)
+            rows += len(chunk)
+            # Aggregated chunks no longer hold the filings; callers that
+            # aggregate advance the watermark from the raw rows
+            if 'sample_weight' not in chunk.columns:
+                self._advance_watermark(chunk)
+        
+        if rows:
+            self.is_trained = True
+            self.cache.clear()
+        return rows
+    
+    def _advance_watermark(self, rows: pd.DataFrame) -> None:
+        """Move trained_through to the newest filing folded in and record the filings dated on it"""
+        newest = self._newest_date(rows)
+        if newest is None:
+            return
+        if self.trained_through is None or newest > self.trained_through:
+            self.trained_through = newest
+            self.boundary_filings = np.array([], dtype=np.uint64)
+        if newest == self.trained_through:
+            dates = pd.to_datetime(rows['contribution_date'], errors='coerce')
+            boundary = filing_hashes(rows[(dates == newest).to_numpy()])
+            seen = self.boundary_filings if self.boundary_filings is not None else boundary[:0]
+            self.boundary_filings = np.union1d(seen, boundary)
+        
+    def update_ml_classifier(self, df: pd.DataFrame) -> int:
+        """
+        Fold filings the incremental model has not learned into it
+        
+        Filings dated after trained_through are new. Filings dated on it may
+        have been filed late, so those are new unless their hash is among the
+        boundary_filings already learned (models saved without them only take
+        later dates). Identical filings on the watermark date count once.
+        
+        Args:
+            df: DataFrame with extracted features, current_category and
+                contribution_date
+            
+        Returns:
+            Number of new filings folded in
+        """
+        if not self.is_incremental:
+            raise ValueError("update_ml_classifier needs an incremental model (ML_TRAINING_MODE = 'incremental')")
+        
+        new_rows = df
+        if self.trained_through is not None and 'contribution_date' in df.columns:
+            dates = pd.to_datetime(df['contribution_date'], errors='coerce')
+            new = (dates > self.trained_through).to_numpy(copy=True)
+            if self.boundary_filings is not None:
+                late = np.flatnonzero((dates == self.trained_through).to_numpy())
+                new[late] = ~np.isin(filing_hashes(df.iloc[late]), self.boundary_filings)
+            new_rows = df[new]
+        rows = len(new_rows)
+        filings = new_rows
+        if Config.ML_UNIQUE_KEYS and rows:
+            new_rows = self.aggregate_training_rows(new_rows)
+        
+        if not self.train_incremental(chunk_frame(new_rows)):
+            rows = 0
+        elif Config.ML_UNIQUE_KEYS:
+            self._advance_watermark(filings)
+        logger.info(f"Folded {rows:,} new filings into the incremental model "
+                    f"({self.classifier.n_rows_seen:,} rows seen, newest {self.trained_through})")
+        return rows
+    
+    def load_model(self, file_path: str = None) -> None:
+        """
+        Load trained model artifacts saved by ModelPersistence.save_model_artifacts
+        
+        A directory is loaded as an array model written by export_array_model,
+        which predicts the same categories without unpickling the forest, or
+        as a registered model version (see load_registered_model).
+        
+        Args:
+            file_path: Model file, array model directory or registry version
+                directory, defaults to Config.TRAINED_MODEL_FILE
+        """
+        from utils import ModelPersistence
+        
+        file_path = file_path or Config.TRAINED_MODEL_FILE
+        if is_model_version(file_path):
+            path = os.path.abspath(file_path)
+            self.load_registered_model(os.path.basename(path), ModelRegistry(os.path.dirname(path)))
+            return
+        self.model_source = None
+        if os.path.isdir(file_path):
+            model = ArrayForestModel.load(file_path)
+            self.classifier = model.forest
+            self.vectorizer = model.vectorizer
+            self.is_trained = True
+            trained_through = model.metadata.get('trained_through')
+            self.trained_through = None if trained_through is None else pd.Timestamp(trained_through)
+            self.training_metrics = model.metadata.get('training_metrics', {})
+            self.training_data_hash = None
+            self.boundary_filings = None
+            self.cache.clear()
+            return
+        
+        artifacts = ModelPersistence.load_model_artifacts(file_path)
+        self.classifier = artifacts['classifier']
+        self.vectorizer = artifacts['vectorizer']
+        self.is_trained = artifacts.get('is_trained', self.classifier is not None)
+        self.trained_through = artifacts.get('trained_through')
+        self.training_metrics = artifacts.get('training_metrics', {})
+        self.training_data_hash = artifacts.get('training_data_hash')
+        self.boundary_filings = artifacts.get('boundary_filings')
+        self._reuse_firm_index(artifacts.get('firm_index'))
+        self.cache.clear()
+    
+    def load_registered_model(self, version: Optional[str] = None, registry: Optional[ModelRegistry] = None,
+                              mmap_mode: Optional[str] = 'r', arrays: Optional[bool] = None) -> str:
+        """
+        Load a model version from the model registry
+        
+        With a mmap_mode the model arrays are memory-mapped from the registry,
+        so every process loading the version shares one copy of them (forest
+        trees only when loaded as arrays); the classifier then pickles by
+        reference and pool workers load the version themselves rather than
+        receiving a copy. Incremental models that will be updated need
+        mmap_mode=None (read-only arrays cannot be updated).
+        
+        Args:
+            version: Version name, defaults to the latest registered version
+            registry: ModelRegistry, defaults to the one at Config.MODEL_REGISTRY_DIR
+            mmap_mode: 'r' (shared, read-only), 'c' (copy-on-write) or None
+                (read into private memory)
+            arrays: Load a forest from its NumPy arrays (see ModelRegistry.load),
+                defaults to Config.MODEL_REGISTRY_ARRAYS
+            
+        Returns:
+            The loaded version name
+        """
+        registry = registry or ModelRegistry()
+        loaded = registry.load(version, mmap_mode=mmap_mode, arrays=arrays)
+        metadata = loaded['metadata']
+        
+        self.classifier = loaded['classifier']
+        self.vectorizer = loaded['vectorizer']
+        self.is_trained = True
+        trained_through = metadata.get('trained_through')
+        self.trained_through = None if trained_through is None else pd.Timestamp(trained_through)
+        self.training_metrics = metadata.get('metrics') or {}
+        self.training_data_hash = metadata.get('data_hash')
+        self.boundary_filings = loaded.get('boundary_filings')
+        self.model_source = {'root': os.path.abspath(registry.root), 'version': loaded['version'],
+                             'mmap_mode': mmap_mode, 'arrays': arrays} if mmap_mode else None
+        self._reuse_firm_index(loaded.get('firm_index'))
+        self.cache.clear()
+        return loaded['version']
+    
+    def _reuse_firm_index(self, firm_index) -> None:
+        """Adopt a saved firm index if it still matches the rules"""
+        if firm_index is None:
+            return
+        if firm_index.same_firms(self.rule_engine.firm_index):
+            self.rule_engine.firm_index = firm_index
+        else:
+            logger.warning("Saved firm name index does not match the current rules; keeping the rebuilt index")
     
     def discover_new_categories(self, df: pd.DataFrame, n_clusters: int = 10) -> Dict:
         """
@@ -402,9 +870,12 @@ class ContributionClassifier:
             logger.info("Insufficient 'Others' data for clustering analysis")
             return {}
         
-        # Prepare text data
-        text_features = (others_df['employer_clean'].fillna('') + ' ' + 
-                        others_df['name_clean'].fillna('')).str.strip()
+        # Prepare text data; canonical employer names fold spelling variants together
+        if 'employer_id' in others_df.columns:
+            employers = pd.Series(self.employer_dictionary.decode(others_df['employer_id']), index=others_df.index)
+        else:
+            employers = others_df['employer_clean'].fillna('')
+        text_features = (employers + ' ' + others_df['name_clean'].fillna('')).str.strip()
         
         # Vectorize
         vectorizer = TfidfVectorizer(max_features=500, ngram_range=(1, 2))
@@ -421,13 +892,16 @@ class ContributionClassifier:
             cluster_data = others_df[cluster_mask]
             
             # Get top employers and names in this cluster
-            top_employers = cluster_data['employer_clean'].value_counts().head(5)
+            if 'employer_id' in cluster_data.columns:
+                top_employers = self.employer_dictionary.top_employers(cluster_data['employer_id'], n=5)
+            else:
+                top_employers = cluster_data['employer_clean'].value_counts().head(5).to_dict()
             top_names = cluster_data['name_clean'].value_counts().head(5)
             
             cluster_analysis[f'cluster_{cluster_id}'] = {
                 'size': len(cluster_data),
-                'avg_amount': cluster_data['contribution_amount'].mean(),
-                'top_employers': top_employers.to_dict(),
+                'avg_amount': float(cluster_data['contribution_amount'].astype(np.float64).mean()),
+                'top_employers': top_employers,
                 'top_names': top_names.to_dict(),
                 'sample_records': cluster_data[['contributor_name', 'contributor_employer']].head(3).to_dict('records')
             }
@@ -449,6 +923,11 @@ class ContributionClassifier:
         # Rule-based classification
         rule_based_result = self.rule_based_classification(employer, name)
         
+        cache_key = self._cache_key(employer, name, amount, rule_based_result)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         result = {
             'rule_based_category': rule_based_result,
             'ml_category': None,
@@ -459,11 +938,11 @@ class ContributionClassifier:
         # ML-based classification if trained
         if self.is_trained and self.vectorizer and self.classifier:
             try:
-                # Prepare features
+                # Prepare features, as in _training_matrix
                 employer_clean = self.preprocess_text(employer)
                 name_clean = self.preprocess_text(name)
                 
-                text_feature = f"{employer_clean} {name_clean}".strip()
+                text_feature = f"{employer or ''} {name or ''}".strip()
                 X_text = self.vectorizer.transform([text_feature])
                 
                 # Numerical features
@@ -472,25 +951,181 @@ class ContributionClassifier:
                 log_amount = np.log1p(amount if amount else 0)
                 
                 X_numerical = np.array([[employer_length, name_length, log_amount]])
-                X_combined = np.hstack([X_text.toarray(), X_numerical])
+                X_combined = self.combine_features(X_text, X_numerical)
                 
                 # Predict
-                ml_prediction = self.classifier.predict(X_combined)[0]
                 ml_probabilities = self.classifier.predict_proba(X_combined)[0]
+                ml_prediction = self.classifier.classes_[np.argmax(ml_probabilities)]
                 max_confidence = np.max(ml_probabilities)
                 
-                result['ml_category'] = ml_prediction
-                result['confidence'] = max_confidence
+                result['ml_category'] = str(ml_prediction)
+                result['confidence'] = float(max_confidence)
                 
                 # Use ML result if confidence is high and differs from rule-based
-                if max_confidence > 0.7 and ml_prediction != rule_based_result:
-                    result['final_category'] = ml_prediction
+                if max_confidence > Config.HIGH_CONFIDENCE_THRESHOLD and ml_prediction != rule_based_result:
+                    result['final_category'] = str(ml_prediction)
                     
             except Exception as e:
                 logger.warning(f"ML classification failed: {e}")
         
+        self.cache.put(cache_key, result)
         return result
     
+    def predict_ml_frame(self, features: pd.DataFrame, batch_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        ML category and probability for rows with extracted features
+        
+        Predicts once per unique feature key, batch_size unique rows per
+        vectorizer transform and predict_proba call.
+        
+        Args:
+            features: DataFrame with extracted features
+            batch_size: Unique rows per batch, defaults to Config.ML_PREDICT_BATCH_SIZE
+            
+        Returns:
+            DataFrame aligned with features with prediction and probability columns
+        """
+        batch_size = batch_size or Config.ML_PREDICT_BATCH_SIZE
+        
+        def predict_unique(unique_rows):
+            predictions, probabilities = [], []
+            for batch in chunk_frame(unique_rows, batch_size):
+                batch_probabilities = self.classifier.predict_proba(self._training_matrix(batch))
+                best = batch_probabilities.argmax(axis=1)
+                predictions.append(self.classifier.classes_[best])
+                probabilities.append(batch_probabilities[np.arange(len(best)), best])
+            return pd.DataFrame({
+                'prediction': np.concatenate(predictions) if predictions else np.array([], dtype=object),
+                'probability': np.concatenate(probabilities) if probabilities else np.array([])
+            }, index=unique_rows.index)
+        
+        return KeyDeduplicator.apply(
+            features,
+            ['contributor_employer', 'contributor_name', 'employer_length', 'name_length', 'log_amount'],
+            predict_unique,
+            label='ML prediction'
+        )
+    
+    def enhanced_classify_many(self, records, names=None, amounts=None, rule_based=None,
+                               batch_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Enhanced classification of many records at once
+        
+        Batch counterpart of enhanced_classify: rules run vectorized over the
+        whole input and the ML model sees one vectorizer transform and one
+        predict_proba call per batch of unique records.
+        
+        Args:
+            records: DataFrame with contributor_employer, contributor_name and
+                optionally contribution_amount (or extracted features), or an
+                array-like of employers
+            names: Array-like of contributor names when records are employers
+            amounts: Array-like of contribution amounts when records are
+                employers, defaults to 0
+            rule_based: Precomputed rule-based categories aligned with the
+                records, skipping the rule pass
+            batch_size: Unique records per ML batch, defaults to
+                Config.ML_PREDICT_BATCH_SIZE
+            
+        Returns:
+            DataFrame aligned with the records (same index for DataFrame
+            input) with rule_based_category, ml_category, confidence and
+            final_category columns
+        """
+        if isinstance(records, pd.DataFrame):
+            frame = records
+        else:
+            employers = pd.Series(list(records), dtype=object)
+            frame = pd.DataFrame({
+                'contributor_employer': employers,
+                'contributor_name': pd.Series(list(names) if names is not None else [None] * len(employers),
+                                              dtype=object),
+                'contribution_amount': pd.Series(list(amounts) if amounts is not None else 0,
+                                                 index=employers.index, dtype=np.float64)
+            })
+        
+        required = ['employer_length', 'name_length', 'log_amount']
+        if rule_based is None:
+            required += ['employer_clean', 'name_clean']
+        features = frame
+        if not set(required).issubset(frame.columns):
+            if 'contribution_amount' not in frame.columns:
+                frame = frame.assign(contribution_amount=0.0)
+            features = self.extract_features(frame)
+        
+        if rule_based is None:
+            rule_based = self.classify_frame(features)
+        rule_based = pd.Series(np.asarray(rule_based, dtype=object), index=features.index).astype(str)
+        
+        result = pd.DataFrame({
+            'rule_based_category': rule_based,
+            'ml_category': pd.Series(None, index=features.index, dtype=object),
+            'confidence': 0.0,
+            'final_category': rule_based
+        }, index=features.index)
+        
+        if self.is_trained and self.vectorizer is not None and self.classifier is not None:
+            ml_results = self.predict_ml_frame(features, batch_size)
+            predictions = ml_results['prediction'].astype(str)
+            result['ml_category'] = predictions.astype(object)
+            result['confidence'] = ml_results['probability'].astype(np.float64)
+            
+            # Use the ML result where it is confident
+            confident = result['confidence'] > Config.HIGH_CONFIDENCE_THRESHOLD
+            result['final_category'] = predictions.where(confident, rule_based)
+        
+        return result
+    
+    def _cache_key(self, employer: str, name: str, amount: float, rule_based: str) -> Tuple[str, str, str, str]:
+        """
+        Build the enhanced_classify cache key
+        
+        Employer and name are normalized as by preprocess_text, the employer
+        also losing its periods, and the amount is reduced to its bin: so
+        'Acme, Inc.' and 'ACME INC', like amounts within one bin, share the
+        first cached ML result. The rule-based category is part of the key
+        because exact-match rules still tell some such spellings apart
+        ('None' and 'None.').
+        """
+        employer_key = ' '.join(PREPROCESSOR.normalize(employer).replace('.', '').split())
+        name_key = PREPROCESSOR.normalize(name)
+        amount_value = amount if amount and amount > 0 else 0
+        amount_bin = Config.AMOUNT_BIN_LABELS[bisect_left(Config.AMOUNT_BINS, amount_value)]
+        return employer_key, name_key, amount_bin, rule_based
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        Get enhanced_classify cache statistics
+        
+        Returns:
+            Dictionary with hits, misses, evictions, size and bytes
+        """
+        return self.cache.get_stats()
+    
+    def save_cache(self, file_path: str = None) -> None:
+        """
+        Persist the enhanced_classify cache so the next run can be warmed
+        
+        Args:
+            file_path: Cache file path, defaults to Config.CLASSIFICATION_CACHE_FILE
+        """
+        self.cache.save(file_path or Config.CLASSIFICATION_CACHE_FILE, self.model_fingerprint)
+    
+    def warm_cache(self, file_path: str = None) -> int:
+        """
+        Load previously saved enhanced_classify results into the cache
+        
+        A cache saved with another model (or with none) is ignored, so stale
+        ML categories and confidences are never served.
+        
+        Args:
+            file_path: Cache file path, defaults to Config.CLASSIFICATION_CACHE_FILE
+            
+        Returns:
+            Number of entries loaded
+        """
+        return self.cache.load(file_path or Config.CLASSIFICATION_CACHE_FILE, self.model_fingerprint)
+    
     def analyze_classification_gaps(self, df: pd.DataFrame) -> Dict:
         """
         Analyze gaps in current classification system
@@ -517,8 +1152,8 @@ class ContributionClassifier:
             analysis['others_analysis'] = {
                 'count': len(others_df),
                 'percentage': len(others_df) / len(df) * 100,
-                'total_amount': others_df['contribution_amount'].sum(),
-                'avg_amount': others_df['contribution_amount'].mean()
+                'total_amount': float(others_df['contribution_amount'].astype(np.float64).sum()),
+                'avg_amount': float(others_df['contribution_amount'].astype(np.float64).mean())
             }
             
             # High-value contributions in Others
@@ -527,15 +1162,20 @@ class ContributionClassifier:
                 'contributor_name', 'contributor_employer', 'contribution_amount'
             ]].head(10).to_dict('records')
             
-            # Frequent employers in Others
-            employer_counts = others_df['contributor_employer'].value_counts().head(10)
-            analysis['frequent_unclassified_employers'] = employer_counts.to_dict()
+            # Frequent employers in Others, spelling variants counted together
+            if 'employer_id' in others_df.columns:
+                analysis['frequent_unclassified_employers'] = self.employer_dictionary.top_employers(
+                    others_df['employer_id'], n=10
+                )
+            else:
+                employer_counts = others_df['contributor_employer'].value_counts().head(10)
+                analysis['frequent_unclassified_employers'] = employer_counts.to_dict()
         
         return analysis
     
     def generate_enhanced_function(self, output_path: str = None) -> str:
         """
-        Generate enhanced SQL function based on analysis
+        Generate enhanced SQL function from the compiled rule set
         
         Args:
             output_path: Optional file path to save the function
@@ -543,98 +1183,15 @@ class ContributionClassifier:
         Returns:
             Enhanced SQL function as string
         """
-        enhanced_function = """
--- Enhanced Contribution Category Classification Function
--- Generated by ML-Enhanced Classification System
-
-CREATE OR REPLACE FUNCTION `campaignanalytics-182101.dq.dq_B_ContriCategory_Enhanced`(
-    ContributorsEmployer STRING,
-    ContributorName STRING,
-    ContributionAmount FLOAT64
-) AS (
-/*
- * Enhanced Contribution Category Classification
- * Uses improved pattern matching and amount-based logic
- * input: ContributorsEmployer (STRING), ContributorName (STRING), ContributionAmount (FLOAT64)
- * returns: Enhanced contribution category classification
- */
-CASE
-    -- Pohlad family (highest priority)
-    WHEN UPPER(TRIM(ContributorName)) LIKE '%POHLAD%' THEN 'Pohlad family'
-    
-    -- Enhanced Lawyer patterns
-    WHEN ContributorsEmployer IN (
-        'North State Advisors', 'Lockridge Grindal Nauen', 'Attorney',
-        'McGrann Shea Carnival Straughn and Lamb', 'Dykema',
-        'Faegre Baker Daniels', 'Stinson Leonard Street', 'Goff Public Relations',
-        -- Additional lawyer firms identified through analysis
-        'Larkin Hoffman', 'Messerli Kramer', 'Barnes & Thornburg',
-        'Fredrikson & Byron', 'Dorsey & Whitney'
-    ) THEN 'Lawyer'
-    
-    WHEN (
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%LAW%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%ATTORNEY%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%LEGAL%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%ADVOCATE%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%BARRISTER%'
-    ) THEN 'Lawyer'
-    
-    -- Enhanced Developer patterns
-    WHEN (
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%DEVELOPMENT%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%CONSTRUCTION%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%REAL ESTATE%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%ARCHITECT%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%BUILDER%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%PROPERTY%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%REALTOR%'
-    ) THEN 'Developer'
-    
-    -- Enhanced Business Owner patterns (including high-value individual contributions)
-    WHEN (
-        (UPPER(TRIM(ContributorsEmployer)) LIKE '%CEO%' OR
-         UPPER(TRIM(ContributorsEmployer)) LIKE '%OWNER%' OR
-         UPPER(TRIM(ContributorsEmployer)) LIKE '%FOUNDER%' OR
-         UPPER(TRIM(ContributorsEmployer)) LIKE '%PRESIDENT%') AND
-        ContributionAmount > 500
-    ) THEN 'BusinessOwner'
-    
-    -- Enhanced Association patterns
-    WHEN (
-        UPPER(TRIM(ContributorName)) LIKE '%PAC%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%COMMITTEE%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%UNION%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%ASSOCIATION%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%FEDERATION%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%COALITION%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%ALLIANCE%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%COUNCIL%' OR
-        UPPER(TRIM(ContributorName)) LIKE '%FUND%'
-    ) THEN 'Association'
-    
-    -- Enhanced Individual patterns
-    WHEN (
-        UPPER(TRIM(ContributorsEmployer)) IN ('RETIRED', 'NOT EMPLOYED', 'SELF-EMPLOYED', 'HOMEMAKER') OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%RETIRED%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%SELF%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%UNEMPLOYED%'
-    ) THEN 'Individual'
-    
-    -- Government employees
-    WHEN (
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%CITY OF%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%STATE OF%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%COUNTY%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%FEDERAL%' OR
-        UPPER(TRIM(ContributorsEmployer)) LIKE '%GOVERNMENT%'
-    ) THEN 'Individual'
-    
-    -- Default case
-    ELSE 'Others'
-END
-);
-        """
+        enhanced_function = compile_classification_udf(
+            self.rule_engine,
+            f"{self.project_id}.dq.dq_B_ContriCategory_Enhanced",
+            parameters=[
+                ('ContributorsEmployer', 'STRING'),
+                ('ContributorName', 'STRING'),
+                ('ContributionAmount', 'FLOAT64')
+            ]
+        )
         
         if output_path:
             with open(output_path, 'w') as f:
@@ -643,6 +1200,18 @@ END
         
         return enhanced_function
     
+    def deploy_enhanced_function(self) -> str:
+        """
+        Create (or replace) the generated classification UDF in BigQuery
+        
+        Returns:
+            The deployed SQL function
+        """
+        enhanced_function = self.generate_enhanced_function()
+        self.client.query(enhanced_function).result()
+        logger.info("Enhanced classification function deployed to BigQuery")
+        return enhanced_function
+    
     def run_full_analysis(self) -> Dict:
         """
         Run complete analysis pipeline
@@ -657,6 +1226,7 @@ END
         
         # Extract features  
         df = self.extract_features(df)
+        df['employer_id'] = self.employer_dictionary.encode(df['contributor_employer'])
         
         # Train ML classifier
         self.train_ml_classifier(df)
@@ -675,6 +1245,7 @@ END
                 'total_records': len(df),
                 'unique_contributors': df['contributor_name'].nunique(),
                 'unique_employers': df['contributor_employer'].nunique(),
+                'canonical_employers': int(df.loc[df['employer_id'] >= 0, 'employer_id'].nunique()),
                 'date_range': f"{df.index.min()} to {df.index.max()}" if hasattr(df.index, 'min') else "N/A"
             },
             'gap_analysis': gap_analysis,
@@ -753,12 +1324,8 @@ def main():
         with open('/Users/chakravarthysankaraiah/Documents/GitHub/CampaignFinance/ContributionCategory/enhanced_function.sql', 'w') as f:
             f.write(results['enhanced_function'])
         
-        # Save trained model
-        if classifier.is_trained:
-            joblib.dump({
-                'classifier': classifier.classifier,
-                'vectorizer': classifier.vectorizer
-            }, '/Users/chakravarthysankaraiah/Documents/GitHub/CampaignFinance/ContributionCategory/trained_model.joblib')
+        # Register trained model
+        model_version = ModelRegistry().register(classifier) if classifier.is_trained else None
         
         print("Analysis completed successfully!")
         print(f"- Total records analyzed: {results['data_summary']['total_records']:,}")
@@ -767,7 +1334,8 @@ def main():
         print("\nFiles generated:")
         print("- analysis_results.json")
         print("- enhanced_function.sql") 
-        print("- trained_model.joblib")
+        if model_version:
+            print(f"- model {model_version} in {Config.MODEL_REGISTRY_DIR}")
         
         return results
         
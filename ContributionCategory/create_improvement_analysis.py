@@ -3,10 +3,14 @@
 Create comparison analysis of improved classification results
 """
 
+import os
+import sys
 import pandas as pd
-from google.cloud import bigquery
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from data_sources import create_data_source
+
 def create_improvement_analysis():
     """Create detailed comparison analysis"""
     
@@ -123,33 +127,22 @@ def create_improvement_analysis():
     print('💾 Enhanced analysis summary saved')
     print(f'   Total improvement metrics: {len(summary_df)}')
     
-    # Upload to BigQuery
+    # Upload to the configured data source (BigQuery unless Config.DATA_SOURCE says otherwise)
     try:
-        client = bigquery.Client(project='campaignanalytics-182101')
+        source = create_data_source()
         
         # Define table details
-        dataset_id = 'Munidata'
         table_id = 'Enhanced_Classification_Analysis_Improved'
-        table_ref = client.dataset(dataset_id).table(table_id)
-        
-        print(f'\\nUploading {len(summary_df)} records to {dataset_id}.{table_id}...')
-        
-        # Configure job to replace existing table
-        job_config = bigquery.LoadJobConfig(
-            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-            autodetect=True
-        )
+        table = source.table(table_id).strip('`')
         
-        # Upload the data
-        job = client.load_table_from_dataframe(summary_df, table_ref, job_config=job_config)
-        job.result()  # Wait for the job to complete
+        print(f'\\nUploading {len(summary_df)} records to {table}...')
         
-        # Get table info
-        table = client.get_table(table_ref)
-        print(f'✅ SUCCESS: Table {dataset_id}.{table_id} created with {table.num_rows} rows')
+        # Replace the existing table
+        num_rows = source.write_table(summary_df, table_id)
+        print(f'✅ SUCCESS: Table {table} created with {num_rows} rows')
         
     except Exception as e:
-        print(f'❌ BigQuery upload error: {e}')
+        print(f'❌ Upload error: {e}')
     
     return summary_df
 
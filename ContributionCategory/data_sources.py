@@ -0,0 +1,392 @@
+"""
+Data sources for Enhanced Contribution Classification System
+
+A DataSource yields contribution rows in batches of at most batch_size rows,
+whether they come from the BigQuery view, a local Parquet/CSV snapshot or an
+embedded DuckDB database, so the pipeline runs unchanged on local data for
+development and benchmarking. Config.DATA_SOURCE selects the source.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Text columns are read as strings so every CSV chunk has the same schema
+TEXT_COLUMNS = [
+    'contributor_name', 'contributor_employer', 'contributor_first_name',
+    'contributor_last_name', 'source_type', 'candidate_category', 'current_category'
+]
+
+# Amounts are read as floats: a CSV chunk of whole-dollar amounts would
+# otherwise be int64 and clash with the later chunks that have cents
+NUMERIC_COLUMNS = ['contribution_amount']
+
+DATE_COLUMN = 'contribution_date'
+
+# Rows of the contributions view used by the pipeline
+CONTRIBUTIONS_QUERY = """
+SELECT
+    contributor_name,
+    contributor_employer,
+    contributor_first_name,
+    contributor_last_name,
+    contribution_amount,
+    contribution_date,
+    source_type,
+    candidate_category,
+    `campaignanalytics-182101.dq.dq_B_ContriCategory`(
+        contributor_employer,
+        contributor_name
+    ) AS current_category
+FROM `campaignanalytics-182101.Munidata.Mpls_All_Contributions_View`
+WHERE contributor_name IS NOT NULL
+"""
+
+# Dataset holding the analysis tables in BigQuery
+ANALYSIS_DATASET = 'Munidata'
+
+
+def file_format(file_path: str) -> str:
+    """Infer 'csv' or 'parquet' from a file extension"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.csv', '.txt', '.gz'):
+        return 'csv'
+    raise ValueError(f"Unsupported file format: {file_path}")
+
+
+def filter_since(batch: pd.DataFrame, since: Optional[date]) -> pd.DataFrame:
+    """Rows of a batch with a contribution_date on or after since"""
+    if since is None:
+        return batch
+    dates = pd.to_datetime(batch[DATE_COLUMN], errors='coerce')
+    return batch[(dates >= pd.Timestamp(since)).to_numpy()]
+
+
+class DataSource(ABC):
+    """Source of contribution rows, read in batches"""
+
+    # Rows are queried from a remote service, so they are worth caching locally
+    remote = False
+
+    def __init__(self, batch_size: Optional[int] = None):
+        """
+        Args:
+            batch_size: Rows per batch, defaults to Config.STREAM_CHUNK_SIZE
+        """
+        self.batch_size = batch_size or Config.STREAM_CHUNK_SIZE
+
+    @abstractmethod
+    def iter_batches(self, since: Optional[date] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read contribution rows
+
+        Args:
+            since: Only rows with a contribution_date on or after this date
+                (None for every row)
+
+        Yields:
+            DataFrames of at most batch_size rows
+        """
+
+    def fetch(self, since: Optional[date] = None) -> pd.DataFrame:
+        """All rows of iter_batches in one DataFrame"""
+        batches = list(self.iter_batches(since))
+        if not batches:
+            return pd.DataFrame()
+        return pd.concat(batches, ignore_index=True)
+
+    def table(self, name: str) -> str:
+        """SQL reference to an analysis table"""
+        return name
+
+    def query(self, sql: str) -> pd.DataFrame:
+        """
+        Run a SQL query
+
+        Args:
+            sql: Query in the source's SQL dialect
+
+        Returns:
+            Query results
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not run SQL queries")
+
+    def execute(self, sql: str) -> None:
+        """Run a SQL statement (DDL) without results"""
+        raise NotImplementedError(f"{type(self).__name__} does not run SQL statements")
+
+    def write_table(self, df: pd.DataFrame, name: str) -> int:
+        """
+        Replace an analysis table with a DataFrame
+
+        Args:
+            df: Rows to write
+            name: Table name
+
+        Returns:
+            Number of rows in the table
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not write tables")
+
+
+class BigQuerySource(DataSource):
+    """The contributions view in BigQuery"""
+
+    remote = True
+
+    def __init__(self, project_id: Optional[str] = None, batch_size: Optional[int] = None):
+        """
+        Args:
+            project_id: Google Cloud project ID, defaults to Config.PROJECT_ID
+            batch_size: Rows per batch (BigQuery result page size)
+        """
+        super().__init__(batch_size)
+        self.project_id = project_id or Config.PROJECT_ID
+        self._client = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_client'] = None
+        return state
+
+    @property
+    def client(self):
+        """BigQuery client, created on first use"""
+        if self._client is None:
+            from google.cloud import bigquery
+
+            self._client = bigquery.Client(project=self.project_id)
+        return self._client
+
+    def iter_batches(self, since: Optional[date] = None) -> Iterator[pd.DataFrame]:
+        from google.cloud import bigquery
+
+        query = CONTRIBUTIONS_QUERY
+        job_config = None
+        if since is None:
+            logger.info("Loading contribution data from BigQuery...")
+        else:
+            query += "  AND CAST(contribution_date AS DATE) >= @since\n"
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[bigquery.ScalarQueryParameter('since', 'DATE', since)]
+            )
+            logger.info(f"Loading contributions dated {since} or later from BigQuery...")
+
+        rows = self.client.query(query, job_config=job_config).result(page_size=self.batch_size)
+        yield from rows.to_dataframe_iterable()
+
+    def table(self, name: str) -> str:
+        return f"`{self.project_id}.{ANALYSIS_DATASET}.{name}`"
+
+    def query(self, sql: str) -> pd.DataFrame:
+        return self.client.query(sql).to_dataframe()
+
+    def execute(self, sql: str) -> None:
+        self.client.query(sql).result()
+
+    def write_table(self, df: pd.DataFrame, name: str) -> int:
+        from google.cloud import bigquery
+
+        table_ref = f"{self.project_id}.{ANALYSIS_DATASET}.{name}"
+        job_config = bigquery.LoadJobConfig(
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+            autodetect=True
+        )
+        self.client.load_table_from_dataframe(df, table_ref, job_config=job_config).result()
+        return self.client.get_table(table_ref).num_rows
+
+
+class FileSource(DataSource):
+    """
+    Local snapshot of the contributions view: a CSV or Parquet file, or a
+    directory of Parquet files (such as the contribution cache)
+    """
+
+    def __init__(self, path: str, batch_size: Optional[int] = None):
+        """
+        Args:
+            path: Snapshot file or directory
+            batch_size: Rows per batch
+        """
+        super().__init__(batch_size)
+        self.path = path
+
+    def _read(self) -> Iterator[pd.DataFrame]:
+        if os.path.isdir(self.path) or file_format(self.path) == 'parquet':
+            import pyarrow.dataset as ds
+
+            # Files starting with '_' or '.' (such as the cache manifest) are skipped
+            dataset = ds.dataset(self.path, format='parquet')
+            for batch in dataset.to_batches(batch_size=self.batch_size):
+                if batch.num_rows:
+                    yield batch.to_pandas()
+        else:
+            header = pd.read_csv(self.path, nrows=0).columns
+            dtypes = {column: str for column in TEXT_COLUMNS if column in header}
+            dtypes.update({column: 'float64' for column in NUMERIC_COLUMNS if column in header})
+            yield from pd.read_csv(self.path, chunksize=self.batch_size, dtype=dtypes, keep_default_na=True)
+
+    def iter_batches(self, since: Optional[date] = None) -> Iterator[pd.DataFrame]:
+        logger.info(f"Loading contribution data from {self.path}...")
+        for batch in self._read():
+            batch = filter_since(batch, since)
+            if len(batch):
+                yield batch
+
+
+class DuckDBSource(DataSource):
+    """
+    Contributions in an embedded DuckDB database, or Parquet/CSV snapshots
+    queried in place through DuckDB
+    """
+
+    def __init__(self, path: Optional[str] = None, table: Optional[str] = None,
+                 batch_size: Optional[int] = None):
+        """
+        Args:
+            path: DuckDB database file, or a Parquet/CSV file or directory of
+                Parquet files exposed as the contributions table
+                (None for an in-memory database)
+            table: Table holding the contributions, defaults to
+                Config.DATA_SOURCE_TABLE
+            batch_size: Rows per batch
+        """
+        super().__init__(batch_size)
+        self.path = path
+        self.table_name = table or Config.DATA_SOURCE_TABLE
+        self._connection = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    @property
+    def connection(self):
+        """DuckDB connection, opened on first use"""
+        if self._connection is None:
+            import duckdb
+
+            if self.path is None or self.path.lower().endswith(('.duckdb', '.db')):
+                self._connection = duckdb.connect(self.path or ':memory:')
+            else:
+                self._connection = duckdb.connect(':memory:')
+                self._connection.execute(f"CREATE VIEW {self.table_name} AS SELECT * FROM {self._scan()}")
+        return self._connection
+
+    def _scan(self) -> str:
+        """DuckDB table function reading the snapshot files"""
+        if os.path.isdir(self.path):
+            function, path = 'read_parquet', os.path.join(self.path, '**', '*.parquet')
+        elif file_format(self.path) == 'parquet':
+            function, path = 'read_parquet', self.path
+        else:
+            function, path = 'read_csv_auto', self.path
+        path = path.replace("'", "''")
+        return f"{function}('{path}')"
+
+    def iter_batches(self, since: Optional[date] = None) -> Iterator[pd.DataFrame]:
+        sql = f"SELECT * FROM {self.table_name}"
+        parameters: List = []
+        if since is not None:
+            sql += f" WHERE CAST({DATE_COLUMN} AS DATE) >= ?"
+            parameters.append(since)
+
+        logger.info(f"Loading contribution data from DuckDB table {self.table_name}...")
+        result = self.connection.execute(sql, parameters)
+        # to_arrow_reader replaces fetch_record_batch in newer DuckDB releases
+        if hasattr(result, 'to_arrow_reader'):
+            reader = result.to_arrow_reader(self.batch_size)
+        else:
+            reader = result.fetch_record_batch(self.batch_size)
+        for batch in reader:
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def query(self, sql: str) -> pd.DataFrame:
+        return self.connection.execute(sql).df()
+
+    def execute(self, sql: str) -> None:
+        self.connection.execute(sql)
+
+    def write_table(self, df: pd.DataFrame, name: str) -> int:
+        self.connection.register('_frame', df)
+        try:
+            self.connection.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM _frame")
+        finally:
+            self.connection.unregister('_frame')
+        return self.connection.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+
+class FakeContributionSource(DataSource):
+    """
+    In-memory stand-in for the contributions view
+
+    Serves rows from a DataFrame the way the other sources serve the view,
+    so the cache and pipeline can be exercised without BigQuery.
+    """
+
+    remote = True
+
+    def __init__(self, df: pd.DataFrame, batch_size: Optional[int] = None):
+        """
+        Args:
+            df: Rows of the view, with a contribution_date column
+            batch_size: Rows per batch
+        """
+        super().__init__(batch_size)
+        self.df = df.reset_index(drop=True)
+        # Watermarks the source was queried with, and the rows it returned
+        self.calls: List[Optional[date]] = []
+        self.rows_served = 0
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Append newly filed rows"""
+        self.df = pd.concat([self.df, df], ignore_index=True)
+
+    def iter_batches(self, since: Optional[date] = None) -> Iterator[pd.DataFrame]:
+        self.calls.append(since)
+        rows = filter_since(self.df, since)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows.iloc[start:start + self.batch_size].copy()
+            self.rows_served += len(batch)
+            yield batch
+
+
+def create_data_source(kind: Optional[str] = None, path: Optional[str] = None,
+                       project_id: Optional[str] = None, batch_size: Optional[int] = None) -> DataSource:
+    """
+    Create the configured data source
+
+    Args:
+        kind: 'bigquery', 'file' or 'duckdb', defaults to Config.DATA_SOURCE
+        path: Snapshot or database path for the file and duckdb sources,
+            defaults to Config.DATA_SOURCE_PATH
+        project_id: Google Cloud project ID for the bigquery source
+        batch_size: Rows per batch, defaults to Config.STREAM_CHUNK_SIZE
+
+    Returns:
+        DataSource instance
+    """
+    kind = (kind or Config.DATA_SOURCE).lower()
+    path = path or Config.DATA_SOURCE_PATH
+
+    if kind == 'bigquery':
+        return BigQuerySource(project_id, batch_size)
+    if kind == 'file':
+        if not path:
+            raise ValueError("The file data source needs a snapshot path (Config.DATA_SOURCE_PATH)")
+        return FileSource(path, batch_size)
+    if kind == 'duckdb':
+        return DuckDBSource(path, batch_size=batch_size)
+    raise ValueError(f"Unknown data source: {kind} (expected bigquery, file or duckdb)")
@@ -0,0 +1,182 @@
+"""
+Canonical employer dictionary for Enhanced Contribution Classification System
+
+Interns employer strings as integer IDs. Spellings are canonicalized with
+TextProcessor.clean_text normalization (abbreviations expanded), and
+misspelled or truncated names of known firms fold onto the firm through the
+firm name index, so 'Faegre Baker Daniels' and 'Faegre Baker D' share one ID.
+Frames carry the IDs; the names live once, in the dictionary.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from firm_index import FirmNameIndex
+from text_normalizer import CLEANER
+
+logger = logging.getLogger(__name__)
+
+# ID of missing and empty employers
+MISSING_EMPLOYER_ID = -1
+
+
+class EmployerDictionary:
+    """Mapping of raw employer spellings to canonical employer IDs"""
+
+    def __init__(self, firm_index: Optional[FirmNameIndex] = None):
+        """
+        Create an empty dictionary
+
+        Args:
+            firm_index: Known firms whose variant spellings share the firm's ID
+        """
+        self.firm_index = firm_index
+        # ID -> canonical name, and the reverse
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # Raw spelling -> ID; the lookup table that is persisted
+        self._spellings: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_spellings(self) -> int:
+        """Number of distinct raw spellings seen"""
+        return len(self._spellings)
+
+    def canonical_names(self, employers: pd.Series) -> pd.Series:
+        """
+        Canonical names of employer spellings
+
+        Args:
+            employers: Raw employer values
+
+        Returns:
+            clean_text normalization of each employer, or of the known firm
+            it resolves to ('' for missing values)
+        """
+        if self.firm_index is not None:
+            firms = employers.map(self.firm_index.resolve)
+            known = firms.notna()
+            employers = employers.where(~known, firms[known].map(self.firm_index.name))
+        return CLEANER.normalize_series(employers)
+
+    def _intern(self, name: str) -> int:
+        """ID of a canonical name, assigning the next one if it is new"""
+        if not name:
+            return MISSING_EMPLOYER_ID
+        employer_id = self._ids.get(name)
+        if employer_id is None:
+            employer_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return employer_id
+
+    def encode(self, employers: pd.Series) -> np.ndarray:
+        """
+        Map employer values to IDs, adding spellings not seen before
+
+        Each distinct spelling is canonicalized once; IDs already assigned
+        never change.
+
+        Args:
+            employers: Raw employer values
+
+        Returns:
+            int32 array of employer IDs aligned with employers
+            (MISSING_EMPLOYER_ID for missing and empty employers)
+        """
+        codes, uniques = pd.factorize(employers)
+        spellings = [value if isinstance(value, str) else str(value) for value in uniques]
+
+        # The extra slot is where missing values (code -1) land
+        unique_ids = np.full(len(spellings) + 1, MISSING_EMPLOYER_ID, dtype=np.int32)
+        new_positions = []
+        for position, spelling in enumerate(spellings):
+            employer_id = self._spellings.get(spelling)
+            if employer_id is None:
+                new_positions.append(position)
+            else:
+                unique_ids[position] = employer_id
+
+        new_spellings = [spellings[position] for position in new_positions]
+        names = self.canonical_names(pd.Series(new_spellings, dtype=object))
+        for position, spelling, name in zip(new_positions, new_spellings, names):
+            unique_ids[position] = self._spellings[spelling] = self._intern(name)
+
+        logger.info(f"Encoded {len(employers):,} employers: {len(spellings):,} spellings "
+                    f"({len(new_spellings):,} new), {len(self.names):,} canonical employers")
+        return unique_ids[codes]
+
+    def decode(self, employer_ids) -> np.ndarray:
+        """
+        Canonical names of employer IDs
+
+        Args:
+            employer_ids: Array-like of IDs from encode
+
+        Returns:
+            Object array of names ('' for MISSING_EMPLOYER_ID)
+        """
+        names = np.array(self.names + [''], dtype=object)
+        return names[np.asarray(employer_ids, dtype=np.int64)]
+
+    def top_employers(self, employer_ids, n: Optional[int] = 10, min_count: int = 1) -> Dict[str, int]:
+        """
+        Most frequent canonical employers
+
+        Args:
+            employer_ids: Array-like of IDs from encode
+            n: Number of employers to return (None for all)
+            min_count: Smallest count included
+
+        Returns:
+            Dictionary of canonical name -> count, most frequent first
+            (missing employers excluded)
+        """
+        employer_ids = np.asarray(employer_ids)
+        counts = np.bincount(employer_ids[employer_ids != MISSING_EMPLOYER_ID], minlength=len(self.names))
+        top = np.argsort(-counts, kind='stable')[:n]
+        return {self.names[employer_id]: int(counts[employer_id])
+                for employer_id in top if counts[employer_id] >= max(min_count, 1)}
+
+    def save(self, file_path: str) -> None:
+        """
+        Save the lookup table
+
+        Args:
+            file_path: Path to save the dictionary
+        """
+        import joblib
+
+        table = {
+            'names': np.array(self.names, dtype=object),
+            'spellings': np.array(list(self._spellings), dtype=object),
+            'ids': np.fromiter(self._spellings.values(), dtype=np.int32, count=len(self._spellings))
+        }
+        joblib.dump(table, file_path, compress=3)
+        logger.info(f"Employer dictionary saved to {file_path} "
+                    f"({len(self.names):,} employers, {len(self._spellings):,} spellings)")
+
+    def load(self, file_path: str) -> int:
+        """
+        Replace the dictionary with a saved lookup table
+
+        Args:
+            file_path: Path to load the dictionary from
+
+        Returns:
+            Number of canonical employers loaded
+        """
+        import joblib
+
+        table = joblib.load(file_path)
+        self.names = list(table['names'])
+        self._ids = {name: employer_id for employer_id, name in enumerate(self.names)}
+        self._spellings = dict(zip(table['spellings'], table['ids'].tolist()))
+        logger.info(f"Loaded employer dictionary from {file_path} "
+                    f"({len(self.names):,} employers, {len(self._spellings):,} spellings)")
+        return len(self.names)
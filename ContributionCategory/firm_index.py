@@ -0,0 +1,258 @@
+"""
+Approximate firm name index for Enhanced Contribution Classification System
+
+Resolves an employer to its nearest known firm within an edit distance
+budget, so misspelled ('Mortensori Construction') and truncated
+('Faegre Baker D') employer fields match without listing every variant.
+Candidates come from a trigram inverted index and are verified with a
+banded edit distance.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Everything but letters and digits separates words in a firm key
+FIRM_KEY_SEPARATORS = re.compile(r'[^A-Z0-9]+')
+
+# Distinct employers memoized by FirmNameIndex.resolve before it starts over
+RESOLVE_CACHE_SIZE = 100000
+
+
+def firm_key(name) -> str:
+    """
+    Normalized comparison key of a firm name
+
+    Args:
+        name: Firm or employer name (missing values allowed)
+
+    Returns:
+        Upper-case key with punctuation collapsed to single spaces,
+        e.g. 'Maslon, Edelman, Borman & Brand' -> 'MASLON EDELMAN BORMAN BRAND'
+    """
+    if name is None or name != name:
+        return ''
+    return FIRM_KEY_SEPARATORS.sub(' ', str(name).upper()).strip()
+
+
+def trigrams(key: str) -> List[str]:
+    """Overlapping three-character substrings of key"""
+    return [key[i:i + 3] for i in range(len(key) - 2)]
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance, computed only within a diagonal band
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Largest distance of interest
+
+    Returns:
+        The distance, or max_distance + 1 if it is larger than max_distance
+    """
+    if a == b:
+        return 0
+    limit = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return limit
+
+    previous = [j if j < limit else limit for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [limit] * (len(b) + 1)
+        if i < limit:
+            current[0] = i
+        char = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost < limit else limit
+        if min(current) >= limit:
+            return limit
+        previous = current
+    return previous[-1]
+
+
+class FirmNameIndex:
+    """Trigram inverted index over known firm names"""
+
+    def __init__(self, names: Iterable[str], max_edits: Optional[int] = None,
+                 chars_per_edit: Optional[int] = None, min_prefix_length: Optional[int] = None,
+                 min_prefix_words: Optional[int] = None, min_fuzzy_word: Optional[int] = None):
+        """
+        Build the index
+
+        Args:
+            names: Known firm names; names with the same key keep the first spelling
+            max_edits: Largest edit distance accepted, defaults to Config.FIRM_MATCH_MAX_EDITS
+            chars_per_edit: One edit is allowed per this many key letters (spaces
+                not counted), defaults to Config.FIRM_MATCH_CHARS_PER_EDIT
+            min_prefix_length: Shortest key that may match a firm name as a
+                truncated prefix, defaults to Config.FIRM_MATCH_MIN_PREFIX
+            min_prefix_words: Complete words a truncated key must keep before
+                the cut, defaults to Config.FIRM_MATCH_MIN_PREFIX_WORDS
+            min_fuzzy_word: Length of the longest key word below which no edit
+                is allowed, defaults to Config.FIRM_MATCH_MIN_FUZZY_WORD
+        """
+        self.max_edits = Config.FIRM_MATCH_MAX_EDITS if max_edits is None else max_edits
+        self.chars_per_edit = Config.FIRM_MATCH_CHARS_PER_EDIT if chars_per_edit is None else chars_per_edit
+        self.min_prefix_length = (Config.FIRM_MATCH_MIN_PREFIX if min_prefix_length is None
+                                  else min_prefix_length)
+        self.min_prefix_words = (Config.FIRM_MATCH_MIN_PREFIX_WORDS if min_prefix_words is None
+                                 else min_prefix_words)
+        self.min_fuzzy_word = Config.FIRM_MATCH_MIN_FUZZY_WORD if min_fuzzy_word is None else min_fuzzy_word
+
+        self.names: List[str] = []
+        self.keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for name in names:
+            key = firm_key(name)
+            if not key or key in self._positions:
+                continue
+            self._positions[key] = len(self.keys)
+            for gram in set(trigrams(key)):
+                postings[gram].append(len(self.keys))
+            self.names.append(name)
+            self.keys.append(key)
+        self._postings = dict(postings)
+        # Memoized resolve() results; employers repeat heavily
+        self._resolved: Dict[str, Optional[str]] = {}
+
+        logger.info(f"Indexed {len(self.keys)} firm names ({len(self._postings)} trigrams)")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getstate__(self) -> Dict:
+        """Pickle without memoized lookups"""
+        state = self.__dict__.copy()
+        state['_resolved'] = {}
+        return state
+
+    def name(self, key: str) -> Optional[str]:
+        """Spelling of an indexed firm as first given, or None if key is not indexed"""
+        position = self._positions.get(key)
+        return None if position is None else self.names[position]
+
+    def budget(self, key: str) -> int:
+        """
+        Edit distance accepted for a key
+
+        Spaces do not earn edits, and a key of short words earns none at all:
+        one letter is all that separates 'BLUE FOX' from 'BLUE OX'.
+        """
+        if max(map(len, key.split(' '))) < self.min_fuzzy_word:
+            return 0
+        return min(self.max_edits, (len(key) - key.count(' ')) // self.chars_per_edit)
+
+    def distance(self, key: str, position: int, budget: int) -> int:
+        """
+        Edit distance of key to an indexed firm
+
+        A key at least min_prefix_length long that ends in the same character
+        as the firm name prefix of its length may match that prefix instead
+        (a truncated employer field). The cut must fall inside a firm word
+        and leave min_prefix_words complete words before it, so a stub of a
+        later word ('Hillcrest Develop', 'Minnesota Tw') is a truncation but a
+        bare city ('Minneapolis') is not taken for a firm that starts with it.
+
+        Args:
+            key: Employer key
+            position: Index of the firm
+            budget: Largest distance of interest
+
+        Returns:
+            The distance, or budget + 1 if it is larger than budget
+        """
+        firm = self.keys[position]
+        distance = edit_distance(key, firm, budget)
+        if (distance and self.min_prefix_length <= len(key) < len(firm) and key[-1] == firm[len(key) - 1]
+                and firm[len(key)] != ' ' and key.count(' ') >= self.min_prefix_words):
+            distance = min(distance, edit_distance(key, firm[:len(key)], budget))
+        return distance
+
+    def lookup(self, name) -> Optional[Tuple[str, int]]:
+        """
+        Find the nearest indexed firm
+
+        Args:
+            name: Employer name
+
+        Returns:
+            (firm key, edit distance) of the nearest firm within the budget,
+            ties going to the alphabetically first key, or None
+        """
+        key = firm_key(name)
+        if not key:
+            return None
+        position = self._positions.get(key)
+        if position is not None:
+            return key, 0
+        budget = self.budget(key)
+        # Without edits only an exact truncation can still match
+        if not budget and len(key) < self.min_prefix_length:
+            return None
+
+        # Each edit changes at most three of the key's trigrams
+        grams = set(trigrams(key))
+        required = len(grams) - 3 * budget
+        if required > 0:
+            postings = [self._postings[gram] for gram in grams if gram in self._postings]
+            if len(postings) < required:
+                return None
+            shared: Dict[int, int] = {}
+            for positions in postings:
+                for position in positions:
+                    shared[position] = shared.get(position, 0) + 1
+            candidates = [position for position, count in shared.items() if count >= required]
+        else:
+            candidates = range(len(self.keys))
+
+        best = None
+        for position in candidates:
+            distance = self.distance(key, position, budget)
+            if distance <= budget and (best is None or (distance, self.keys[position]) < best):
+                best = (distance, self.keys[position])
+        return (best[1], best[0]) if best else None
+
+    def resolve(self, name) -> Optional[str]:
+        """
+        Resolve an employer to the key of its nearest indexed firm
+
+        Args:
+            name: Employer name
+
+        Returns:
+            Firm key, or None if no firm is within the edit budget
+        """
+        if not isinstance(name, str):
+            match = self.lookup(name)
+            return match[0] if match else None
+
+        firm = self._resolved.get(name, False)
+        if firm is False:
+            match = self.lookup(name)
+            firm = match[0] if match else None
+            if len(self._resolved) >= RESOLVE_CACHE_SIZE:
+                self._resolved.clear()
+            self._resolved[name] = firm
+        return firm
+
+    def same_firms(self, other: 'FirmNameIndex') -> bool:
+        """Whether other indexes the same firms with the same matching parameters"""
+        return (self.keys == other.keys and self.max_edits == other.max_edits and
+                self.chars_per_edit == other.chars_per_edit and
+                self.min_prefix_length == other.min_prefix_length and
+                # Indexes pickled before these parameters existed count as different
+                getattr(self, 'min_prefix_words', None) == getattr(other, 'min_prefix_words', None) and
+                getattr(self, 'min_fuzzy_word', None) == getattr(other, 'min_fuzzy_word', None))
@@ -0,0 +1,140 @@
+"""
+Incremental ML model for Enhanced Contribution Classification System
+
+Training mode for a growing history of filings: text is hashed (the
+vectorizer is stateless, so every chunk is transformed on its own without a
+fitted vocabulary) and a linear model is trained with partial_fit, so new
+filings are folded into the model chunk by chunk instead of retraining on
+everything.
+"""
+
+import logging
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Divisors bringing employer_length, name_length and log_amount (appended
+# after the text features by combine_features) to roughly unit range; linear
+# models need features on comparable scales, trees do not
+NUMERICAL_SCALE = np.array([50.0, 50.0, 10.0])
+
+# Columns identifying a single filing (see filing_hashes)
+FILING_COLUMNS = ['contributor_employer', 'contributor_name', 'contribution_amount', 'contribution_date']
+
+
+def filing_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash of every filing, from FILING_COLUMNS (missing ones are skipped)
+
+    Args:
+        df: Contribution rows
+
+    Returns:
+        uint64 array aligned with df; identical filings hash the same
+    """
+    columns = [column for column in FILING_COLUMNS if column in df.columns]
+    # Categoricals as strings and dates parsed, so hashes do not depend on dtypes
+    frame = df[columns].astype({column: str for column in columns
+                                if isinstance(df[column].dtype, pd.CategoricalDtype)})
+    if 'contribution_date' in columns:
+        frame = frame.assign(contribution_date=pd.to_datetime(frame['contribution_date'], errors='coerce'))
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def make_hashing_vectorizer() -> HashingVectorizer:
+    """Stateless text vectorizer for incremental training"""
+    return HashingVectorizer(
+        n_features=Config.HASHING_N_FEATURES,
+        ngram_range=Config.NGRAM_RANGE,
+        stop_words='english',
+        alternate_sign=False,
+        norm='l2'
+    )
+
+
+class OnlineLinearClassifier:
+    """
+    Logistic regression trained with SGD over combined text and numerical features
+
+    Exposes the classes_/predict/predict_proba interface of the random forest,
+    so prediction code works with either model.
+    """
+
+    def __init__(self, classes: Iterable[str], alpha: Optional[float] = None,
+                 random_state: Optional[int] = None):
+        """
+        Args:
+            classes: Every category the model can predict
+            alpha: L2 regularization strength, defaults to Config.SGD_ALPHA
+            random_state: Seed for shuffling within partial_fit
+        """
+        self.classes_ = np.array(sorted(set(classes)), dtype=object)
+        self.model = SGDClassifier(
+            loss='log_loss',
+            alpha=Config.SGD_ALPHA if alpha is None else alpha,
+            random_state=Config.ML_RANDOM_STATE if random_state is None else random_state
+        )
+        # Training weight seen per class (rows, unless sample weights were
+        # given), for class-balanced sample weights
+        self.class_counts = np.zeros(len(self.classes_), dtype=np.float64)
+
+    @property
+    def n_rows_seen(self) -> int:
+        """Training rows (total sample weight) folded into the model"""
+        return int(round(self.class_counts.sum()))
+
+    def _scale(self, X) -> sparse.csr_matrix:
+        X = sparse.csr_matrix(X)
+        scale = np.ones(X.shape[1])
+        scale[-len(NUMERICAL_SCALE):] = 1.0 / NUMERICAL_SCALE
+        return X @ sparse.diags(scale, format='csr')
+
+    def partial_fit(self, X, y, sample_weight: Optional[np.ndarray] = None) -> 'OnlineLinearClassifier':
+        """
+        Fold one chunk of training rows into the model
+
+        class_weight='balanced' needs every label up front, which a stream
+        does not have; each row is instead weighted by the inverse frequency
+        of its class among all rows seen so far (counting sample weights).
+
+        Args:
+            X: Combined feature matrix (see ContributionClassifier.combine_features)
+            y: Categories
+            sample_weight: Optional per-row weights, such as the transactions
+                behind each unique key
+
+        Returns:
+            self
+        """
+        y = np.asarray(y, dtype=object)
+        codes = np.searchsorted(self.classes_, y)
+        unknown = (codes >= len(self.classes_)) | (self.classes_[np.minimum(codes, len(self.classes_) - 1)] != y)
+        if unknown.any():
+            raise ValueError(f"Unknown categories: {sorted(set(y[unknown]))}")
+
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=np.float64)
+        self.class_counts += np.bincount(codes, weights=sample_weight, minlength=len(self.classes_))
+        balanced = self.class_counts.sum() / (len(self.classes_) * np.maximum(self.class_counts, 1))
+        weights = balanced[codes]
+        if sample_weight is not None:
+            weights = weights * sample_weight
+
+        self.model.partial_fit(self._scale(X), y, classes=self.classes_, sample_weight=weights)
+        return self
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities, columns in classes_ order"""
+        return self.model.predict_proba(self._scale(X))
+
+    def predict(self, X) -> np.ndarray:
+        """Most probable category per row"""
+        return self.model.predict(self._scale(X))
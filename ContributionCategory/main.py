@@ -8,7 +8,7 @@ import os
 import sys
 import logging
 import argparse
-import numpy as np
+import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
@@ -17,7 +17,13 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from contribution_classifier import ContributionClassifier
 from config import Config
+from data_sources import create_data_source
+from model_registry import ModelRegistry
+from rule_engine import summarize_category_masks
+from sql_compiler import compile_classification_udf
 from utils import DataValidator, AnalysisReporter
+from streaming import (run_streaming_classification, map_chunks, shard_frame,
+                       extract_and_classify_chunk, merge_rule_stats, write_chunks)
 
 # Configure logging
 logging.basicConfig(
@@ -43,12 +49,13 @@ def setup_directories():
         os.makedirs(directory, exist_ok=True)
         logger.info(f"Created directory: {directory}")
 
-def analyze_classification_gaps(df):
-    """Simple gap analysis function"""
+def analyze_classification_gaps(df, engine=None, employers=None):
+    """Simple gap analysis function (employers: EmployerDictionary for the employer_id column)"""
     gap_analysis = {}
     
     # Category distribution
-    category_dist = df['current_category'].value_counts().to_dict()
+    category_counts = df['current_category'].value_counts()
+    category_dist = category_counts[category_counts > 0].to_dict()
     gap_analysis['category_distribution'] = category_dist
     
     # Others analysis
@@ -69,135 +76,149 @@ def analyze_classification_gaps(df):
     else:
         gap_analysis['high_amount_others'] = []
     
-    # Frequent unclassified employers
-    if 'contributor_employer' in df.columns:
+    # Frequent unclassified employers, spelling variants counted together
+    if employers is not None and 'employer_id' in df.columns:
+        others_ids = df.loc[df['current_category'] == 'Others', 'employer_id']
+        gap_analysis['frequent_unclassified_employers'] = employers.top_employers(others_ids, n=None, min_count=3)
+    elif 'contributor_employer' in df.columns:
         others_employers = df[df['current_category'] == 'Others']['contributor_employer'].value_counts()
         frequent_unclassified = others_employers[others_employers >= 3].to_dict()
         gap_analysis['frequent_unclassified_employers'] = frequent_unclassified
     else:
         gap_analysis['frequent_unclassified_employers'] = {}
     
+    # Alternative categories, from the bitmask of every matched category
+    if engine is not None and 'category_mask' in df.columns:
+        gap_analysis['multi_label'] = summarize_category_masks(
+            engine, df['current_category'], df['category_mask']
+        )
+    
     return gap_analysis
 
-def generate_enhanced_sql_function(df, new_categories):
-    """Generate enhanced SQL classification function"""
+def generate_enhanced_sql_function(df, new_categories, engine):
+    """Generate enhanced SQL classification function from the Python rule set"""
     
     # Get category statistics
     category_stats = df['enhanced_category'].value_counts()
+    category_stats = category_stats[category_stats > 0]
     
-    sql_template = """
-CREATE OR REPLACE FUNCTION `{project}.{dataset}.enhanced_classify_contribution`(
-    contributor_name STRING,
-    contributor_employer STRING,
-    contribution_amount FLOAT64
-) RETURNS STRING AS (
-    CASE
-        -- Enhanced classification rules based on analysis
-        WHEN UPPER(contributor_employer) LIKE '%LAW%' 
-            OR UPPER(contributor_employer) LIKE '%ATTORNEY%' 
-            OR UPPER(contributor_employer) LIKE '%LEGAL%' 
-        THEN 'Lawyer'
-        
-        WHEN UPPER(contributor_employer) LIKE '%DEVELOP%' 
-            OR UPPER(contributor_employer) LIKE '%CONSTRUCTION%' 
-            OR UPPER(contributor_employer) LIKE '%REAL ESTATE%'
-        THEN 'Developer'
-        
-        WHEN UPPER(contributor_employer) LIKE '%POHLAD%'
-            OR UPPER(contributor_name) LIKE '%POHLAD%'
-        THEN 'Pohlad'
-        
-        WHEN UPPER(contributor_employer) LIKE '%ASSOCIATION%'
-            OR UPPER(contributor_employer) LIKE '%UNION%'
-            OR UPPER(contributor_employer) LIKE '%PAC%'
-        THEN 'Association'
-        
-        WHEN contributor_employer IS NULL 
-            OR TRIM(contributor_employer) = ''
-            OR UPPER(contributor_employer) = 'RETIRED'
-            OR UPPER(contributor_employer) = 'SELF'
-        THEN 'Individual'
-        
-        WHEN UPPER(contributor_employer) LIKE '%CEO%'
-            OR UPPER(contributor_employer) LIKE '%PRESIDENT%'
-            OR UPPER(contributor_employer) LIKE '%OWNER%'
-            OR UPPER(contributor_employer) LIKE '%FOUNDER%'
-        THEN 'BusinessOwner'
-        
-        ELSE 'Others'
-    END
-);
-
+    sql_function = compile_classification_udf(
+        engine,
+        Config.get_function_path('enhanced_classify_contribution'),
+        parameters=[
+            ('contributor_name', 'STRING'),
+            ('contributor_employer', 'STRING'),
+            ('contribution_amount', 'FLOAT64')
+        ],
+        employer_param='contributor_employer',
+        name_param='contributor_name'
+    )
+    
+    summary = """
 -- Enhanced classification analysis summary:
 -- Total records analyzed: {total_records:,}
 -- Category distribution:
 {category_distribution}
--- Generated on: {timestamp}
 """.format(
-        project=Config.PROJECT_ID,
-        dataset=Config.FUNCTION_DATASET,
         total_records=len(df),
         category_distribution='\n'.join([f'-- {cat}: {count:,} ({count/len(df)*100:.1f}%)' 
-                                       for cat, count in category_stats.items()]),
-        timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                                       for cat, count in category_stats.items()])
     )
     
-    return sql_template
+    return sql_function + summary
 
-def run_full_analysis():
-    """Run the complete classification analysis pipeline"""
+def run_full_analysis(workers=1, instrument=False, rule_profile=None, offline=None, full_refresh=False,
+                      data_source=None):
+    """
+    Run the complete classification analysis pipeline
+    
+    Args:
+        workers: Number of worker processes for feature extraction and classification
+        instrument: Record per-rule hit counts and timings in the JSON report
+        rule_profile: Rule profile (JSON report of an instrumented run) used to
+            reorder rule evaluation
+        offline: Run from the local contribution cache without querying
+            BigQuery (defaults to Config.OFFLINE)
+        full_refresh: Rebuild the contribution cache from a full query
+        data_source: DataSource to load contributions from (defaults to
+            Config.DATA_SOURCE)
+    """
     logger.info("Starting Enhanced Contribution Classification Analysis")
     
     try:
-        # Initialize classifier
-        classifier = ContributionClassifier()
+        # Initialize classifier, keeping employer IDs from earlier runs
+        classifier = ContributionClassifier(data_source=data_source)
+        if os.path.exists(Config.EMPLOYER_DICTIONARY_FILE):
+            classifier.employer_dictionary.load(Config.EMPLOYER_DICTIONARY_FILE)
+        if instrument:
+            classifier.enable_instrumentation()
+        if rule_profile:
+            classifier.apply_rule_profile(rule_profile)
         
         # Load data
-        logger.info("Loading contribution data from BigQuery...")
-        data = classifier.load_data()
+        logger.info("Loading contribution data...")
+        data = classifier.load_data(offline=offline, full_refresh=full_refresh)
         
         if data is None or len(data) == 0:
             logger.error("No data loaded. Check your BigQuery connection and query.")
             return False
         
         logger.info(f"Loaded {len(data)} contribution records")
+        memory_report = data.attrs.get('memory_report')
         
         # Validate data quality
         logger.info("Validating data quality...")
         data_quality = DataValidator.check_data_quality(data)
         logger.info(f"Data quality score: {data_quality['quality_score']:.1f}/100")
         
-        # Generate initial classification
-        logger.info("Applying initial rule-based classification...")
-        classified_data = data.copy()
-        
-        # Create features first
-        logger.info("Extracting features for analysis...")
-        classified_data = classifier.extract_features(classified_data)
-        
-        # Always re-apply enhanced rule-based classification to get improvements
-        logger.info("Applying enhanced classification rules...")
-        classified_data['enhanced_current_category'] = classified_data.apply(
-            lambda row: classifier.rule_based_classification(
-                row.get('contributor_employer', ''), 
-                row.get('contributor_name', '')
-            ), axis=1
-        )
+        # Create features and always re-apply enhanced rule-based classification
+        # to get improvements, sharded across worker processes. Feature
+        # extraction copies each shard, so the loaded frame is not copied here
+        logger.info(f"Extracting features and applying enhanced classification rules ({workers} workers)...")
+        classified_data = pd.concat(merge_rule_stats(classifier, map_chunks(
+            extract_and_classify_chunk, classifier,
+            shard_frame(data, workers * 4 if workers > 1 else 1), workers
+        )))
+        del data
         
         # Keep original for comparison but use enhanced for analysis
         classified_data['original_category'] = classified_data['current_category']
         classified_data['current_category'] = classified_data['enhanced_current_category']
         
+        # Canonical employer IDs replace the cleaned employer strings from here on
+        employers = classifier.employer_dictionary
+        classified_data['employer_id'] = employers.encode(classified_data['contributor_employer'])
+        del classified_data['employer_clean']
+        employers.save(Config.EMPLOYER_DICTIONARY_FILE)
+        
         # Analyze gaps
         logger.info("Analyzing classification gaps...")
-        gap_analysis = analyze_classification_gaps(classified_data)
-        
-        # Train ML model
-        logger.info("Training machine learning model...")
-        success = classifier.train_ml_classifier(classified_data)
+        gap_analysis = analyze_classification_gaps(classified_data, classifier.rule_engine, employers)
+        
+        # Train ML model; an incremental model registered by an earlier run
+        # only takes in the filings that are newer than it
+        registry = ModelRegistry()
+        if Config.ML_TRAINING_MODE == 'incremental' and registry.latest():
+            if registry.metadata()['model_type'] == 'incremental':
+                # Read into memory: partial_fit updates the arrays in place
+                classifier.load_registered_model(registry=registry, mmap_mode=None)
+        elif Config.ML_TRAINING_MODE == 'incremental' and os.path.exists(Config.TRAINED_MODEL_FILE):
+            # Saved before models were registered
+            classifier.load_model(Config.TRAINED_MODEL_FILE)
+        updated_rows = None
+        if Config.ML_TRAINING_MODE == 'incremental' and classifier.is_incremental:
+            logger.info("Updating incremental machine learning model...")
+            updated_rows = classifier.update_ml_classifier(classified_data)
+            success = True
+        else:
+            logger.info("Training machine learning model...")
+            success = classifier.train_ml_classifier(classified_data)
         
         if success:
             logger.info("ML model trained successfully")
+            # An update that folded nothing in leaves the registered model current
+            if updated_rows != 0:
+                registry.register(classifier)
             
             # Discover new categories
             logger.info("Discovering potential new categories...")
@@ -213,40 +234,29 @@ def run_full_analysis():
         
         # Generate enhanced classification
         logger.info("Generating enhanced classification...")
-        enhanced_data = classified_data.copy()
+        enhanced_data = classified_data
         
         # Use existing current_category as enhanced_category initially
         enhanced_data['enhanced_category'] = enhanced_data['current_category']
         enhanced_data['confidence_score'] = 0.8  # Default confidence for rule-based
+        enhanced_data['ml_category'] = enhanced_data['enhanced_category']
         
         # If ML training was successful, add ML predictions
         if success:
             logger.info("Adding ML predictions to classification...")
             try:
-                # Get ML predictions for all records
-                text_features = (enhanced_data['contributor_employer'].fillna('') + ' ' +
-                               enhanced_data['contributor_name'].fillna('')).str.strip()
-                
-                if hasattr(classifier, 'vectorizer') and classifier.vectorizer is not None:
-                    X_text = classifier.vectorizer.transform(text_features)
-                    numerical_features = enhanced_data[['employer_length', 'name_length', 'log_amount']].fillna(0)
-                    X_combined = np.hstack([X_text.toarray(), numerical_features.values])
-                    
-                    ml_predictions = classifier.classifier.predict(X_combined)
-                    ml_probabilities = classifier.classifier.predict_proba(X_combined).max(axis=1)
-                    
-                    # Use ML prediction if confidence is high and different from rule-based
-                    high_confidence_mask = ml_probabilities > 0.7
-                    enhanced_data.loc[high_confidence_mask, 'enhanced_category'] = ml_predictions[high_confidence_mask]
-                    enhanced_data.loc[high_confidence_mask, 'confidence_score'] = ml_probabilities[high_confidence_mask]
-                    
-                    logger.info(f"Applied ML predictions to {high_confidence_mask.sum()} records")
+                # Batched ML predictions over the rule-based categories
+                classified = classifier.enhanced_classify_many(
+                    enhanced_data, rule_based=enhanced_data['current_category'])
+                confident = classified['confidence'] > Config.HIGH_CONFIDENCE_THRESHOLD
+                enhanced_data['enhanced_category'] = classified['final_category']
+                enhanced_data.loc[confident, 'confidence_score'] = classified.loc[confident, 'confidence']
+                # Add ML category column for comparison
+                enhanced_data['ml_category'] = classified['ml_category']
+                logger.info(f"Applied ML predictions to {confident.sum()} records")
             except Exception as e:
                 logger.warning(f"Could not apply ML predictions: {e}")
         
-        # Add ML category column for comparison
-        enhanced_data['ml_category'] = enhanced_data['enhanced_category']
-        
         # Generate comprehensive analysis
         logger.info("Generating analysis reports...")
         analysis_results = {
@@ -254,14 +264,19 @@ def run_full_analysis():
                 'total_records': len(enhanced_data),
                 'unique_contributors': enhanced_data['contributor_name'].nunique(),
                 'unique_employers': enhanced_data['contributor_employer'].nunique(),
-                'total_amount': enhanced_data['contribution_amount'].sum()
+                'canonical_employers': int(enhanced_data.loc[enhanced_data['employer_id'] >= 0, 'employer_id'].nunique()),
+                'total_amount': float(enhanced_data['contribution_amount'].astype('float64').sum())
             },
             'data_quality': data_quality,
+            'memory_report': memory_report,
             'gap_analysis': gap_analysis,
             'ml_training_success': success,
+            'ml_training_metrics': classifier.training_metrics,
             'discovered_categories': new_categories if success else {},
             'recommendations': generate_recommendations(gap_analysis, new_categories if success else {})
         }
+        if instrument:
+            analysis_results['rule_instrumentation'] = classifier.get_rule_stats()
         
         # Save results
         output_file = os.path.join(Config.OUTPUT_DIR, f"enhanced_classification_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
@@ -283,7 +298,8 @@ def run_full_analysis():
         
         # Generate enhanced SQL function
         logger.info("Generating enhanced SQL classification function...")
-        sql_function = generate_enhanced_sql_function(enhanced_data, new_categories if success else {})
+        sql_function = generate_enhanced_sql_function(enhanced_data, new_categories if success else {},
+                                                      classifier.rule_engine)
         
         sql_file = os.path.join(Config.OUTPUT_DIR, f"enhanced_classification_function_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql")
         with open(sql_file, 'w') as f:
@@ -297,8 +313,9 @@ def run_full_analysis():
         print("="*60)
         print(f"Total Records Processed: {len(enhanced_data):,}")
         print(f"Unique Contributors: {enhanced_data['contributor_name'].nunique():,}")
-        print(f"Unique Employers: {enhanced_data['contributor_employer'].nunique():,}")
-        print(f"Total Contribution Amount: ${enhanced_data['contribution_amount'].sum():,.2f}")
+        print(f"Unique Employers: {enhanced_data['contributor_employer'].nunique():,} "
+              f"({analysis_results['data_summary']['canonical_employers']:,} canonical)")
+        print(f"Total Contribution Amount: ${analysis_results['data_summary']['total_amount']:,.2f}")
         print(f"Data Quality Score: {data_quality['quality_score']:.1f}/100")
         
         # Category distribution
@@ -363,14 +380,107 @@ def generate_recommendations(gap_analysis, discovered_categories):
     
     return recommendations
 
+def run_classify(input_path, output_path, chunk_size, model_path=None, workers=1, rule_profile=None,
+                 model_version=None, array_model=None):
+    """Classify a contribution file chunk by chunk without loading it into memory"""
+    classifier = ContributionClassifier()
+    if rule_profile:
+        classifier.apply_rule_profile(rule_profile)
+    
+    registry = ModelRegistry()
+    if model_path and os.path.exists(model_path):
+        classifier.load_model(model_path)
+    elif not model_path and (model_version or registry.latest()):
+        # Memory-mapped, so the workers share the mapped model arrays
+        classifier.load_registered_model(model_version, registry, arrays=array_model)
+    else:
+        logger.info("No trained model found; using rule-based classification only")
+    
+    try:
+        total_rows = run_streaming_classification(classifier, input_path, output_path, chunk_size, workers)
+    except Exception as e:
+        logger.error(f"Classification failed: {str(e)}", exc_info=True)
+        return False
+    
+    logger.info(f"Classified {total_rows:,} records into {output_path}")
+    return True
+
+def run_snapshot(output_path, data_source):
+    """Copy the contributions of a data source into a local Parquet/CSV snapshot, batch by batch"""
+    try:
+        total_rows = write_chunks(data_source.iter_batches(), output_path)
+    except Exception as e:
+        logger.error(f"Snapshot failed: {str(e)}", exc_info=True)
+        return False
+    
+    logger.info(f"Wrote {total_rows:,} contribution records to {output_path}")
+    return True
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description='Enhanced Contribution Classification System')
     parser.add_argument('--setup-only', action='store_true', help='Only setup directories without running analysis')
     parser.add_argument('--validate-config', action='store_true', help='Validate configuration and exit')
+    parser.add_argument('--workers', type=int, default=Config.N_WORKERS,
+                        help='Worker processes for feature extraction and classification')
+    parser.add_argument('--instrument-rules', action='store_true', default=Config.RULE_INSTRUMENTATION,
+                        help='Record per-rule hit counts and timings in the analysis report')
+    parser.add_argument('--rule-profile',
+                        help='Analysis report of an --instrument-rules run used to reorder rule evaluation')
+    parser.add_argument('--offline', action='store_true', default=Config.OFFLINE,
+                        help='Run from the local contribution cache without querying BigQuery')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='Rebuild the local contribution cache from a full query')
+    parser.add_argument('--source', choices=['bigquery', 'file', 'duckdb'], default=Config.DATA_SOURCE,
+                        help='Where contributions are loaded from')
+    parser.add_argument('--source-path', default=Config.DATA_SOURCE_PATH,
+                        help='Parquet/CSV snapshot or DuckDB database for the file and duckdb sources')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    classify_parser = subparsers.add_parser(
+        'classify', help='Classify contribution records from a CSV/Parquet file in chunks'
+    )
+    classify_parser.add_argument('input', help='Input CSV or Parquet file')
+    classify_parser.add_argument('output', help='Output CSV or Parquet file')
+    classify_parser.add_argument('--chunk-size', type=int, default=Config.STREAM_CHUNK_SIZE,
+                                 help='Records per chunk')
+    classify_parser.add_argument('--model', default=None,
+                                 help='Trained model artifacts or exported array model directory '
+                                      '(default: latest version in the model registry, rules only if none)')
+    classify_parser.add_argument('--model-version', default=None,
+                                 help='Registered model version to use, e.g. v0003')
+    classify_parser.add_argument('--array-model', action='store_true', default=Config.MODEL_REGISTRY_ARRAYS,
+                                 help='Load a registered forest from its NumPy arrays: quick to load and shared '
+                                      'by workers, but slower to predict (for small files)')
+    classify_parser.add_argument('--workers', type=int, default=argparse.SUPPRESS,
+                                 help='Worker processes for feature extraction and classification')
+    classify_parser.add_argument('--rule-profile', default=argparse.SUPPRESS,
+                                 help='Analysis report of an --instrument-rules run used to reorder rule evaluation')
+    
+    snapshot_parser = subparsers.add_parser(
+        'snapshot', help='Copy the contributions of a data source into a local Parquet/CSV snapshot'
+    )
+    snapshot_parser.add_argument('output', help='Output CSV or Parquet file')
+    snapshot_parser.add_argument('--source', choices=['bigquery', 'file', 'duckdb'], default=argparse.SUPPRESS,
+                                 help='Where contributions are loaded from')
+    snapshot_parser.add_argument('--source-path', default=argparse.SUPPRESS,
+                                 help='Parquet/CSV snapshot or DuckDB database for the file and duckdb sources')
     
     args = parser.parse_args()
     
+    if args.command == 'classify':
+        success = run_classify(args.input, args.output, args.chunk_size, args.model, args.workers,
+                               args.rule_profile, args.model_version, args.array_model)
+        sys.exit(0 if success else 1)
+    
+    try:
+        data_source = create_data_source(args.source, args.source_path)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.command == 'snapshot':
+        sys.exit(0 if run_snapshot(args.output, data_source) else 1)
+    
     # Setup directories
     setup_directories()
     
@@ -390,7 +500,9 @@ def main():
         return
     
     # Run full analysis
-    success = run_full_analysis()
+    success = run_full_analysis(workers=args.workers, instrument=args.instrument_rules,
+                                rule_profile=args.rule_profile, offline=args.offline,
+                                full_refresh=args.full_refresh, data_source=data_source)
     
     if success:
         logger.info("Analysis completed successfully!")
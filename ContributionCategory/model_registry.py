@@ -0,0 +1,254 @@
+"""
+Local model registry for Enhanced Contribution Classification System
+
+Every trained model is registered as a numbered version directory:
+
+    registry/
+        v0001/
+            metadata.json   version, timestamp, training data hash, categories, metrics
+            model.joblib    full artifacts (ModelPersistence format), uncompressed
+            arrays/         forest and TF-IDF as .npy files (forest models only)
+
+Nothing is compressed, so the model arrays are loaded with mmap_mode: every
+process that loads the same version maps the same file pages, which the
+operating system keeps in memory once however many workers read them.
+scikit-learn copies tree nodes out of the mapped file, so forests only share
+their pages when loaded from their arrays, at the cost of slower predictions.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from array_model import ArrayForestModel
+from config import Config
+from utils import ModelPersistence
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = 'metadata.json'
+ARTIFACTS_FILE = 'model.joblib'
+ARRAYS_DIR = 'arrays'
+REGISTRY_FORMAT = 1
+
+# Columns identifying the training data; missing ones are skipped
+FINGERPRINT_COLUMNS = ['contributor_employer', 'contributor_name', 'contribution_amount',
+                       'contribution_date', 'current_category']
+
+
+def data_fingerprint(df: pd.DataFrame, previous: Optional[str] = None) -> str:
+    """
+    Content hash of training rows
+
+    Args:
+        df: Training DataFrame
+        previous: Fingerprint of data trained on before, chained in when rows
+            are folded into an existing model
+
+    Returns:
+        Hex SHA-256 digest (row order matters, the index does not)
+    """
+    columns = [column for column in FINGERPRINT_COLUMNS if column in df.columns]
+    digest = hashlib.sha256()
+    if previous:
+        digest.update(previous.encode())
+    digest.update(json.dumps(columns).encode())
+    if len(df):
+        frame = df[columns].astype({column: str for column in columns
+                                    if isinstance(df[column].dtype, pd.CategoricalDtype)})
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def is_model_version(path: str) -> bool:
+    """Whether path is a version directory of a registry"""
+    return os.path.isfile(os.path.join(path, METADATA_FILE))
+
+
+class ModelRegistry:
+    """Versioned model artifacts on local disk"""
+
+    def __init__(self, root: str = None, keep: Optional[int] = None):
+        """
+        Args:
+            root: Registry directory, defaults to Config.MODEL_REGISTRY_DIR
+                (created on the first registration)
+            keep: Newest versions kept when registering, defaults to
+                Config.MODEL_REGISTRY_KEEP (0 keeps all)
+        """
+        self.root = root or Config.MODEL_REGISTRY_DIR
+        self.keep = Config.MODEL_REGISTRY_KEEP if keep is None else keep
+
+    def versions(self) -> List[str]:
+        """Registered versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if name.startswith('v') and is_model_version(os.path.join(self.root, name)))
+
+    def latest(self) -> Optional[str]:
+        """Newest registered version (None for an empty registry)"""
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def path(self, version: Optional[str] = None) -> str:
+        """
+        Directory of a version
+
+        Args:
+            version: Version name, defaults to the latest
+
+        Returns:
+            Path of the version directory
+        """
+        version = version or self.latest()
+        if version is None or not is_model_version(os.path.join(self.root, version)):
+            raise FileNotFoundError(f"No model version {version or '(latest)'} in {self.root}")
+        return os.path.join(self.root, version)
+
+    def metadata(self, version: Optional[str] = None) -> Dict:
+        """Metadata of a version (defaults to the latest)"""
+        with open(os.path.join(self.path(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def register(self, classifier) -> str:
+        """
+        Save a trained classifier's model as the next version
+
+        The version is written to a temporary directory and renamed into
+        place, so readers never see a partial version. A model of the same
+        type trained on the same data as the latest version is not registered
+        again. Versions beyond the newest keep are pruned afterwards.
+
+        Args:
+            classifier: Trained ContributionClassifier
+
+        Returns:
+            The new version name (the latest one for an unchanged model)
+        """
+        if not classifier.is_trained:
+            raise ValueError("Only trained models can be registered")
+        model_type = 'incremental' if classifier.is_incremental else 'forest'
+        latest = self.latest()
+        if latest and classifier.training_data_hash:
+            metadata = self.metadata(latest)
+            if (metadata.get('data_hash'), metadata.get('model_type')) == (classifier.training_data_hash, model_type):
+                logger.info(f"Model unchanged since {latest} (data {classifier.training_data_hash[:12]}); "
+                            f"not registered again")
+                return latest
+        os.makedirs(self.root, exist_ok=True)
+        staging = os.path.join(self.root, f'.staging-{os.getpid()}')
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        try:
+            ModelPersistence.save_model_artifacts(classifier, os.path.join(staging, ARTIFACTS_FILE))
+            artifacts = [ARTIFACTS_FILE]
+            if not classifier.is_incremental:
+                ArrayForestModel.from_classifier(classifier).save(os.path.join(staging, ARRAYS_DIR))
+                artifacts.append(ARRAYS_DIR)
+
+            trained_through = classifier.trained_through
+            metadata = {
+                'format': REGISTRY_FORMAT,
+                'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+                'data_hash': classifier.training_data_hash,
+                'model_type': model_type,
+                'categories': sorted(str(category) for category in classifier.classifier.classes_),
+                'metrics': classifier.training_metrics,
+                'trained_through': None if trained_through is None else str(trained_through),
+                'artifacts': artifacts
+            }
+
+            # Version numbers are claimed by the rename; retry if another
+            # process registered the same number first
+            while True:
+                versions = self.versions()
+                number = int(versions[-1][1:]) + 1 if versions else 1
+                version = f'v{number:04d}'
+                metadata['version'] = version
+                with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+                    json.dump(metadata, f, indent=2, default=str)
+                try:
+                    os.rename(staging, os.path.join(self.root, version))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(self.root, version)):
+                        raise
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logger.info(f"Registered model {version} ({metadata['model_type']}, data {str(metadata['data_hash'])[:12]}) "
+                    f"in {self.root}")
+        self.prune()
+        return version
+
+    def prune(self, keep: Optional[int] = None) -> List[str]:
+        """
+        Delete all but the newest versions
+
+        Processes that already loaded a pruned version keep reading it (the
+        operating system holds mapped files until they are unmapped).
+
+        Args:
+            keep: Versions to keep, defaults to self.keep (0 keeps all)
+
+        Returns:
+            The deleted versions
+        """
+        keep = self.keep if keep is None else keep
+        versions = self.versions()
+        pruned = versions[:-keep] if keep > 0 else []
+        for version in pruned:
+            shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
+        if pruned:
+            logger.info(f"Pruned {len(pruned)} model versions ({pruned[0]}..{pruned[-1]}), keeping {keep}")
+        return pruned
+
+    def load(self, version: Optional[str] = None, mmap_mode: Optional[str] = 'r',
+             arrays: Optional[bool] = None) -> Dict:
+        """
+        Load a registered version
+
+        Models are loaded from the joblib artifacts, or with arrays, forests
+        from their arrays without unpickling scikit-learn objects. With
+        mmap_mode the arrays are memory-mapped rather than read, so processes
+        loading the same version share their pages; models that will be
+        updated in place (partial_fit) need mmap_mode=None.
+
+        Args:
+            version: Version name, defaults to the latest
+            mmap_mode: Passed to np.load / joblib.load ('r', 'c' or None)
+            arrays: Load forests as an ArrayForestModel: quick to load and
+                shared by workers, but several times slower to predict, so
+                suited to small jobs; defaults to Config.MODEL_REGISTRY_ARRAYS
+
+        Returns:
+            Dictionary with classifier, vectorizer, metadata, version and path
+            (plus the saved firm_index and boundary_filings for joblib-loaded
+            models)
+        """
+        path = self.path(version)
+        metadata = self.metadata(os.path.basename(path))
+        loaded = {'metadata': metadata, 'version': metadata['version'], 'path': path}
+
+        arrays = Config.MODEL_REGISTRY_ARRAYS if arrays is None else arrays
+        if arrays and ARRAYS_DIR in metadata.get('artifacts', []):
+            model = ArrayForestModel.load(os.path.join(path, ARRAYS_DIR), mmap_mode=mmap_mode)
+            loaded.update(classifier=model.forest, vectorizer=model.vectorizer)
+        else:
+            import joblib
+
+            artifacts = joblib.load(os.path.join(path, ARTIFACTS_FILE), mmap_mode=mmap_mode)
+            loaded.update(classifier=artifacts['classifier'], vectorizer=artifacts['vectorizer'],
+                          firm_index=artifacts.get('firm_index'),
+                          boundary_filings=artifacts.get('boundary_filings'))
+        logger.info(f"Loaded model {metadata['version']} from {path}"
+                    f"{f' (memory-mapped, mode {mmap_mode})' if mmap_mode else ''}")
+        return loaded
@@ -0,0 +1,1175 @@
+"""
+Compiled rule engine for Enhanced Contribution Classification System
+
+All keyword lists used by the rule-based classifier are compiled once into a
+single Aho-Corasick automaton, so a string is scanned in one linear pass no
+matter how many keywords are configured. Short keywords ('INC', 'PAC', 'IT')
+only match whole words and are looked up per token in a hash index instead.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from firm_index import FirmNameIndex, firm_key
+from text_normalizer import PREPROCESSOR
+from utils import KeyDeduplicator
+
+logger = logging.getLogger(__name__)
+
+# Business entity indicators checked alongside the BusinessOwner keywords
+BUSINESS_ENTITIES = ['LLC', 'INC', 'CORP', 'COMPANY', 'BUSINESS', 'CONSULTING', 'SERVICES']
+
+# Financial/professional service company indicators
+FINANCIAL_INDICATORS = ['BANK', 'FINANCIAL', 'CAPITAL', 'INVESTMENT', 'REALTY', 'INSURANCE']
+
+# Employer values treated as "no employer" (Individual)
+EMPTY_EMPLOYER_VALUES = frozenset(['', 'NONE', 'N/A', 'UNKNOWN'])
+
+# Tokens of normalized text; whole-word keywords match where r'\bKEYWORD\b' does
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Industry of employers matching no Config.INDUSTRY_MAPPING keyword
+UNKNOWN_INDUSTRY = 'Unknown'
+
+# Legacy pattern dictionaries (from initialize_patterns) and their categories
+LEGACY_CATEGORIES = [
+    ('lawyer', 'Lawyer'),
+    ('developer', 'Developer'),
+    ('business_owner', 'BusinessOwner'),
+]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton returning a bitmask of matched keyword groups"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[int] = [0]
+        self._delta: List[Dict[str, int]] = []
+        self.num_keywords = 0
+
+    def add(self, keyword: str, group_bit: int) -> None:
+        """
+        Add a keyword that sets group_bit when found
+
+        Args:
+            keyword: Keyword to match as a substring
+            group_bit: Bit index of the group the keyword belongs to
+        """
+        if not keyword:
+            return
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._output.append(0)
+            state = next_state
+
+        if not self._output[state]:
+            self.num_keywords += 1
+        self._output[state] |= 1 << group_bit
+        self._delta = []
+
+    def build(self) -> 'KeywordAutomaton':
+        """Compute failure links and the full transition table"""
+        fail = [0] * len(self._goto)
+        delta: List[Dict[str, int]] = [None] * len(self._goto)
+        delta[0] = dict(self._goto[0])
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # Outputs are inherited along the failure chain
+            self._output[state] |= self._output[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(self._goto[state])
+
+            for char, next_state in self._goto[state].items():
+                fail[next_state] = delta[fail[state]].get(char, 0)
+                queue.append(next_state)
+
+        self._delta = delta
+        return self
+
+    def scan(self, text: str) -> int:
+        """
+        Scan text once and return the bitmask of all matched groups
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Bitmask with one bit set per matched group
+        """
+        if not self._delta:
+            self.build()
+
+        delta = self._delta
+        output = self._output
+        state = 0
+        mask = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            mask |= output[state]
+        return mask
+
+
+class TokenIndex:
+    """
+    Hash index of whole-word keywords returning a bitmask of matched groups
+
+    Text is tokenized once and every token is looked up in a dictionary, so
+    the cost is proportional to the number of tokens rather than keywords.
+    Multi-word keywords ('CITY OF', 'N/A') take a separate phrase path: the
+    n-grams of their lengths are looked up and the text spanning the n-gram
+    must equal the keyword, so 'REAL ESTATE' matches exactly where
+    r'\bREAL ESTATE\b' would.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, int] = {}
+        self._phrases: Dict[Tuple[str, ...], Dict[str, int]] = {}
+        self._phrase_lengths: List[int] = []
+        self.num_keywords = 0
+
+    @staticmethod
+    def accepts(keyword: str) -> bool:
+        """Whether keyword starts and ends with a word character, as whole-word keywords must"""
+        return bool(keyword) and bool(TOKEN_PATTERN.match(keyword[0])) and bool(TOKEN_PATTERN.match(keyword[-1]))
+
+    def add(self, keyword: str, group_bit: int) -> None:
+        """
+        Add a whole-word keyword that sets group_bit when found
+
+        Args:
+            keyword: Keyword to match as whole words
+            group_bit: Bit index of the group the keyword belongs to
+        """
+        if not self.accepts(keyword):
+            raise ValueError(f"Keyword {keyword!r} cannot be matched as whole words")
+
+        tokens = tuple(TOKEN_PATTERN.findall(keyword))
+        if len(tokens) == 1:
+            entries = self._tokens
+        else:
+            entries = self._phrases.setdefault(tokens, {})
+            if len(tokens) not in self._phrase_lengths:
+                self._phrase_lengths.append(len(tokens))
+
+        if not entries.get(keyword):
+            self.num_keywords += 1
+        entries[keyword] = entries.get(keyword, 0) | (1 << group_bit)
+
+    def scan(self, text: str) -> int:
+        """
+        Tokenize text once and return the bitmask of all matched groups
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Bitmask with one bit set per matched group
+        """
+        mask = 0
+        if not self._phrases:
+            lookup = self._tokens.get
+            for token in TOKEN_PATTERN.findall(text):
+                mask |= lookup(token, 0)
+            return mask
+
+        matches = list(TOKEN_PATTERN.finditer(text))
+        tokens = [match.group() for match in matches]
+        lookup = self._tokens.get
+        for token in tokens:
+            mask |= lookup(token, 0)
+
+        for length in self._phrase_lengths:
+            for start in range(len(tokens) - length + 1):
+                phrases = self._phrases.get(tuple(tokens[start:start + length]))
+                if phrases:
+                    span = text[matches[start].start():matches[start + length - 1].end()]
+                    mask |= phrases.get(span, 0)
+        return mask
+
+
+class Rule(NamedTuple):
+    """A single classification rule; the first matching rule wins"""
+    name: str
+    category: str
+    employer_mask: int = 0
+    name_mask: int = 0
+    original_mask: int = 0
+    exact_matches: frozenset = frozenset()  # firm_key of known firms
+    match_empty_employer: bool = False
+
+
+def merge_rules(rules: Sequence[Rule], name: str, category: str) -> Rule:
+    """
+    Combine rules into one rule that matches whenever any of them matches
+
+    Args:
+        rules: Rules to combine
+        name: Name of the combined rule
+        category: Category of the combined rule
+
+    Returns:
+        Combined rule
+    """
+    employer_mask = name_mask = original_mask = 0
+    exact_matches = frozenset()
+    match_empty_employer = False
+    for rule in rules:
+        employer_mask |= rule.employer_mask
+        name_mask |= rule.name_mask
+        original_mask |= rule.original_mask
+        exact_matches |= rule.exact_matches
+        match_empty_employer = match_empty_employer or rule.match_empty_employer
+    return Rule(name, category, employer_mask, name_mask, original_mask,
+                exact_matches, match_empty_employer)
+
+
+def load_rule_profile(file_path: str) -> Dict[str, Any]:
+    """
+    Load a rule profile written by a previous instrumented run
+
+    Args:
+        file_path: JSON analysis report (with a rule_instrumentation section)
+            or a bare RuleStats.to_dict() dump
+
+    Returns:
+        Rule profile dictionary
+    """
+    with open(file_path, 'r') as f:
+        profile = json.load(f)
+    return profile.get('rule_instrumentation', profile)
+
+
+class RuleStats:
+    """Per-rule hit counts, evaluation counts and cumulative time"""
+
+    def __init__(self, rules: Sequence[Rule]):
+        """
+        Initialize empty counters
+
+        Args:
+            rules: Rules to count, in priority order
+        """
+        self.rules = list(rules)
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero every counter"""
+        self.rows = 0
+        self.unmatched = 0
+        self.scan_seconds = 0.0
+        self.evaluated = {rule.name: 0 for rule in self.rules}
+        self.matched = {rule.name: 0 for rule in self.rules}
+        self.seconds = {rule.name: 0.0 for rule in self.rules}
+
+    def record(self, rule_name: str, evaluated: int, matched: int, seconds: float) -> None:
+        """Add one evaluation of a rule against a number of rows"""
+        self.evaluated[rule_name] += evaluated
+        self.matched[rule_name] += matched
+        self.seconds[rule_name] += seconds
+
+    def merge(self, other: 'RuleStats') -> None:
+        """Add the counters of another RuleStats for the same rules"""
+        self.rows += other.rows
+        self.unmatched += other.unmatched
+        self.scan_seconds += other.scan_seconds
+        for rule in self.rules:
+            self.record(rule.name, other.evaluated[rule.name], other.matched[rule.name],
+                        other.seconds[rule.name])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the counters
+
+        Returns:
+            Dictionary with row totals, scan time and one entry per rule
+        """
+        return {
+            'rows': self.rows,
+            'unmatched_rows': self.unmatched,
+            'scan_seconds': round(self.scan_seconds, 6),
+            'rules': [{
+                'rule': rule.name,
+                'category': rule.category,
+                'evaluated': self.evaluated[rule.name],
+                'matched': self.matched[rule.name],
+                'hit_rate': (self.matched[rule.name] / self.evaluated[rule.name]
+                             if self.evaluated[rule.name] else 0.0),
+                'seconds': round(self.seconds[rule.name], 6)
+            } for rule in self.rules]
+        }
+
+
+class CompiledRuleEngine:
+    """
+    Rule-based classifier compiled from Config and the legacy SQL patterns
+    """
+
+    def __init__(self, legacy_patterns: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 enhanced_patterns: Optional[Dict[str, List[str]]] = None,
+                 employer_mappings: Optional[Dict[str, str]] = None,
+                 whole_word_max_length: Optional[int] = None,
+                 industry_mapping: Optional[Dict[str, List[str]]] = None):
+        """
+        Compile the rule set
+
+        Args:
+            legacy_patterns: Pattern dictionaries keyed by 'lawyer', 'developer'
+                and 'business_owner' (see ContributionClassifier.initialize_patterns)
+            enhanced_patterns: Keyword lists, defaults to Config.ENHANCED_PATTERNS
+            employer_mappings: Employer to category mappings, defaults to Config.EMPLOYER_MAPPINGS
+            whole_word_max_length: Keywords up to this length only match whole
+                words, defaults to Config.WHOLE_WORD_MAX_LENGTH (0 disables)
+            industry_mapping: Industry keyword lists in priority order,
+                defaults to Config.INDUSTRY_MAPPING
+        """
+        legacy_patterns = legacy_patterns or {}
+        enhanced_patterns = enhanced_patterns if enhanced_patterns is not None else Config.ENHANCED_PATTERNS
+        if employer_mappings is None:
+            employer_mappings = getattr(Config, 'EMPLOYER_MAPPINGS', {})
+
+        if whole_word_max_length is None:
+            whole_word_max_length = getattr(Config, 'WHOLE_WORD_MAX_LENGTH', 0)
+        self.whole_word_max_length = whole_word_max_length
+
+        self.automaton = KeywordAutomaton()
+        self.token_index = TokenIndex()
+        self._whole_words: List[str] = []
+        self.group_names: List[str] = []
+        self.group_keywords: List[List[str]] = []
+        self.rules: List[Rule] = []
+
+        # Specific employer mappings first, in dictionary order
+        for employer_key, category in employer_mappings.items():
+            bit = self._add_group(f'employer_mapping:{employer_key}', [employer_key.upper()])
+            self.rules.append(Rule(f'employer_mapping:{employer_key}', category,
+                                   employer_mask=bit, original_mask=bit))
+
+        # Pohlad family - merged into BusinessOwner
+        bit = self._add_group('pohlad', ['POHLAD'])
+        self.rules.append(Rule('pohlad', 'BusinessOwner', employer_mask=bit, name_mask=bit))
+
+        bit = self._add_group('lawyer_keywords', enhanced_patterns.get('lawyer_keywords', []))
+        self.rules.append(Rule('lawyer_keywords', 'Lawyer', employer_mask=bit))
+
+        bit = self._add_group('developer_keywords', enhanced_patterns.get('developer_keywords', []))
+        self.rules.append(Rule('developer_keywords', 'Developer', employer_mask=bit))
+
+        bit = (self._add_group('business_entities', BUSINESS_ENTITIES) |
+               self._add_group('business_owner_keywords', enhanced_patterns.get('business_owner_keywords', [])) |
+               self._add_group('financial_indicators', FINANCIAL_INDICATORS))
+        self.rules.append(Rule('business_owner_keywords', 'BusinessOwner', employer_mask=bit))
+
+        bit = self._add_group('individual_keywords', enhanced_patterns.get('individual_keywords', []))
+        self.rules.append(Rule('individual_keywords', 'Individual', employer_mask=bit,
+                               match_empty_employer=True))
+
+        bit = self._add_group('association_keywords', enhanced_patterns.get('association_keywords', []))
+        self.rules.append(Rule('association_keywords', 'Association', employer_mask=bit, name_mask=bit))
+
+        # Legacy patterns fallback (from original SQL function)
+        firm_names = []
+        for key, category in LEGACY_CATEGORIES:
+            patterns = legacy_patterns.get(key, {})
+            bit = self._add_group(f'legacy_{key}', patterns.get('pattern_matches', []))
+            firm_names.extend(patterns.get('exact_matches', []))
+            exact_matches = frozenset(firm_key(name) for name in patterns.get('exact_matches', []))
+            self.rules.append(Rule(f'legacy_{key}', category, employer_mask=bit,
+                                   exact_matches=exact_matches - {''}))
+
+        # Employers matching a known firm up to misspellings and truncation
+        self.firm_index = FirmNameIndex(firm_names)
+
+        # Industry keywords share the automaton, so the scan that classifies
+        # an employer also tags its industry
+        industry_mapping = industry_mapping if industry_mapping is not None else Config.INDUSTRY_MAPPING
+        self.industry_masks = {industry: self._add_group(f'industry:{industry}', keywords)
+                               for industry, keywords in industry_mapping.items()}
+        self.industry_names = list(self.industry_masks) + [UNKNOWN_INDUSTRY]
+
+        # Whole-word keywords also go into the automaton as one candidate
+        # group, so only text containing one of them is tokenized
+        substring_keywords = self.automaton.num_keywords
+        self._candidate_mask = 1 << len(self.group_names)
+        for keyword in self._whole_words:
+            self.automaton.add(keyword, len(self.group_names))
+
+        self.automaton.build()
+        self._original_mask = 0
+        for rule in self.rules:
+            self._original_mask |= rule.original_mask
+
+        self.category_names = [category for category in Config.CATEGORIES
+                               if category == 'Others' or
+                               any(rule.category == category for rule in self.rules)]
+        for rule in self.rules:
+            if rule.category not in self.category_names:
+                self.category_names.append(rule.category)
+        # One bit per matchable category, in Config.CATEGORIES order
+        self.category_bits = {category: 1 << position for position, category in
+                              enumerate(c for c in self.category_names if c != 'Others')}
+        self.mask_dtype = np.min_scalar_type(max(1, (1 << len(self.category_bits)) - 1))
+        self._regex_cache: Dict[int, Optional[str]] = {}
+        # Opt-in instrumentation, see ContributionClassifier.enable_instrumentation
+        self.stats: Optional[RuleStats] = None
+        # Rules evaluated speculatively ahead of priority order, see apply_profile
+        self.speculative_rules: List[int] = []
+        self._priority_screens: Dict[int, Rule] = {}
+
+        logger.info(f"Compiled {len(self.rules)} rules over "
+                    f"{substring_keywords} substring and "
+                    f"{self.token_index.num_keywords} whole-word keywords")
+
+    def _add_group(self, group_name: str, keywords: Iterable[str]) -> int:
+        """Register a keyword group and return its bitmask"""
+        bit = len(self.group_names)
+        keywords = list(keywords)
+        self.group_names.append(group_name)
+        self.group_keywords.append(keywords)
+        for keyword in keywords:
+            if self.is_whole_word(keyword):
+                self.token_index.add(keyword, bit)
+                self._whole_words.append(keyword)
+            else:
+                self.automaton.add(keyword, bit)
+        return 1 << bit
+
+    def is_whole_word(self, keyword: str) -> bool:
+        """Whether keyword only matches whole words rather than any substring"""
+        return len(keyword) <= self.whole_word_max_length and TokenIndex.accepts(keyword)
+
+    def keyword_in(self, keyword: str, text: str) -> bool:
+        """Check a single keyword against text with its matching semantics"""
+        if self.is_whole_word(keyword):
+            return re.search(rf'\b{re.escape(keyword)}\b', text) is not None
+        return keyword in text
+
+    def _scan_text(self, text: str) -> int:
+        """Group bitmask of one string from the automaton and the token index"""
+        mask = self.automaton.scan(text)
+        if mask & self._candidate_mask:
+            mask = (mask ^ self._candidate_mask) | self.token_index.scan(text)
+        return mask
+
+    def scan(self, employer: str, employer_clean: str, name_clean: str) -> Tuple[int, int, int]:
+        """
+        Scan the inputs once each
+
+        Args:
+            employer: Original employer value
+            employer_clean: Preprocessed employer
+            name_clean: Preprocessed contributor name
+
+        Returns:
+            Tuple of (employer_mask, name_mask, original_mask) group bitmasks
+        """
+        employer_mask = self._scan_text(employer_clean)
+        name_mask = self._scan_text(name_clean)
+
+        employer_original = str(employer).strip().upper() if employer else ""
+        if employer_original == employer_clean:
+            original_mask = employer_mask
+        else:
+            original_mask = self._scan_text(employer_original) & self._original_mask
+
+        return employer_mask, name_mask, original_mask
+
+    @staticmethod
+    def rule_matches(rule: Rule, masks: Tuple[int, int, int],
+                     firm: Optional[str], employer_clean: str) -> bool:
+        """Check whether a rule fires for pre-computed scan masks and resolved firm"""
+        employer_mask, name_mask, original_mask = masks
+        if ((rule.employer_mask & employer_mask) or
+                (rule.name_mask & name_mask) or
+                (rule.original_mask & original_mask)):
+            return True
+        if rule.match_empty_employer and employer_clean in EMPTY_EMPLOYER_VALUES:
+            return True
+        return bool(rule.exact_matches) and firm in rule.exact_matches
+
+    def classify(self, employer: str, employer_clean: str, name_clean: str) -> str:
+        """
+        Classify a contribution
+
+        Args:
+            employer: Original employer value
+            employer_clean: Preprocessed employer
+            name_clean: Preprocessed contributor name
+
+        Returns:
+            Category of the first matching rule, or 'Others'
+        """
+        if self.stats is not None:
+            return self._classify_instrumented(employer, employer_clean, name_clean)
+
+        masks = self.scan(employer, employer_clean, name_clean)
+        firm = self.firm_index.resolve(employer)
+        for rule in self.rules:
+            if self.rule_matches(rule, masks, firm, employer_clean):
+                return rule.category
+        return 'Others'
+
+    def _classify_instrumented(self, employer: str, employer_clean: str, name_clean: str) -> str:
+        """classify() recording every rule evaluation in self.stats"""
+        stats = self.stats
+        start = time.perf_counter()
+        masks = self.scan(employer, employer_clean, name_clean)
+        firm = self.firm_index.resolve(employer)
+        stats.scan_seconds += time.perf_counter() - start
+        stats.rows += 1
+
+        for rule in self.rules:
+            start = time.perf_counter()
+            matched = self.rule_matches(rule, masks, firm, employer_clean)
+            stats.record(rule.name, 1, int(matched), time.perf_counter() - start)
+            if matched:
+                return rule.category
+
+        stats.unmatched += 1
+        return 'Others'
+
+    def matched_categories(self, employer: str, employer_clean: str, name_clean: str) -> List[str]:
+        """
+        Get every category whose rules match, in rule order
+
+        Args:
+            employer: Original employer value
+            employer_clean: Preprocessed employer
+            name_clean: Preprocessed contributor name
+
+        Returns:
+            List of matched categories (first entry is the classification)
+        """
+        masks = self.scan(employer, employer_clean, name_clean)
+        firm = self.firm_index.resolve(employer)
+        categories = []
+        for rule in self.rules:
+            if rule.category not in categories and self.rule_matches(rule, masks, firm, employer_clean):
+                categories.append(rule.category)
+        return categories
+
+    def _match_reasons(self, rule: Rule, masks: Tuple[int, int, int], employer: str,
+                       employer_clean: str, name_clean: str, firm: Optional[str]) -> List[str]:
+        """Describe why a rule matches"""
+        employer_original = str(employer).strip().upper() if employer else ""
+        reasons = []
+        for column, text, rule_mask, mask in (
+                ('employer', employer_clean, rule.employer_mask, masks[0]),
+                ('name', name_clean, rule.name_mask, masks[1]),
+                ('original employer', employer_original, rule.original_mask, masks[2])):
+            for bit, group_name in enumerate(self.group_names):
+                if rule_mask & mask & (1 << bit):
+                    keywords = [k for k in self.group_keywords[bit] if k and self.keyword_in(k, text)]
+                    reasons.append(f"{column} contains {', '.join(repr(k) for k in keywords)} ({group_name})")
+        if rule.match_empty_employer and employer_clean in EMPTY_EMPLOYER_VALUES:
+            reasons.append(f"employer is empty ({employer_clean!r})")
+        if rule.exact_matches and firm in rule.exact_matches:
+            distance = self.firm_index.lookup(employer)[1]
+            reasons.append(f"employer is firm {firm!r}" if not distance else
+                           f"employer is firm {firm!r} ({distance} edit{'s' if distance > 1 else ''} away)")
+        return reasons
+
+    def explain(self, employer: str, employer_clean: str, name_clean: str) -> Dict[str, Any]:
+        """
+        Trace how a contribution is classified
+
+        Args:
+            employer: Original employer value
+            employer_clean: Preprocessed employer
+            name_clean: Preprocessed contributor name
+
+        Returns:
+            Dictionary with the category, the industry, the deciding rule and one trace
+            entry per rule. Rules after the deciding one are still checked so
+            shadowed matches show up, but are marked as not evaluated.
+        """
+        masks = self.scan(employer, employer_clean, name_clean)
+        firm = self.firm_index.resolve(employer)
+        category = 'Others'
+        decided_by = None
+        trace = []
+        for rule in self.rules:
+            matched = self.rule_matches(rule, masks, firm, employer_clean)
+            trace.append({
+                'rule': rule.name,
+                'category': rule.category,
+                'evaluated': decided_by is None,
+                'matched': matched,
+                'reasons': (self._match_reasons(rule, masks, employer, employer_clean, name_clean, firm)
+                            if matched else [])
+            })
+            if matched and decided_by is None:
+                category = rule.category
+                decided_by = rule.name
+
+        return {
+            'employer': employer,
+            'employer_clean': employer_clean,
+            'employer_firm': firm,
+            'name_clean': name_clean,
+            'category': category,
+            'industry': self.industry_of(masks[0]),
+            'decided_by': decided_by,
+            'trace': trace
+        }
+
+    def apply_profile(self, profile: Optional[Dict[str, Any]],
+                      min_share: Optional[float] = None) -> List[str]:
+        """
+        Plan vectorized rule evaluation from the hit frequencies of a previous run
+
+        Rules that decided at least min_share of the profiled rows are
+        evaluated first, most hits per second of evaluation time first. A row
+        matched by such a rule is decided by it only after a single combined
+        screen shows that no higher-priority rule matches, so every result is
+        identical to evaluating in priority order; rows that fail the screen
+        fall back to priority order.
+
+        Args:
+            profile: RuleStats.to_dict() output, or None to restore the
+                default priority-order evaluation
+            min_share: Minimum share of rows a rule must decide,
+                defaults to Config.RULE_PROFILE_MIN_SHARE
+
+        Returns:
+            Names of the speculatively evaluated rules, in evaluation order
+        """
+        self.speculative_rules = []
+        if not profile or not profile.get('rows'):
+            return []
+        min_share = Config.RULE_PROFILE_MIN_SHARE if min_share is None else min_share
+
+        positions = {rule.name: index for index, rule in enumerate(self.rules)}
+        scored = []
+        for entry in profile.get('rules', []):
+            index = positions.get(entry['rule'])
+            # The first rule is already evaluated first
+            if not index or entry['matched'] / profile['rows'] < min_share:
+                continue
+            cost_per_row = entry['seconds'] / entry['evaluated'] if entry['evaluated'] else 0.0
+            scored.append((entry['matched'] / max(cost_per_row, 1e-12), index))
+
+        self.speculative_rules = [index for _, index in sorted(scored, reverse=True)]
+        names = [self.rules[index].name for index in self.speculative_rules]
+        logger.info(f"Rule profile applied; speculative rules: {names or 'none'}")
+        return names
+
+    def _priority_screen(self, index: int) -> Rule:
+        """Combined rule matching whenever any rule before index matches"""
+        if index not in self._priority_screens:
+            self._priority_screens[index] = merge_rules(self.rules[:index], f'before:{self.rules[index].name}',
+                                                         self.rules[index].category)
+        return self._priority_screens[index]
+
+    def mask_keywords(self, mask: int) -> List[str]:
+        """
+        Get the minimal keyword list equivalent to every keyword in mask
+
+        Duplicates are removed, as are keywords implied by another keyword of
+        the same mask (any text containing 'PROPERTIES' also contains 'PROP'; a
+        whole-word keyword such as 'LAW' is only implied by whole-word keywords).
+
+        Args:
+            mask: Group bitmask
+
+        Returns:
+            Keywords sorted longest first
+        """
+        keywords = []
+        for bit, group_keywords in enumerate(self.group_keywords):
+            if mask & (1 << bit):
+                keywords.extend(k for k in group_keywords if k and k not in keywords)
+
+        minimal = [keyword for keyword in keywords
+                   if not any(other != keyword and self._implies(keyword, other) for other in keywords)]
+        # Longest first so an alternation never stops on a shorter prefix
+        return sorted(minimal, key=len, reverse=True)
+
+    def _implies(self, keyword: str, other: str) -> bool:
+        """Whether every text matching keyword also matches other"""
+        if not self.is_whole_word(other):
+            return other in keyword
+        return self.is_whole_word(keyword) and self.keyword_in(other, keyword)
+
+    def mask_regex(self, mask: int, escape=re.escape) -> Optional[str]:
+        """
+        Build one alternation regex over every keyword in mask
+
+        Whole-word keywords share a single word-boundary group.
+
+        Args:
+            mask: Group bitmask
+            escape: Literal escaping function (sql_compiler passes its RE2 escape)
+
+        Returns:
+            Regex, or None if the mask has no keywords
+        """
+        keywords = self.mask_keywords(mask)
+        alternatives = [escape(k) for k in keywords if not self.is_whole_word(k)]
+        whole_words = [escape(k) for k in keywords if self.is_whole_word(k)]
+        if whole_words:
+            alternatives.append(rf"\b(?:{'|'.join(whole_words)})\b")
+        return '|'.join(alternatives) or None
+
+    def _mask_regex(self, mask: int) -> Optional[str]:
+        """Build (and cache) the Python regex of mask"""
+        if mask not in self._regex_cache:
+            self._regex_cache[mask] = self.mask_regex(mask)
+        return self._regex_cache[mask]
+
+    def _contains(self, values: pd.Series, mask: int) -> np.ndarray:
+        """Vectorized keyword test of every keyword in mask"""
+        pattern = self._mask_regex(mask)
+        if pattern is None:
+            return np.zeros(len(values), dtype=bool)
+        return values.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+
+    def resolve_firms(self, employer: pd.Series) -> pd.Series:
+        """
+        Resolve every distinct employer to its nearest known firm
+
+        Args:
+            employer: Original employer values
+
+        Returns:
+            Object Series of firm keys (None where no firm is close enough)
+        """
+        codes, uniques = pd.factorize(employer)
+        firms = np.array([self.firm_index.resolve(value) for value in uniques] + [None], dtype=object)
+        return pd.Series(firms[codes], index=employer.index)
+
+    def scan_series(self, values: pd.Series) -> np.ndarray:
+        """
+        Group bitmasks of a column, scanning each distinct value once
+
+        Args:
+            values: Preprocessed text values
+
+        Returns:
+            Array of group bitmasks (see scan) aligned with values
+        """
+        codes, uniques = pd.factorize(values)
+        dtype = np.uint64 if len(self.group_names) <= 64 else object
+        masks = np.array([self._scan_text(value) for value in uniques] + [0], dtype=dtype)
+        return masks[codes]
+
+    def _match_rows(self, rule: Rule, positions: np.ndarray, employer_firm: pd.Series,
+                    employer_clean: pd.Series, name_clean: pd.Series,
+                    employer_original: pd.Series, mapped: np.ndarray,
+                    employer_masks: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorized rule test for the rows at positions (employer_masks from scan_series)"""
+        matched = np.zeros(len(positions), dtype=bool)
+        if not len(positions):
+            return matched
+        if rule.employer_mask and employer_masks is not None:
+            matched |= (employer_masks[positions] & rule.employer_mask) != 0
+        elif rule.employer_mask:
+            matched |= self._contains(employer_clean.iloc[positions], rule.employer_mask)
+        if rule.name_mask:
+            matched |= self._contains(name_clean.iloc[positions], rule.name_mask)
+        if rule.original_mask:
+            # Only rows that passed the employer mapping screen can match
+            screened = mapped[positions]
+            if screened.any():
+                matched[screened] |= self._contains(employer_original.iloc[positions[screened]],
+                                                    rule.original_mask)
+        if rule.match_empty_employer:
+            matched |= employer_clean.iloc[positions].isin(EMPTY_EMPLOYER_VALUES).to_numpy(dtype=bool)
+        if rule.exact_matches:
+            matched |= employer_firm.iloc[positions].isin(rule.exact_matches).to_numpy(dtype=bool)
+        return matched
+
+    def classify_series(self, employer: pd.Series, employer_clean: pd.Series,
+                        name_clean: pd.Series, weights: Optional[np.ndarray] = None) -> pd.Series:
+        """
+        Classify whole columns at once using pandas string kernels
+
+        Args:
+            employer: Original employer values
+            employer_clean: Preprocessed employers
+            name_clean: Preprocessed contributor names
+            weights: Rows each entry stands for when the input is deduplicated;
+                only used for instrumentation counts
+
+        Returns:
+            Categorical Series of categories aligned with employer
+        """
+        stats = self.stats
+        if stats is not None:
+            weights = np.ones(len(employer), dtype=np.int64) if weights is None else np.asarray(weights)
+            start = time.perf_counter()
+
+        employer_original = employer.where(employer.notna(), '').astype(str).str.strip().str.upper()
+
+        codes = np.full(len(employer), self.category_names.index('Others'), dtype=np.int8)
+        # Positions not yet claimed by a higher-priority rule
+        undecided = np.arange(len(employer))
+
+        # Employer mappings are screened with one combined pass before
+        # resolving which individual mapping matched
+        mapped = (self._contains(employer_clean, self._original_mask) |
+                  self._contains(employer_original, self._original_mask))
+        employer_firm = self.resolve_firms(employer)
+        if stats is not None:
+            stats.scan_seconds += time.perf_counter() - start
+
+        columns = (employer_firm, employer_clean, name_clean, employer_original, mapped)
+
+        # Profiled hot rules first; a hit is final once no earlier rule matches
+        for index in self.speculative_rules:
+            if not len(undecided):
+                break
+            if stats is not None:
+                start = time.perf_counter()
+
+            rule = self.rules[index]
+            candidates = undecided[mapped[undecided]] if rule.original_mask else undecided
+            hits = candidates[self._match_rows(rule, candidates, *columns)]
+            decided = hits[~self._match_rows(self._priority_screen(index), hits, *columns)]
+
+            codes[decided] = self.category_names.index(rule.category)
+            undecided = np.setdiff1d(undecided, decided, assume_unique=True)
+            if stats is not None:
+                stats.record(rule.name, int(weights[candidates].sum()),
+                             int(weights[decided].sum()), time.perf_counter() - start)
+
+        # Every row left either does not match a speculative rule or matches
+        # an earlier rule first, so speculative rules are skipped here
+        speculative = set(self.speculative_rules)
+        for index, rule in enumerate(self.rules):
+            if not len(undecided):
+                break
+            if index in speculative:
+                continue
+            if stats is not None:
+                start = time.perf_counter()
+
+            candidates = undecided[mapped[undecided]] if rule.original_mask else undecided
+            matched = self._match_rows(rule, candidates, *columns)
+
+            codes[candidates[matched]] = self.category_names.index(rule.category)
+            undecided = np.setdiff1d(undecided, candidates[matched], assume_unique=True)
+            if stats is not None:
+                stats.record(rule.name, int(weights[candidates].sum()),
+                             int(weights[candidates[matched]].sum()), time.perf_counter() - start)
+
+        if stats is not None:
+            stats.rows += int(weights.sum())
+            stats.unmatched += int(weights[undecided].sum())
+
+        return pd.Series(pd.Categorical.from_codes(codes, categories=self.category_names),
+                         index=employer.index)
+
+    def industry_of(self, employer_mask: int) -> str:
+        """
+        Industry of an employer from its scan mask
+
+        Args:
+            employer_mask: Group bitmask of the preprocessed employer (see scan)
+
+        Returns:
+            First industry in priority order with a matching keyword, or UNKNOWN_INDUSTRY
+        """
+        for industry, mask in self.industry_masks.items():
+            if employer_mask & mask:
+                return industry
+        return UNKNOWN_INDUSTRY
+
+    def industry_series(self, employer_clean: pd.Series,
+                        employer_masks: Optional[np.ndarray] = None) -> pd.Series:
+        """
+        Tag the industry of every preprocessed employer
+
+        Args:
+            employer_clean: Preprocessed employers
+            employer_masks: Their scan_series masks, when already scanned
+
+        Returns:
+            Categorical Series of industries aligned with employer_clean
+        """
+        if employer_masks is None:
+            employer_masks = self.scan_series(employer_clean)
+        codes = np.full(len(employer_masks), len(self.industry_masks), dtype=np.int8)
+        # Lowest priority first so earlier industries overwrite
+        for position, mask in reversed(list(enumerate(self.industry_masks.values()))):
+            codes[(employer_masks & mask) != 0] = position
+        return pd.Series(pd.Categorical.from_codes(codes, categories=self.industry_names),
+                         index=employer_clean.index)
+
+    def classify_series_multilabel(self, employer: pd.Series, employer_clean: pd.Series,
+                                   name_clean: pd.Series, weights: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Classify whole columns and record every category that matched
+
+        Each rule is evaluated only on rows that do not already carry its
+        category bit, so the cost grows with the number of distinct
+        categories a row matches rather than the number of rules. Profiled
+        speculative rules (see apply_profile) are evaluated first, as in
+        classify_series: a hit no earlier rule matches is final, and those
+        rows skip every earlier rule. The label is the category of the first
+        rule in priority order that matched, whatever the evaluation order.
+
+        Args:
+            employer: Original employer values
+            employer_clean: Preprocessed employers
+            name_clean: Preprocessed contributor names
+            weights: Rows each entry stands for when the input is deduplicated;
+                only used for instrumentation counts
+
+        Returns:
+            DataFrame aligned with employer with a categorical 'category'
+            column (first matching rule, as classify_series), an integer
+            'category_mask' column with one bit per matched category
+            (see category_bits) and a categorical 'industry' column
+        """
+        stats = self.stats
+        if stats is not None:
+            weights = np.ones(len(employer), dtype=np.int64) if weights is None else np.asarray(weights)
+            start = time.perf_counter()
+
+        # One automaton scan of the employers serves both the employer
+        # keyword rules and the industry tags
+        employer_masks = self.scan_series(employer_clean)
+        employer_original = employer.where(employer.notna(), '').astype(str).str.strip().str.upper()
+        mapped = (((employer_masks & self._original_mask) != 0) |
+                  self._contains(employer_original, self._original_mask))
+        columns = (self.resolve_firms(employer), employer_clean, name_clean, employer_original, mapped)
+        if stats is not None:
+            stats.scan_seconds += time.perf_counter() - start
+
+        # Category code of every rule, plus 'Others' for rows no rule matched
+        rule_codes = np.array([self.category_names.index(rule.category) for rule in self.rules] +
+                              [self.category_names.index('Others')], dtype=np.int8)
+        # Index of the label-deciding rule of each row, and of the first rule
+        # that can still match it (none before matches once a hit is final)
+        first_rule = np.full(len(employer), len(self.rules), dtype=np.int16)
+        floor = np.zeros(len(employer), dtype=np.int16)
+        masks = np.zeros(len(employer), dtype=self.mask_dtype)
+        timings = {}
+
+        speculative = set(self.speculative_rules)
+        order = self.speculative_rules + [index for index in range(len(self.rules)) if index not in speculative]
+        for index in order:
+            if stats is not None:
+                start = time.perf_counter()
+
+            rule = self.rules[index]
+            bit = self.category_bits[rule.category]
+            # Rows whose bit is set only need the rule if it could still be
+            # the first match
+            needed = ((masks & bit) == 0) | (first_rule > index)
+            positions = np.flatnonzero(needed & (floor <= index))
+            if rule.original_mask:
+                positions = positions[mapped[positions]]
+            matched = positions[self._match_rows(rule, positions, *columns, employer_masks)]
+
+            masks[matched] |= bit
+            first_rule[matched] = np.minimum(first_rule[matched], index)
+            if index in speculative:
+                hits = matched[(first_rule[matched] == index) & (floor[matched] < index)]
+                decided = hits[~self._match_rows(self._priority_screen(index), hits, *columns,
+                                                 employer_masks)]
+                floor[decided] = index
+            if stats is not None:
+                timings[index] = (int(weights[positions].sum()), time.perf_counter() - start)
+
+        if stats is not None:
+            # A rule's matches are the rows whose label it decided
+            decided = np.bincount(first_rule, weights=weights, minlength=len(self.rules) + 1)
+            for index, (evaluated, seconds) in timings.items():
+                stats.record(self.rules[index].name, evaluated, int(decided[index]), seconds)
+            stats.rows += int(weights.sum())
+            stats.unmatched += int(decided[-1])
+
+        return pd.DataFrame({
+            'category': pd.Categorical.from_codes(rule_codes[first_rule], categories=self.category_names),
+            'category_mask': masks,
+            'industry': self.industry_series(employer_clean, employer_masks)
+        }, index=employer.index)
+
+    def mask_categories(self, mask: int) -> List[str]:
+        """Categories whose bits are set in a category mask"""
+        return [category for category, bit in self.category_bits.items() if mask & bit]
+
+    def resolve_by_priority(self, masks, priorities: Optional[Dict[str, int]] = None) -> pd.Series:
+        """
+        Resolve category masks to the highest-priority matched category
+
+        Rule order remains the label of record; this answers which label
+        Config.CATEGORIES priorities would give, e.g. for gap analysis.
+
+        Args:
+            masks: Array-like or Series of category masks
+            priorities: Category priorities, defaults to Config.CATEGORIES
+
+        Returns:
+            Series of categories ('Others' where no category matched)
+        """
+        priorities = priorities or Config.CATEGORIES
+        index = masks.index if isinstance(masks, pd.Series) else None
+        masks = np.asarray(masks)
+        resolved = np.full(len(masks), 'Others', dtype=object)
+        # Lowest priority first so higher priorities overwrite
+        for category in sorted(self.category_bits, key=lambda c: priorities.get(c, 0)):
+            resolved[(masks & self.category_bits[category]) != 0] = category
+        return pd.Series(resolved, index=index)
+
+
+def preprocess_series(values: pd.Series) -> pd.Series:
+    """
+    Vectorized equivalent of ContributionClassifier.preprocess_text
+
+    Args:
+        values: Series of raw text values
+
+    Returns:
+        Series of cleaned text (empty string for missing values)
+    """
+    return PREPROCESSOR.normalize_series(values)
+
+
+def _rule_inputs(df: pd.DataFrame, employer_column: str, name_column: str) -> Tuple[pd.DataFrame, bool]:
+    """Employer/name frame used as the classification (and deduplication) key"""
+    frame = pd.DataFrame({
+        'employer': df[employer_column] if employer_column in df.columns else '',
+        'name': df[name_column] if name_column in df.columns else ''
+    }, index=df.index)
+
+    # The employer key stays un-normalized because exact-match and employer
+    # mapping rules look at the original employer string
+    if 'name_clean' in df.columns:
+        frame['name'] = df['name_clean']
+        name_is_clean = True
+    else:
+        name_is_clean = False
+    if 'employer_clean' in df.columns:
+        frame['employer_clean'] = df['employer_clean']
+    return frame, name_is_clean
+
+
+def _clean_inputs(unique_frame: pd.DataFrame, name_is_clean: bool) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """(employer, employer_clean, name_clean) for a frame from _rule_inputs"""
+    employer = unique_frame['employer']
+    employer_clean = (unique_frame['employer_clean'] if 'employer_clean' in unique_frame.columns
+                      else preprocess_series(employer))
+    name_clean = unique_frame['name'] if name_is_clean else preprocess_series(unique_frame['name'])
+    return employer, employer_clean, name_clean
+
+
+def classify_frame(df: pd.DataFrame, engine: CompiledRuleEngine,
+                   employer_column: str = 'contributor_employer',
+                   name_column: str = 'contributor_name',
+                   deduplicate: bool = True) -> pd.Series:
+    """
+    Classify every row of a contribution DataFrame in one vectorized pass
+
+    Args:
+        df: DataFrame with employer and name columns
+        engine: Compiled rule engine
+        employer_column: Name of the employer column
+        name_column: Name of the contributor name column
+        deduplicate: Classify each unique (employer, name) key once and
+            broadcast the result back to every row
+
+    Returns:
+        Categorical Series of categories aligned with df
+    """
+    frame, name_is_clean = _rule_inputs(df, employer_column, name_column)
+
+    def classify_unique(unique_frame: pd.DataFrame, counts: Optional[np.ndarray] = None) -> pd.Series:
+        return engine.classify_series(*_clean_inputs(unique_frame, name_is_clean), weights=counts)
+
+    if not deduplicate:
+        return classify_unique(frame)
+    # Instrumentation counts rows, so it needs the size of each key group
+    return KeyDeduplicator.apply(frame, ['employer', 'name'], classify_unique,
+                                 label='Rule-based classification',
+                                 pass_counts=engine.stats is not None)
+
+
+def classify_frame_multilabel(df: pd.DataFrame, engine: CompiledRuleEngine,
+                              employer_column: str = 'contributor_employer',
+                              name_column: str = 'contributor_name',
+                              deduplicate: bool = True) -> pd.DataFrame:
+    """
+    Classify every row and keep the bitmask of all matched categories
+
+    Args:
+        df: DataFrame with employer and name columns
+        engine: Compiled rule engine
+        employer_column: Name of the employer column
+        name_column: Name of the contributor name column
+        deduplicate: Classify each unique (employer, name) key once
+
+    Returns:
+        DataFrame aligned with df with 'category', 'category_mask' and
+        'industry' columns (see CompiledRuleEngine.classify_series_multilabel)
+    """
+    frame, name_is_clean = _rule_inputs(df, employer_column, name_column)
+
+    def classify_unique(unique_frame: pd.DataFrame, counts: Optional[np.ndarray] = None) -> pd.DataFrame:
+        return engine.classify_series_multilabel(*_clean_inputs(unique_frame, name_is_clean), weights=counts)
+
+    if not deduplicate:
+        return classify_unique(frame)
+    return KeyDeduplicator.apply(frame, ['employer', 'name'], classify_unique,
+                                 label='Multi-label classification',
+                                 pass_counts=engine.stats is not None)
+
+
+def summarize_category_masks(engine: CompiledRuleEngine, labels, masks) -> Dict[str, Any]:
+    """
+    Gap analysis answered from category masks with bit operations
+
+    Args:
+        engine: Rule engine that produced the masks
+        labels: Final category of each row
+        masks: category_mask of each row
+
+    Returns:
+        Dictionary with the number of rows matching more than one category,
+        per-label counts of the other categories those rows also matched, and
+        counts of rows Config.CATEGORIES priorities would label differently
+    """
+    labels = np.asarray(pd.Series(labels).astype(str))
+    masks = np.asarray(masks)
+
+    matched_count = np.zeros(len(masks), dtype=np.int8)
+    for bit in engine.category_bits.values():
+        matched_count += (masks & bit) != 0
+
+    overlaps = {}
+    for label in engine.category_bits:
+        label_masks = masks[labels == label]
+        counts = {other: int(((label_masks & bit) != 0).sum())
+                  for other, bit in engine.category_bits.items() if other != label}
+        counts = {other: count for other, count in counts.items() if count}
+        if counts:
+            overlaps[label] = counts
+
+    resolved = engine.resolve_by_priority(masks).to_numpy()
+    changed = resolved != labels
+    conflicts = Counter(f'{label} -> {priority_label}'
+                        for label, priority_label in zip(labels[changed], resolved[changed]))
+
+    return {
+        'multi_category_rows': int((matched_count > 1).sum()),
+        'also_matched': overlaps,
+        'priority_conflicts': dict(conflicts.most_common())
+    }
@@ -0,0 +1,205 @@
+"""
+SQL rule compiler for Enhanced Contribution Classification System
+
+Emits the BigQuery classification UDF directly from the compiled Python rule
+set, so the warehouse function and rule_based_classification cannot drift.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from firm_index import FirmNameIndex
+from rule_engine import CompiledRuleEngine, EMPTY_EMPLOYER_VALUES, Rule, merge_rules
+
+logger = logging.getLogger(__name__)
+
+# Characters with special meaning in RE2 patterns
+REGEX_SPECIAL_CHARS = set('\\.^$|?*+()[]{}')
+
+# Same normalization as ContributionClassifier.preprocess_text for ASCII text
+# (RE2 only treats ASCII letters and digits as word characters)
+NORMALIZE_SQL = "REGEXP_REPLACE(REGEXP_REPLACE(TRIM(UPPER(COALESCE({column}, ''))), r'[^\\w\\s&\\-\\.]', ' '), r'\\s+', ' ')"
+
+# Same normalization as firm_index.firm_key
+FIRM_KEY_SQL = "TRIM(REGEXP_REPLACE(UPPER(COALESCE({column}, '')), r'[^A-Z0-9]+', ' '))"
+
+def sql_regex_escape(keyword: str) -> str:
+    """Escape a literal keyword for use inside an RE2 pattern"""
+    return ''.join(f'\\{char}' if char in REGEX_SPECIAL_CHARS else char for char in keyword)
+
+def sql_string(value: str) -> str:
+    """Quote a Python string as a SQL string literal"""
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+def merge_adjacent_rules(rules: Sequence[Rule]) -> List[Rule]:
+    """
+    Merge consecutive rules that assign the same category
+
+    Rules are first-match-wins, so adjacent rules with the same category can
+    be combined into one WHEN clause without changing any result.
+
+    Args:
+        rules: Ordered rules
+
+    Returns:
+        Ordered list of merged rules
+    """
+    merged: List[Rule] = []
+    for rule in rules:
+        if merged and merged[-1].category == rule.category:
+            previous = merged[-1]
+            merged[-1] = merge_rules([previous, rule], f'{previous.name}+{rule.name}', rule.category)
+        else:
+            merged.append(rule)
+    return merged
+
+def _regex_condition(engine: CompiledRuleEngine, column: str, mask: int) -> Optional[str]:
+    """One REGEXP_CONTAINS over the alternation of every keyword in mask"""
+    pattern = engine.mask_regex(mask, escape=sql_regex_escape)
+    if pattern is None:
+        return None
+    # A regular (not raw) literal: sql_string escapes the backslashes of \b and \.
+    return f"REGEXP_CONTAINS({column}, {sql_string(pattern)})"
+
+def compile_firm_lookup(index: FirmNameIndex, key: str) -> str:
+    """
+    Compile FirmNameIndex.resolve into a scalar SQL subquery
+
+    Args:
+        index: Firm name index of the rule engine
+        key: SQL expression for the employer firm key
+
+    Returns:
+        SQL expression for the nearest firm key, NULL if none is close enough
+    """
+    if not len(index):
+        return 'CAST(NULL AS STRING)'
+
+    # Spaces earn no edits, and a key without a long enough word earns none
+    letters = f"LENGTH(REPLACE({key}, ' ', ''))"
+    budget = ' '.join(f"WHEN {letters} >= {edits * index.chars_per_edit} THEN {edits}"
+                      for edits in range(index.max_edits, 0, -1))
+    fuzzy_word = f"REGEXP_CONTAINS({key}, {sql_string('[^ ]{%d}' % index.min_fuzzy_word)})"
+    budget = f"CASE WHEN NOT {fuzzy_word} THEN 0 {budget} ELSE 0 END" if index.max_edits > 0 else '0'
+    # A long enough key may also match a firm name truncated inside a word,
+    # after min_prefix_words complete words
+    prefix = (f"IF(LENGTH({key}) >= {index.min_prefix_length} AND LENGTH({key}) < LENGTH(firm)"
+              f" AND SUBSTR({key}, LENGTH({key}), 1) = SUBSTR(firm, LENGTH({key}), 1)"
+              f" AND SUBSTR(firm, LENGTH({key}) + 1, 1) != ' '"
+              f" AND LENGTH({key}) - LENGTH(REPLACE({key}, ' ', '')) >= {index.min_prefix_words},"
+              f" EDIT_DISTANCE({key}, SUBSTR(firm, 1, LENGTH({key}))), {index.max_edits + 1})")
+    distance = f"LEAST(EDIT_DISTANCE({key}, firm), {prefix})"
+    firms = ', '.join(sql_string(firm) for firm in index.keys)
+
+    return (f"(SELECT firm FROM UNNEST([{firms}]) AS firm\n"
+            f"             WHERE {distance} <= {budget}\n"
+            f"             ORDER BY {distance}, firm LIMIT 1)")
+
+def compile_rule_condition(engine: CompiledRuleEngine, rule: Rule) -> Optional[str]:
+    """
+    Compile one rule into a SQL boolean expression
+
+    Args:
+        engine: Compiled rule engine the rule belongs to
+        rule: Rule to compile
+
+    Returns:
+        SQL expression, or None if the rule can never match
+    """
+    conditions = []
+    for column, mask in (('employer_clean', rule.employer_mask),
+                         ('name_clean', rule.name_mask),
+                         ('employer_original', rule.original_mask)):
+        if mask:
+            condition = _regex_condition(engine, column, mask)
+            if condition:
+                conditions.append(condition)
+
+    if rule.match_empty_employer:
+        values = ', '.join(sql_string(value) for value in sorted(EMPTY_EMPLOYER_VALUES))
+        conditions.append(f"employer_clean IN ({values})")
+
+    if rule.exact_matches:
+        values = ', '.join(sql_string(value) for value in sorted(rule.exact_matches))
+        conditions.append(f"employer_firm IN ({values})")
+
+    if not conditions:
+        return None
+    return '\n            OR '.join(conditions)
+
+def compile_case_expression(engine: CompiledRuleEngine, employer_param: str, name_param: str) -> str:
+    """
+    Compile the rule set into a scalar SQL subquery returning the category
+
+    Args:
+        engine: Compiled rule engine
+        employer_param: SQL expression for the employer
+        name_param: SQL expression for the contributor name
+
+    Returns:
+        SQL expression
+    """
+    when_clauses = []
+    for rule in merge_adjacent_rules(engine.rules):
+        condition = compile_rule_condition(engine, rule)
+        if condition:
+            when_clauses.append(f"        -- {rule.name}\n"
+                                f"        WHEN {condition}\n"
+                                f"        THEN {sql_string(rule.category)}")
+
+    return (
+        "(\n"
+        "    SELECT CASE\n"
+        + '\n'.join(when_clauses) + "\n"
+        "        ELSE 'Others'\n"
+        "    END\n"
+        "    FROM (\n"
+        "        SELECT\n"
+        "            *,\n"
+        f"            {compile_firm_lookup(engine.firm_index, 'employer_key')} AS employer_firm\n"
+        "        FROM (\n"
+        "            SELECT\n"
+        f"                UPPER(TRIM(COALESCE({employer_param}, ''))) AS employer_original,\n"
+        f"                {NORMALIZE_SQL.format(column=employer_param)} AS employer_clean,\n"
+        f"                {NORMALIZE_SQL.format(column=name_param)} AS name_clean,\n"
+        f"                {FIRM_KEY_SQL.format(column=employer_param)} AS employer_key\n"
+        "        )\n"
+        "    )\n"
+        ")"
+    )
+
+def compile_classification_udf(engine: CompiledRuleEngine, function_path: str,
+                               parameters: Sequence[Tuple[str, str]] = (
+                                   ('ContributorsEmployer', 'STRING'),
+                                   ('ContributorName', 'STRING')),
+                               employer_param: str = 'ContributorsEmployer',
+                               name_param: str = 'ContributorName') -> str:
+    """
+    Compile the rule set into a BigQuery CREATE FUNCTION statement
+
+    Args:
+        engine: Compiled rule engine
+        function_path: Fully qualified function name
+        parameters: (name, type) pairs of the function signature; parameters
+            other than the employer and name are accepted but unused
+        employer_param: Name of the employer parameter
+        name_param: Name of the contributor name parameter
+
+    Returns:
+        SQL DDL string
+    """
+    signature = ',\n    '.join(f'{name} {sql_type}' for name, sql_type in parameters)
+    case_expression = compile_case_expression(engine, employer_param, name_param)
+    logger.info(f"Compiled {len(engine.rules)} rules into UDF {function_path}")
+
+    return f"""-- Contribution Category Classification Function
+-- Generated from the Python rule set (rule_engine.CompiledRuleEngine); do not edit by hand
+-- Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+CREATE OR REPLACE FUNCTION `{function_path}`(
+    {signature}
+) RETURNS STRING AS (
+{case_expression}
+);
+"""
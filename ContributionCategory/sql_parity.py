@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Python/SQL rule parity harness for Enhanced Contribution Classification System
+
+Runs BigQuery classification UDFs against an embedded DuckDB database as a
+local stand-in for the warehouse, compares every row with the Python rule
+engine and reports mismatches and throughput of both.
+
+Run with: python sql_parity.py --rows 100000 --sql-file ContriCategoryFunction.sql
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import logging
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sql_compiler import compile_classification_udf
+from utils import SyntheticDataGenerator
+
+logger = logging.getLogger(__name__)
+
+# BigQuery functions whose DuckDB equivalent differs in name or semantics
+FUNCTION_RENAMES = {
+    'REGEXP_CONTAINS': 'bq_regexp_contains',
+    'REGEXP_REPLACE': 'bq_regexp_replace',
+    'EDIT_DISTANCE': 'levenshtein',
+}
+
+# BigQuery REGEXP_REPLACE replaces every match; DuckDB needs the 'g' flag
+DUCKDB_MACROS = [
+    "CREATE OR REPLACE MACRO bq_regexp_contains(value, pattern) AS regexp_matches(value, pattern)",
+    "CREATE OR REPLACE MACRO bq_regexp_replace(value, pattern, replacement) AS "
+    "regexp_replace(value, pattern, replacement, 'g')",
+]
+
+# BigQuery 'UNNEST(array) AS name' names the column; DuckDB names the table
+UNNEST_CALL = re.compile(r'\bUNNEST\s*\(', re.IGNORECASE)
+UNNEST_ALIAS = re.compile(r'\s+AS\s+(\w+)\b(?!\s*\()', re.IGNORECASE)
+
+STRING_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '\\': '\\', "'": "'", '"': '"', '`': '`'}
+
+FUNCTION_HEADER = re.compile(
+    r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP(?:ORARY)?\s+)?FUNCTION\s+"([^"]+)"\s*\(([^)]*)\)\s*'
+    r'(?:RETURNS\s+(\w+)\s+)?AS\s*\(',
+    re.IGNORECASE
+)
+
+# Python and SQL outputs are compared on the columns the UDFs take
+CORPUS_COLUMNS = ['contributor_employer', 'contributor_name', 'contribution_amount']
+
+# Golden corpus checked in next to this module
+GOLDEN_CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden_corpus.csv')
+
+class SQLFunction(NamedTuple):
+    """A BigQuery UDF translated to a DuckDB macro"""
+    name: str
+    source: str
+    parameters: List[Tuple[str, str]]
+    return_type: Optional[str]
+    body: str
+
+def _read_string(sql: str, start: int, raw: bool) -> Tuple[str, int]:
+    """Read a quoted BigQuery string literal starting at its opening quote"""
+    quote = sql[start]
+    chars = []
+    i = start + 1
+    while i < len(sql):
+        char = sql[i]
+        if char == '\\' and i + 1 < len(sql):
+            following = sql[i + 1]
+            chars.append(char + following if raw else STRING_ESCAPES.get(following, following))
+            i += 2
+        elif char == quote:
+            return ''.join(chars), i + 1
+        else:
+            chars.append(char)
+            i += 1
+    raise ValueError(f"Unterminated string literal at offset {start}")
+
+def _duckdb_string(value: str) -> str:
+    """Quote a value as a standard SQL string literal"""
+    return "'" + value.replace("'", "''") + "'"
+
+def translate_bigquery_sql(sql: str) -> str:
+    """
+    Translate BigQuery SQL into the DuckDB dialect
+
+    Comments are dropped, string literals (quoted, double-quoted and raw)
+    become standard single-quoted literals, backtick identifiers become
+    double-quoted identifiers, regex and edit distance functions are mapped
+    to equivalents with BigQuery semantics and UNNEST aliases name the column
+    as in BigQuery.
+
+    Args:
+        sql: BigQuery SQL text
+
+    Returns:
+        DuckDB SQL text
+    """
+    output = []
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if sql.startswith('--', i) or char == '#':
+            end = sql.find('\n', i)
+            i = len(sql) if end == -1 else end
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = len(sql) if end == -1 else end + 2
+            output.append(' ')
+        elif char in 'rR' and sql[i + 1:i + 2] in ("'", '"'):
+            value, i = _read_string(sql, i + 1, raw=True)
+            output.append(_duckdb_string(value))
+        elif char in ("'", '"'):
+            value, i = _read_string(sql, i, raw=False)
+            output.append(_duckdb_string(value))
+        elif char == '`':
+            end = sql.index('`', i + 1)
+            output.append('"' + sql[i + 1:end] + '"')
+            i = end + 1
+        elif char.isalpha() or char == '_':
+            end = i
+            while end < len(sql) and (sql[end].isalnum() or sql[end] == '_'):
+                end += 1
+            word = sql[i:end]
+            output.append(FUNCTION_RENAMES.get(word.upper(), word))
+            i = end
+        else:
+            output.append(char)
+            i += 1
+    return _alias_unnest_columns(''.join(output))
+
+def _alias_unnest_columns(sql: str) -> str:
+    """Rewrite 'UNNEST(array) AS name' as 'UNNEST(array) AS name(name)' in translated SQL"""
+    output = []
+    position = 0
+    for match in UNNEST_CALL.finditer(sql):
+        if match.start() < position:
+            continue
+        alias = UNNEST_ALIAS.match(sql, _matching_paren(sql, match.end()) + 1)
+        if alias:
+            output.append(sql[position:alias.end()] + f'({alias.group(1)})')
+            position = alias.end()
+    output.append(sql[position:])
+    return ''.join(output)
+
+def _matching_paren(sql: str, start: int) -> int:
+    """Index of the parenthesis closing the one opened just before start"""
+    depth = 1
+    i = start
+    while i < len(sql):
+        char = sql[i]
+        if char in ("'", '"'):
+            # Translated SQL only escapes quotes by doubling them
+            end = sql.index(char, i + 1)
+            while sql[end + 1:end + 2] == char:
+                end = sql.index(char, end + 2)
+            i = end
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError("Unbalanced parentheses in function body")
+
+def parse_functions(sql: str, source: str = '<sql>') -> List[SQLFunction]:
+    """
+    Extract every CREATE FUNCTION statement from BigQuery SQL
+
+    Args:
+        sql: BigQuery SQL text
+        source: Label recorded on each function (usually the file name)
+
+    Returns:
+        Functions with their bodies translated to DuckDB
+    """
+    translated = translate_bigquery_sql(sql)
+    functions = []
+    for match in FUNCTION_HEADER.finditer(translated):
+        parameters = []
+        for parameter in match.group(2).split(','):
+            if parameter.strip():
+                name, sql_type = parameter.split()[:2]
+                parameters.append((name, sql_type.upper()))
+        body_end = _matching_paren(translated, match.end())
+        functions.append(SQLFunction(
+            name=match.group(1).split('.')[-1],
+            source=source,
+            parameters=parameters,
+            return_type=match.group(3).upper() if match.group(3) else None,
+            body=translated[match.end():body_end].strip()
+        ))
+    return functions
+
+def _parameter_column(parameter: str) -> Optional[str]:
+    """Corpus column bound to a UDF parameter, by name"""
+    parameter = parameter.lower()
+    for keyword, column in (('employer', 'contributor_employer'), ('amount', 'contribution_amount'),
+                            ('name', 'contributor_name')):
+        if keyword in parameter:
+            return column
+    return None
+
+def is_classification_function(function: SQLFunction) -> bool:
+    """Whether a UDF maps (employer, name, ...) to a category string"""
+    columns = {_parameter_column(name) for name, _ in function.parameters}
+    return (function.return_type in (None, 'STRING') and
+            {'contributor_employer', 'contributor_name'} <= columns)
+
+def load_sql_functions(file_paths: Sequence[str]) -> List[SQLFunction]:
+    """
+    Load the classification UDFs defined in SQL files
+
+    Args:
+        file_paths: BigQuery SQL files
+
+    Returns:
+        Classification functions found in the files
+    """
+    functions = []
+    for file_path in file_paths:
+        with open(file_path, 'r') as f:
+            found = parse_functions(f.read(), os.path.basename(file_path))
+        classification = [function for function in found if is_classification_function(function)]
+        logger.info(f"{file_path}: {len(classification)} of {len(found)} functions classify contributions")
+        functions.extend(classification)
+    return functions
+
+def generated_function(classifier) -> SQLFunction:
+    """The UDF compiled from the classifier's own rule set"""
+    sql = compile_classification_udf(classifier.rule_engine, 'parity.generated_classify_contribution')
+    return parse_functions(sql, 'sql_compiler')[0]
+
+def connect_duckdb():
+    """Open an in-memory DuckDB database with the BigQuery compatibility macros"""
+    import duckdb
+
+    connection = duckdb.connect(':memory:')
+    for macro in DUCKDB_MACROS:
+        connection.execute(macro)
+    return connection
+
+def run_sql_classification(connection, function: SQLFunction, table: str = 'corpus') -> Tuple[pd.Series, float]:
+    """
+    Classify the corpus table with one UDF
+
+    Args:
+        connection: DuckDB connection holding the corpus table
+        function: UDF to run
+        table: Name of the corpus table
+
+    Returns:
+        (categories, seconds) with categories in corpus row order
+    """
+    parameter_names = [name for name, _ in function.parameters]
+    connection.execute(f'CREATE OR REPLACE MACRO "{function.name}"({", ".join(parameter_names)}) '
+                       f'AS ({function.body})')
+
+    arguments = []
+    for name in parameter_names:
+        column = _parameter_column(name)
+        arguments.append(column if column else 'NULL')
+
+    start = time.perf_counter()
+    result = connection.execute(
+        f'SELECT "{function.name}"({", ".join(arguments)}) AS category FROM {table} ORDER BY row_id'
+    ).fetchdf()
+    seconds = time.perf_counter() - start
+    return result['category'], seconds
+
+def compare_categories(python_categories: pd.Series, sql_categories: pd.Series,
+                       corpus: pd.DataFrame, max_examples: int = 10) -> Dict:
+    """
+    Row-by-row comparison of Python and SQL categories
+
+    Args:
+        python_categories: Categories from the Python engine
+        sql_categories: Categories from a UDF, in the same row order
+        corpus: Corpus the categories were computed on
+        max_examples: Number of example rows to report
+
+    Returns:
+        Dictionary with mismatch counts, the most common (python, sql)
+        disagreements and example rows
+    """
+    python_values = python_categories.astype(object).where(python_categories.notna(), None).to_numpy()
+    sql_values = sql_categories.astype(object).where(sql_categories.notna(), None).to_numpy()
+    mismatched = python_values != sql_values
+
+    pairs = Counter(zip(python_values[mismatched], sql_values[mismatched]))
+    examples = corpus.loc[mismatched, ['contributor_employer', 'contributor_name']].head(max_examples)
+
+    return {
+        'mismatches': int(mismatched.sum()),
+        'mismatch_rate': float(mismatched.mean()) if len(mismatched) else 0.0,
+        'top_mismatches': [{'python': python, 'sql': sql, 'count': count}
+                           for (python, sql), count in pairs.most_common(max_examples)],
+        'examples': [{'contributor_employer': row.contributor_employer,
+                      'contributor_name': row.contributor_name,
+                      'python': python, 'sql': sql}
+                     for row, python, sql in zip(examples.itertuples(),
+                                                 python_values[mismatched][:max_examples],
+                                                 sql_values[mismatched][:max_examples])]
+    }
+
+def run_parity(classifier, corpus: pd.DataFrame, functions: Sequence[SQLFunction],
+               corpus_name: str = 'corpus') -> Dict:
+    """
+    Compare the Python rule engine against SQL UDFs on one corpus
+
+    Args:
+        classifier: ContributionClassifier providing the Python rules
+        corpus: DataFrame with contributor_employer and contributor_name
+            (contribution_amount and expected_category are optional)
+        functions: UDFs to run
+        corpus_name: Label for the report
+
+    Returns:
+        Parity report dictionary
+    """
+    corpus = corpus.reset_index(drop=True)
+    for column in CORPUS_COLUMNS:
+        if column not in corpus.columns:
+            corpus[column] = None
+
+    start = time.perf_counter()
+    python_categories = classifier.classify_frame(corpus).astype(str)
+    python_seconds = time.perf_counter() - start
+
+    report = {
+        'corpus': corpus_name,
+        'rows': len(corpus),
+        'python_seconds': python_seconds,
+        'python_rows_per_second': len(corpus) / python_seconds if python_seconds else None,
+        'functions': []
+    }
+
+    if 'expected_category' in corpus.columns:
+        golden = compare_categories(corpus['expected_category'], python_categories, corpus)
+        report['python_vs_expected_mismatches'] = golden['mismatches']
+        if golden['mismatches']:
+            logger.warning(f"Python engine disagrees with {golden['mismatches']} expected categories "
+                           f"in the {corpus_name} corpus")
+
+    connection = connect_duckdb()
+    table = corpus[CORPUS_COLUMNS].assign(row_id=range(len(corpus)))
+    table['contribution_amount'] = pd.to_numeric(table['contribution_amount'], errors='coerce')
+    connection.register('corpus_frame', table)
+    connection.execute("CREATE OR REPLACE TABLE corpus AS SELECT * FROM corpus_frame")
+    connection.unregister('corpus_frame')
+
+    for function in functions:
+        try:
+            sql_categories, sql_seconds = run_sql_classification(connection, function)
+        except Exception as e:
+            logger.error(f"Could not run {function.source}:{function.name} in DuckDB: {e}")
+            report['functions'].append({'name': function.name, 'source': function.source, 'error': str(e)})
+            continue
+
+        result = compare_categories(python_categories, sql_categories, corpus)
+        result.update({
+            'name': function.name,
+            'source': function.source,
+            'sql_seconds': sql_seconds,
+            'sql_rows_per_second': len(corpus) / sql_seconds if sql_seconds else None
+        })
+        report['functions'].append(result)
+        logger.info(f"{corpus_name}: {function.source}:{function.name} "
+                    f"{result['mismatches']:,} mismatches ({result['mismatch_rate']:.2%})")
+
+    connection.close()
+    return report
+
+def load_golden_corpus(file_path: str = GOLDEN_CORPUS_FILE) -> pd.DataFrame:
+    """Load the checked-in golden corpus with its expected categories"""
+    return pd.read_csv(file_path, dtype=str, keep_default_na=False, na_values=[])
+
+def print_report(report: Dict) -> None:
+    """Print a parity report as a table"""
+    print(f"\nCorpus: {report['corpus']} ({report['rows']:,} rows)")
+    print(f"Python classify_frame: {report['python_rows_per_second']:,.0f} rows/s")
+    if 'python_vs_expected_mismatches' in report:
+        print(f"Python vs expected categories: {report['python_vs_expected_mismatches']:,} mismatches")
+
+    print(f"{'Function':<55} {'Mismatches':>11} {'Rate':>8} {'SQL rows/s':>12}")
+    print("-" * 90)
+    for result in report['functions']:
+        label = f"{result['source']}:{result['name']}"
+        if 'error' in result:
+            print(f"{label:<55} ERROR: {result['error']}")
+            continue
+        print(f"{label:<55} {result['mismatches']:>11,} {result['mismatch_rate']:>7.2%} "
+              f"{result['sql_rows_per_second']:>12,.0f}")
+        for pair in result['top_mismatches'][:5]:
+            print(f"    python={pair['python']!s:<15} sql={pair['sql']!s:<15} {pair['count']:>8,}")
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Compare SQL classification UDFs with the Python rule engine')
+    parser.add_argument('--rows', type=int, default=100_000, help='Synthetic corpus size (0 to skip)')
+    parser.add_argument('--golden', default=GOLDEN_CORPUS_FILE, help='Golden corpus CSV ("" to skip)')
+    parser.add_argument('--sql-file', action='append', default=[],
+                        help='BigQuery SQL file with classification UDFs (repeatable)')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    from contribution_classifier import ContributionClassifier
+
+    classifier = ContributionClassifier()
+    functions = [generated_function(classifier)] + load_sql_functions(args.sql_file)
+
+    corpora = []
+    if args.golden:
+        corpora.append(('golden', load_golden_corpus(args.golden)))
+    if args.rows:
+        corpora.append(('synthetic', SyntheticDataGenerator.generate(args.rows)))
+
+    reports = []
+    for corpus_name, corpus in corpora:
+        report = run_parity(classifier, corpus, functions, corpus_name)
+        print_report(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2, default=str)
+        print(f"\nReport saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Streaming classification pipeline for Enhanced Contribution Classification System
+
+Contribution records are read, classified and written one chunk at a time so
+memory use stays constant regardless of input size.
+"""
+
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from data_sources import FileSource, file_format
+from rule_engine import RuleStats
+
+logger = logging.getLogger(__name__)
+
+def read_chunks(file_path: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+    """
+    Read contribution records in chunks
+
+    Args:
+        file_path: CSV or Parquet file (or directory of Parquet files)
+        chunk_size: Records per chunk, defaults to Config.STREAM_CHUNK_SIZE
+
+    Yields:
+        DataFrame chunks
+    """
+    yield from FileSource(file_path, chunk_size).iter_batches()
+
+def classify_chunk(classifier, chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run feature extraction and rule/ML classification on one chunk
+
+    Args:
+        classifier: ContributionClassifier (trained or rules-only)
+        chunk: Raw contribution records
+
+    Returns:
+        Input columns plus rule_based_category, category_mask, industry,
+        ml_category, confidence_score and enhanced_category
+    """
+    features = classifier.extract_features(chunk)
+
+    rules = classifier.classify_frame_multilabel(features)
+    classified = classifier.enhanced_classify_many(features, rule_based=rules['category'])
+    confident = classified['confidence'] > Config.HIGH_CONFIDENCE_THRESHOLD
+
+    result = chunk.copy()
+    result['rule_based_category'] = classified['rule_based_category']
+    result['category_mask'] = rules['category_mask']
+    result['industry'] = rules['industry']
+    result['ml_category'] = classified['ml_category']
+    # Default confidence for rule-based, the ML probability where ML decided
+    result['confidence_score'] = classified['confidence'].where(confident, 0.8).astype(np.float64)
+    result['enhanced_category'] = classified['final_category']
+    return result
+
+def extract_and_classify_chunk(classifier, chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extract features and add the rule-based enhanced_current_category
+
+    Args:
+        classifier: ContributionClassifier
+        chunk: Raw contribution records
+
+    Returns:
+        Feature DataFrame with enhanced_current_category, category_mask and industry
+    """
+    features = classifier.extract_features(chunk)
+    engine = classifier.rule_engine
+    totals = engine.stats
+    if totals is None:
+        rules = classifier.classify_frame_multilabel(features)
+    else:
+        # Count each chunk separately so the counters survive the trip back
+        # from a worker process; merge_rule_stats adds them up
+        engine.stats = RuleStats(engine.rules)
+        try:
+            rules = classifier.classify_frame_multilabel(features)
+            features.attrs['rule_stats'] = engine.stats
+        finally:
+            engine.stats = totals
+
+    features['enhanced_current_category'] = rules['category']
+    features['category_mask'] = rules['category_mask']
+    features['industry'] = rules['industry']
+    return features
+
+def merge_rule_stats(classifier, chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Add the rule counters attached by extract_and_classify_chunk to the classifier
+
+    Args:
+        classifier: Instrumented ContributionClassifier
+        chunks: Chunks returned by extract_and_classify_chunk
+
+    Yields:
+        The chunks, without the attached counters
+    """
+    for chunk in chunks:
+        stats = chunk.attrs.pop('rule_stats', None)
+        if stats is not None and classifier.rule_engine.stats is not None:
+            classifier.rule_engine.stats.merge(stats)
+        yield chunk
+
+# Classifier shipped once to each pool worker by _init_worker
+_worker_classifier = None
+
+def _init_worker(classifier) -> None:
+    """Process pool initializer holding the compiled rules and fitted model"""
+    global _worker_classifier
+    _worker_classifier = classifier
+
+def _call_in_worker(func: Callable, chunk: pd.DataFrame) -> pd.DataFrame:
+    """Run func against the worker's classifier"""
+    return func(_worker_classifier, chunk)
+
+def map_chunks(func: Callable, classifier, chunks: Iterator[pd.DataFrame],
+               workers: int = 1) -> Iterator[pd.DataFrame]:
+    """
+    Apply func(classifier, chunk) to every chunk, preserving order
+
+    With more than one worker the chunks are processed in a process pool.
+    The classifier is pickled once per worker rather than once per chunk,
+    and at most two chunks per worker are in flight so memory stays bounded.
+
+    Args:
+        func: Module-level function taking (classifier, chunk)
+        classifier: ContributionClassifier
+        chunks: Iterator of DataFrame chunks
+        workers: Number of worker processes
+
+    Yields:
+        Results of func in input order
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield func(classifier, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(classifier,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_call_in_worker, func, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def shard_frame(df: pd.DataFrame, n_shards: int) -> Iterator[pd.DataFrame]:
+    """
+    Split a DataFrame into contiguous shards
+
+    Args:
+        df: Input DataFrame
+        n_shards: Number of shards
+
+    Yields:
+        DataFrame shards in order
+    """
+    n_shards = max(1, min(n_shards, len(df)))
+    bounds = np.linspace(0, len(df), n_shards + 1).astype(int)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        yield df.iloc[start:end]
+
+def chunk_frame(df: pd.DataFrame, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Split a DataFrame into contiguous chunks
+
+    Args:
+        df: Input DataFrame
+        chunk_size: Rows per chunk, defaults to Config.STREAM_CHUNK_SIZE
+
+    Yields:
+        DataFrame chunks in order
+    """
+    chunk_size = chunk_size or Config.STREAM_CHUNK_SIZE
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+def classify_chunks(classifier, chunks: Iterator[pd.DataFrame],
+                    workers: int = 1) -> Iterator[pd.DataFrame]:
+    """
+    Lazily classify a stream of chunks
+
+    Args:
+        classifier: ContributionClassifier
+        chunks: Iterator of raw contribution chunks
+        workers: Number of worker processes
+
+    Yields:
+        Classified chunks
+    """
+    yield from map_chunks(classify_chunk, classifier, chunks, workers)
+
+def write_chunks(chunks: Iterator[pd.DataFrame], file_path: str) -> int:
+    """
+    Write chunks incrementally to CSV or Parquet
+
+    Args:
+        chunks: Iterator of DataFrame chunks
+        file_path: Output CSV or Parquet file
+
+    Returns:
+        Total number of records written
+    """
+    output_format = file_format(file_path)
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    total_rows = 0
+    writer = None
+    try:
+        for chunk_number, chunk in enumerate(chunks):
+            if output_format == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    writer = pq.ParquetWriter(file_path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(file_path, mode='w' if chunk_number == 0 else 'a',
+                             header=chunk_number == 0, index=False)
+
+            total_rows += len(chunk)
+            logger.info(f"Wrote chunk {chunk_number + 1} ({total_rows:,} records so far)")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return total_rows
+
+def run_streaming_classification(classifier, input_path: str, output_path: str,
+                                 chunk_size: Optional[int] = None, workers: int = 1) -> int:
+    """
+    Classify a contribution file of any size chunk by chunk
+
+    Args:
+        classifier: ContributionClassifier (trained or rules-only)
+        input_path: CSV or Parquet input file
+        output_path: CSV or Parquet output file
+        chunk_size: Records per chunk, defaults to Config.STREAM_CHUNK_SIZE
+        workers: Number of worker processes
+
+    Returns:
+        Number of records classified
+    """
+    logger.info(f"Classifying {input_path} -> {output_path} "
+                f"in chunks of {chunk_size or Config.STREAM_CHUNK_SIZE:,}")
+    chunks = read_chunks(input_path, chunk_size)
+    return write_chunks(classify_chunks(classifier, chunks, workers), output_path)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test that the exported array model predicts exactly what the trained forest does
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from array_model import ArrayForestModel, export_array_model
+from contribution_classifier import ContributionClassifier
+from utils import SyntheticDataGenerator
+
+def test_identical_predictions(training_frame, trained_classifier):
+    """Exported arrays reproduce TF-IDF features and forest probabilities bit for bit"""
+    classifier = trained_classifier(training_frame(rows=8000), estimators=20)
+    records = classifier.extract_features(SyntheticDataGenerator.generate(3000, seed=5))
+    texts = classifier._text_features(records).tolist()
+    numerical = records[['employer_length', 'name_length', 'log_amount']].fillna(0).to_numpy()
+    X = classifier.combine_features(classifier.vectorizer.transform(texts), numerical)
+    expected = classifier.classifier.predict_proba(X)
+
+    with tempfile.TemporaryDirectory() as directory:
+        export_array_model(classifier, directory)
+        model = ArrayForestModel.load(directory)
+
+        assert np.array_equal(model.vectorizer.transform(texts), classifier.vectorizer.transform(texts).toarray())
+        assert np.array_equal(model.forest.predict_proba(X, batch_size=97), expected)
+        assert np.array_equal(model.predict_proba(texts, numerical), expected)
+        assert (model.predict(texts, numerical) == classifier.classifier.predict(X)).all()
+
+        # Loaded as the model of a classifier, the batch API is unchanged
+        loaded = ContributionClassifier()
+        loaded.load_model(directory)
+        assert loaded.trained_through == classifier.trained_through
+        pd.testing.assert_frame_equal(loaded.enhanced_classify_many(records), classifier.enhanced_classify_many(records))
+
+def test_export_needs_forest_and_no_sklearn_to_load(training_frame, trained_classifier):
+    """Only forests export, and loading the arrays leaves scikit-learn unimported"""
+    df = training_frame(rows=8000)
+    try:
+        ArrayForestModel.from_classifier(trained_classifier(df, 'incremental'))
+        assert False, 'incremental models have no trees to export'
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        export_array_model(trained_classifier(df, estimators=20), directory)
+        code = ("import sys; from array_model import ArrayForestModel; "
+                f"model = ArrayForestModel.load({directory!r}, mmap_mode='r'); "
+                "model.predict(['Faegre Baker Daniels LLP Jane Doe'], [[24, 8, 5.5]]); "
+                "assert not any(name.split('.')[0] in ('sklearn', 'scipy', 'joblib') for name in sys.modules)")
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+if __name__ == "__main__":
+    import pytest
+
+    if pytest.main([__file__]) == 0:
+        print('✅ Array model matched the trained forest')
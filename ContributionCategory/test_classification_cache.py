@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the LRU classification cache behind enhanced_classify
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contribution_classifier import ContributionClassifier
+from model_registry import ModelRegistry
+from utils import ClassificationCache, SyntheticDataGenerator
+
+def test_lru_eviction():
+    """A full cache evicts the least recently used entry, not the oldest one"""
+    cache = ClassificationCache(max_size=2)
+    cache.put(('a',), {'final_category': 'Lawyer'})
+    cache.put(('b',), {'final_category': 'Lobbyist'})
+    assert cache.get(('a',)) == {'final_category': 'Lawyer'}
+    cache.put(('c',), {'final_category': 'Others'})
+
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) is not None and cache.get(('c',)) is not None
+    assert len(cache) == 2
+    assert cache.get_stats()['evictions'] == 1
+
+    # Returned results are copies
+    cache.get(('a',))['final_category'] = 'Others'
+    assert cache.get(('a',)) == {'final_category': 'Lawyer'}
+
+def test_hit_and_miss_counts():
+    """Every enhanced_classify call is one lookup, and a repeat is a hit"""
+    classifier = ContributionClassifier()
+    first = classifier.enhanced_classify('Faegre Baker Daniels', 'Jane Smith', 250)
+    assert classifier.enhanced_classify('Faegre Baker Daniels', 'Jane Smith', 250) == first
+    classifier.enhanced_classify('Target', 'Jane Smith', 250)
+
+    stats = classifier.get_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 2)
+    assert stats['hit_rate'] == 1 / 3
+
+def test_normalized_spellings_share_an_entry():
+    """Spellings that normalize alike hit one entry unless the rules tell them apart"""
+    classifier = ContributionClassifier()
+    classifier.enhanced_classify('Acme, Inc.', 'Jane Smith', 150)
+    classifier.enhanced_classify('ACME INC', 'JANE  SMITH', 300)
+    assert (classifier.cache.hits, len(classifier.cache)) == (1, 1)
+
+    for employer in ('None', 'None.'):
+        assert (classifier.enhanced_classify(employer, 'Jane Smith', 100)['rule_based_category'] ==
+                classifier.rule_based_classification(employer, 'Jane Smith'))
+
+def test_cache_tied_to_model(training_frame, trained_classifier):
+    """A saved classification cache only warms the model that produced it"""
+    df = training_frame()
+    trained = trained_classifier(df)
+    retrained = trained_classifier(df.head(4000))
+    records = SyntheticDataGenerator.generate(200, seed=5)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, 'cache.json')
+        for employer, name, amount in zip(records['contributor_employer'], records['contributor_name'],
+                                          records['contribution_amount']):
+            trained.enhanced_classify(employer, name, amount)
+        trained.save_cache(cache_file)
+        saved = len(trained.cache)
+
+        registry = ModelRegistry(os.path.join(directory, 'registry'))
+        loaded = ContributionClassifier()
+        loaded.load_registered_model(registry.register(trained), registry)
+        assert loaded.warm_cache(cache_file) == saved
+        assert retrained.warm_cache(cache_file) == 0
+        assert ContributionClassifier().warm_cache(cache_file) == 0
+
+if __name__ == "__main__":
+    import pytest
+
+    if pytest.main([__file__]) == 0:
+        print('✅ Classification cache evicted, counted and keyed on normalized text')
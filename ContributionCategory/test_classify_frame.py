@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test that vectorized frame classification agrees with row-wise classification
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from contribution_classifier import ContributionClassifier
+from sql_parity import load_golden_corpus
+from utils import SyntheticDataGenerator
+
+def _contributions():
+    """Synthetic and golden rows with missing values and a shuffled index"""
+    df = pd.concat([SyntheticDataGenerator.generate(3000), load_golden_corpus()], ignore_index=True)
+    df.loc[df.sample(200, random_state=1).index, 'contributor_employer'] = None
+    df.loc[df.sample(200, random_state=2).index, 'contributor_name'] = None
+    df['contribution_amount'] = pd.to_numeric(df['contribution_amount']).fillna(0)
+    return df.sample(frac=1, random_state=3)
+
+def _row_wise(classifier, df):
+    """Categories from enhanced_classify, one row at a time"""
+    return pd.Series([classifier.enhanced_classify(employer, name, amount)['final_category']
+                      for employer, name, amount in zip(df['contributor_employer'], df['contributor_name'],
+                                                        df['contribution_amount'])],
+                     index=df.index, dtype=object)
+
+def test_classify_frame_matches_enhanced_classify():
+    """Every row gets the category enhanced_classify gives it"""
+    classifier = ContributionClassifier()
+    df = _contributions()
+    expected = _row_wise(classifier, df)
+
+    categories = classifier.classify_frame(df)
+    assert categories.index.equals(df.index)
+    pd.testing.assert_series_equal(categories.astype(object), expected, check_names=False)
+
+def test_categorical_columns():
+    """Categorical employer and name columns classify like plain strings"""
+    classifier = ContributionClassifier()
+    df = _contributions()
+    categorical = df.astype({'contributor_employer': 'category', 'contributor_name': 'category'})
+    pd.testing.assert_series_equal(classifier.classify_frame(categorical).astype(object),
+                                   _row_wise(classifier, df), check_names=False)
+
+if __name__ == "__main__":
+    test_classify_frame_matches_enhanced_classify()
+    test_categorical_columns()
+    print('✅ classify_frame matched row-wise enhanced_classify')
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test that results computed per unique (employer, name) key fan back out row for row
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from contribution_classifier import ContributionClassifier
+from rule_engine import classify_frame
+from utils import KeyDeduplicator, SyntheticDataGenerator
+
+def _keys_frame():
+    """Repeated keys, missing employers and names, and a shuffled index"""
+    frame = pd.DataFrame({
+        'employer': ['Acme', None, 'Acme', np.nan, 'Beta', 'Acme', None, 'Beta'],
+        'name': ['Ann', 'Bob', 'Ann', 'Bob', None, 'Cy', None, None],
+    })
+    frame.index = [70, 10, 60, 20, 50, 30, 40, 0]
+    return frame
+
+def _row_key(row):
+    """Key of one row spelled out, missing values as '<na>'"""
+    return '|'.join(value if isinstance(value, str) else '<na>' for value in (row['employer'], row['name']))
+
+def test_fan_out_keeps_row_order():
+    """Each row gets the result of its own key, missing values forming keys of their own"""
+    frame = _keys_frame()
+    calls = []
+
+    def label(unique, counts):
+        calls.append(len(unique))
+        assert counts.sum() == len(frame)
+        return pd.Series([_row_key(row) for _, row in unique.iterrows()], index=unique.index)
+
+    result = KeyDeduplicator.apply(frame, ['employer', 'name'], label, pass_counts=True)
+    expected = pd.Series([_row_key(row) for _, row in frame.iterrows()], index=frame.index)
+    pd.testing.assert_series_equal(result, expected)
+    # None and NaN are the same missing key: Acme|Ann, <na>|Bob, Beta|<na>, Acme|Cy, <na>|<na>
+    assert calls == [5]
+
+    array_result = KeyDeduplicator.apply(frame, ['employer', 'name'],
+                                         lambda unique: unique['employer'].isna().to_numpy())
+    np.testing.assert_array_equal(array_result, frame['employer'].isna().to_numpy())
+
+def test_classify_frame_deduplicated_matches_every_row():
+    """Deduplicated rule classification equals classifying each row"""
+    df = SyntheticDataGenerator.generate(3000)
+    df.loc[df.sample(300, random_state=1).index, 'contributor_employer'] = None
+    df.loc[df.sample(300, random_state=2).index, 'contributor_name'] = None
+    df = df.sample(frac=1, random_state=3)
+    engine = ContributionClassifier().rule_engine
+
+    deduplicated = classify_frame(df, engine)
+    pd.testing.assert_series_equal(deduplicated, classify_frame(df, engine, deduplicate=False))
+    assert deduplicated.index.equals(df.index)
+
+if __name__ == "__main__":
+    test_fan_out_keeps_row_order()
+    test_classify_frame_deduplicated_matches_every_row()
+    print('✅ Deduplicated results fanned back out to every row')
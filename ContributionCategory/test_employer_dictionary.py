@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test canonical employer IDs and their persistence
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from contribution_classifier import ContributionClassifier
+from employer_dictionary import MISSING_EMPLOYER_ID
+
+EMPLOYERS = ['Faegre Baker Daniels', 'Faegre Baker D', 'FAEGRE BAKER DANIELS', 'Acme Inc', 'ACME, Incorporated',
+             'Acme Corp', 'City of Minneapolis', 'city of minneapolis ', 'Minneapolis', '', '  ', None]
+
+def test_spellings_share_ids():
+    """Variant spellings of one employer get one ID; missing employers get none"""
+    employers = ContributionClassifier().employer_dictionary
+    encoded = employers.encode(pd.Series(EMPLOYERS))
+    ids = dict(zip(EMPLOYERS, encoded))
+
+    assert ids['Faegre Baker Daniels'] == ids['Faegre Baker D'] == ids['FAEGRE BAKER DANIELS']
+    assert ids['Acme Inc'] == ids['ACME, Incorporated'] != ids['Acme Corp']
+    assert ids['City of Minneapolis'] == ids['city of minneapolis ']
+    # A bare city is not folded into a firm whose name starts with it
+    assert list(employers.decode([ids['Minneapolis']])) == ['MINNEAPOLIS']
+    assert ids[''] == ids['  '] == ids[None] == MISSING_EMPLOYER_ID
+    assert len(employers) == 5
+    assert list(employers.decode([ids['Acme Inc'], MISSING_EMPLOYER_ID])) == ['ACME INCORPORATED', '']
+    assert employers.top_employers(encoded, n=2) == {'FAEGRE BAKER DANIELS': 3, 'ACME INCORPORATED': 2}
+
+def test_ids_stable_across_save_and_load():
+    """A reloaded dictionary keeps its IDs and appends new employers"""
+    employers = ContributionClassifier().employer_dictionary
+    first = employers.encode(pd.Series(EMPLOYERS))
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'employers.joblib')
+        employers.save(file_path)
+
+        loaded = ContributionClassifier().employer_dictionary
+        assert loaded.load(file_path) == len(employers)
+        again = loaded.encode(pd.Series(['Target Corp'] + EMPLOYERS))
+        assert list(again[1:]) == list(first)
+        assert again[0] == len(employers)
+
+if __name__ == "__main__":
+    test_spellings_share_ids()
+    test_ids_stable_across_save_and_load()
+    print('✅ Employer spellings map to stable canonical IDs')
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test approximate firm name matching and its persistence with the model
+"""
+
+import os
+import random
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contribution_classifier import ContributionClassifier
+from firm_index import edit_distance
+from rule_engine import classify_frame
+from sql_parity import load_golden_corpus
+from utils import ModelPersistence
+
+def _levenshtein(a, b):
+    """Unbanded reference implementation"""
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+def test_banded_edit_distance():
+    """The banded distance is exact up to the budget"""
+    rng = random.Random(3)
+    for _ in range(2000):
+        a = ''.join(rng.choice('ABC ') for _ in range(rng.randint(0, 12)))
+        b = ''.join(rng.choice('ABC ') for _ in range(rng.randint(0, 12)))
+        budget = rng.randint(0, 3)
+        expected = _levenshtein(a, b)
+        assert edit_distance(a, b, budget) == (expected if expected <= budget else budget + 1), (a, b, budget)
+
+def test_misspelled_and_truncated_firms():
+    """Variants resolve to the canonical firm; unrelated employers do not"""
+    index = ContributionClassifier().rule_engine.firm_index
+    cases = {
+        'Faegre Baker D': 'FAEGRE BAKER DANIELS',
+        'FAEGRE BAKER DANIELS': 'FAEGRE BAKER DANIELS',
+        'Lockridge Grindai Nauen': 'LOCKRIDGE GRINDAL NAUEN',
+        'Mortensori Construction': 'MORTENSON CONSTRUCTION',
+        'McGrahn Shea Carnival Stra': 'MCGRANN SHEA CARNIVAL STRAUGHN AND LAMB',
+        'McGrann Shea C': 'MCGRANN SHEA CARNIVAL STRAUGHN AND LAMB',
+        'North State Advi': 'NORTH STATE ADVISORS',
+        'Keller Williams R': 'KELLER WILLIAMS REALTY',
+        # One complete word and a stub of the next is a truncation
+        'Hillcrest Develop': 'HILLCREST DEVELOPMENT',
+        'Wellington Develop': 'WELLINGTON DEVELOPMENT',
+        'Minnesota Tw': 'MINNESOTA TWINS',
+        'Minneapolis P': None,
+        # Near misses of short firm names are other firms
+        'Blue Fox': None,
+        'BLUE BOX': None,
+        'Blue Oxen': None,
+        'Opus Grip': None,
+        # A cut at a word boundary is not
+        'Minneapolis': None,
+        'MINNEAPOLIS': None,
+        'Faegre': None,
+        'Target': None,
+        '': None,
+        None: None,
+    }
+    for employer, expected in cases.items():
+        assert index.resolve(employer) == expected, (employer, index.lookup(employer))
+
+def test_golden_corpus_categories():
+    """The rules reproduce every expected category of the golden corpus, truncated firms included"""
+    corpus = load_golden_corpus()
+    categories = classify_frame(corpus, ContributionClassifier().rule_engine).astype(str)
+    mismatches = corpus[categories.to_numpy() != corpus['expected_category'].to_numpy()]
+    assert mismatches.empty, mismatches[['contributor_employer', 'expected_category']].to_dict('records')
+
+def test_firm_index_saved_with_model():
+    """The index round-trips through the model artifacts"""
+    classifier = ContributionClassifier()
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'model.joblib')
+        ModelPersistence.save_model_artifacts(classifier, file_path)
+
+        loaded = ContributionClassifier()
+        loaded.load_model(file_path)
+        assert loaded.rule_engine.firm_index is not classifier.rule_engine.firm_index
+        assert loaded.rule_engine.firm_index.keys == classifier.rule_engine.firm_index.keys
+        assert loaded.rule_engine.firm_index.resolve('Faegre Baker D') == 'FAEGRE BAKER DANIELS'
+
+if __name__ == "__main__":
+    test_banded_edit_distance()
+    test_misspelled_and_truncated_firms()
+    test_golden_corpus_categories()
+    test_firm_index_saved_with_model()
+    print('✅ Firm name index resolved every variant')
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test memory-efficient dtypes for loaded contribution frames
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from utils import FrameOptimizer, SyntheticDataGenerator
+
+def test_optimized_frame_keeps_values():
+    """Categoricals, Arrow strings and float32 amounts hold the same data in less memory"""
+    df = SyntheticDataGenerator.generate(20000)
+    df = df.astype({column: object for column in df.columns if pd.api.types.is_string_dtype(df[column])})
+    df.loc[::7, 'contributor_employer'] = None
+    baseline = df.memory_usage(deep=True, index=False)
+
+    optimized = FrameOptimizer.optimize(df.copy())
+    for column in ['source_type', 'candidate_category', 'current_category']:
+        assert isinstance(optimized[column].dtype, pd.CategoricalDtype)
+    assert optimized['contribution_amount'].dtype == np.float32
+    assert optimized['contributor_employer'].isna().sum() == df['contributor_employer'].isna().sum()
+    for column in df.columns.drop('contribution_amount'):
+        assert optimized[column].astype(object).fillna('<NA>').tolist() == df[column].fillna('<NA>').tolist()
+    assert np.array_equal(np.round(optimized['contribution_amount'].astype(np.float64), 2), df['contribution_amount'])
+
+    report = FrameOptimizer.memory_report(optimized, baseline)
+    assert report['reduction'] > 3
+    assert set(report['columns']) == set(df.columns)
+
+def test_amounts_stay_float64_when_cents_would_change():
+    """Sub-cent values and amounts too large for float32 cents are left alone"""
+    for amounts in ([10.005, 20.0], [250000.01, 5.0]):
+        df = FrameOptimizer.optimize(pd.DataFrame({'contribution_amount': amounts}))
+        assert df['contribution_amount'].dtype == np.float64
+    df = FrameOptimizer.optimize(pd.DataFrame({'contribution_amount': [12345.67, np.nan, 0.01]}))
+    assert df['contribution_amount'].dtype == np.float32
+
+if __name__ == "__main__":
+    test_optimized_frame_keeps_values()
+    test_amounts_stay_float64_when_cents_would_change()
+    print('✅ Optimized dtypes keep every value')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test whole-word keyword matching and its agreement between the token index
+(row-wise classify) and the word-boundary regexes (classify_series)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from contribution_classifier import ContributionClassifier
+from rule_engine import TokenIndex, preprocess_series
+
+EMPLOYERS = [
+    'Lawn Care Pros', 'Lawson Software', 'Law Offices of J. Smith', 'Smith Lawyer',
+    'Capacity Inc', 'Principal Financial', 'Acme Inc.', 'Acme, INC', 'Incorporated Village',
+    'Pacific Corp', 'Teamsters PAC', 'PAC-10', 'Space Pac Industries', 'CEO', 'CEOs United',
+    'Hillcrest Develop', 'HILLCREST DEVELOP', 'Hillcrest LLC', 'L.L.C.', 'CPA Firm',
+    'N/A', 'N/A Holdings', 'City of Minneapolis', 'Real Estate', 'Unreal Estates',
+    'School District 1', 'Self-Employed', '', None,
+]
+
+def test_token_index_phrases():
+    """Multi-word keywords match where the word-boundary regex does"""
+    index = TokenIndex()
+    index.add('INC', 0)
+    index.add('N/A', 1)
+    index.add('CITY OF', 2)
+
+    assert index.scan('ACME INC.') == 0b001
+    assert index.scan('PRINCIPAL') == 0
+    assert index.scan('N/A HOLDINGS') == 0b010
+    assert index.scan('N A HOLDINGS') == 0
+    assert index.scan('THE CITY OF MINNEAPOLIS INC') == 0b101
+    assert index.scan('CITY OFFICE') == 0
+
+def test_row_and_vectorized_paths_agree():
+    """classify (token index) and classify_frame (regexes) give the same categories"""
+    classifier = ContributionClassifier()
+    df = pd.DataFrame({'contributor_employer': EMPLOYERS,
+                       'contributor_name': ['Jane Smith'] * len(EMPLOYERS)})
+
+    vectorized = classifier.classify_frame(df).astype(str).tolist()
+    employer_clean = preprocess_series(df['contributor_employer'])
+    row_wise = [classifier.rule_engine.classify(employer or '', clean, 'JANE SMITH')
+                for employer, clean in zip(df['contributor_employer'], employer_clean)]
+
+    for employer, expected, actual in zip(EMPLOYERS, row_wise, vectorized):
+        print(f'{str(employer):<28} {expected:<15} {actual}')
+    assert row_wise == vectorized
+
+    categories = dict(zip(EMPLOYERS, vectorized))
+    assert categories['Lawn Care Pros'] == 'Others'
+    assert categories['Law Offices of J. Smith'] == 'Lawyer'
+    assert categories['Smith Lawyer'] == 'Lawyer'
+    assert categories['Principal Financial'] == 'BusinessOwner'
+    assert categories['Teamsters PAC'] == 'Association'
+
+def test_industry_tags():
+    """Industry tags respect whole words and agree between the two paths"""
+    engine = ContributionClassifier().rule_engine
+    employers = ['IT Services LLC', 'Capital One', 'Mayo Clinic', 'Waiting Room Co',
+                 'Said Holdings', 'Open AI', 'University of Minnesota', 'Self-Employed', '', None]
+    employer_clean = preprocess_series(pd.Series(employers))
+
+    vectorized = engine.industry_series(employer_clean).astype(str).tolist()
+    row_wise = [engine.explain(employer or '', clean, '')['industry']
+                for employer, clean in zip(employers, employer_clean)]
+    assert row_wise == vectorized
+
+    industries = dict(zip(employers, vectorized))
+    assert industries['IT Services LLC'] == 'Technology'
+    assert industries['Capital One'] == 'Finance'
+    assert industries['Mayo Clinic'] == 'Healthcare'
+    assert industries['Waiting Room Co'] == 'Unknown'
+    assert industries['Said Holdings'] == 'Unknown'
+    assert industries['Open AI'] == 'Technology'
+    assert industries['University of Minnesota'] == 'Education'
+    assert industries[None] == 'Unknown'
+
+if __name__ == "__main__":
+    test_token_index_phrases()
+    test_row_and_vectorized_paths_agree()
+    test_industry_tags()
+    print('✅ Whole-word keyword matching is consistent')
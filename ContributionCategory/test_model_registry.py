@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test the versioned model registry and memory-mapped model loading
+"""
+
+import os
+import pickle
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from contribution_classifier import ContributionClassifier
+from model_registry import ModelRegistry, data_fingerprint
+from utils import SyntheticDataGenerator
+
+def test_data_fingerprint(training_frame):
+    """Same rows hash the same whatever the index; any changed value changes the hash"""
+    df = training_frame(rows=500)
+    fingerprint = data_fingerprint(df)
+    assert data_fingerprint(df.set_axis(df.index + 7)) == fingerprint
+    changed = df.copy()
+    changed.loc[3, 'current_category'] = 'Lawyer' if df.loc[3, 'current_category'] != 'Lawyer' else 'Others'
+    assert data_fingerprint(changed) != fingerprint
+    assert data_fingerprint(df, previous=fingerprint) != fingerprint
+
+def test_versions_and_metadata(training_frame, trained_classifier):
+    """Each registration is a new version carrying the data hash, categories and metrics"""
+    df = training_frame()
+    forest = trained_classifier(df)
+    incremental = trained_classifier(df, 'incremental')
+
+    with tempfile.TemporaryDirectory() as directory:
+        registry = ModelRegistry(os.path.join(directory, 'registry'))
+        assert registry.versions() == [] and registry.latest() is None
+        assert registry.register(forest) == 'v0001'
+        assert registry.register(incremental) == 'v0002'
+        assert registry.versions() == ['v0001', 'v0002'] and registry.latest() == 'v0002'
+        assert sorted(os.listdir(registry.root)) == ['v0001', 'v0002']
+
+        metadata = registry.metadata('v0001')
+        assert metadata['version'] == 'v0001' and metadata['model_type'] == 'forest'
+        assert metadata['data_hash'] == data_fingerprint(df) == incremental.training_data_hash
+        assert metadata['categories'] == sorted(forest.classifier.classes_)
+        assert metadata['metrics'] == forest.training_metrics
+        assert pd.Timestamp(metadata['trained_through']) == forest.trained_through
+        assert registry.metadata()['model_type'] == 'incremental'
+
+        try:
+            registry.load('v0009')
+            assert False, 'unknown versions are not loaded'
+        except FileNotFoundError:
+            pass
+
+def test_unchanged_models_and_retention(training_frame, trained_classifier):
+    """A model trained on the latest version's data is not registered again; old versions are pruned"""
+    df = training_frame(rows=2000)
+    incremental = trained_classifier(df, 'incremental')
+
+    with tempfile.TemporaryDirectory() as directory:
+        registry = ModelRegistry(directory, keep=2)
+        assert registry.register(incremental) == 'v0001'
+        assert incremental.update_ml_classifier(df) == 0
+        assert registry.register(incremental) == 'v0001'
+        assert registry.versions() == ['v0001']
+
+        for rows in (1500, 1000):
+            assert registry.register(trained_classifier(df.head(rows))) == registry.latest()
+        assert registry.versions() == ['v0002', 'v0003']
+        assert registry.prune(keep=1) == ['v0002'] and registry.versions() == ['v0003']
+
+def test_memory_mapped_loading(training_frame, trained_classifier):
+    """Memory-mapped versions predict exactly like the trained model and pickle by reference"""
+    df = training_frame()
+    records = ContributionClassifier().extract_features(SyntheticDataGenerator.generate(300, seed=7))
+
+    with tempfile.TemporaryDirectory() as directory:
+        registry = ModelRegistry(directory)
+        for mode, arrays in (('forest', False), ('forest', True), ('incremental', False)):
+            trained = trained_classifier(df, mode)
+            version = registry.register(trained)
+            expected = trained.enhanced_classify_many(records)
+
+            loaded = ContributionClassifier()
+            assert loaded.load_registered_model(registry=registry, arrays=arrays) == version
+            assert loaded.training_data_hash == trained.training_data_hash
+            # Array-loaded forests predict without scikit-learn
+            assert (type(loaded.classifier) is type(trained.classifier)) != arrays
+            if mode == 'forest' and not arrays:
+                # scikit-learn copies the trees; the TF-IDF weights stay mapped
+                assert isinstance(loaded.vectorizer.idf_, np.memmap)
+            else:
+                # Numeric arrays are mapped (object arrays such as class names are pickled)
+                mapped = [value for value in vars(loaded.classifier).values()
+                          if isinstance(value, np.ndarray) and value.dtype != object]
+                assert mapped and all(isinstance(value, np.memmap) for value in mapped), mode
+            pd.testing.assert_frame_equal(loaded.enhanced_classify_many(records), expected)
+
+            # Workers receive the version, not the arrays, and load it themselves
+            payload = pickle.dumps(loaded)
+            assert len(payload) < len(pickle.dumps(trained))
+            worker = pickle.loads(payload)
+            assert type(worker.classifier) is type(loaded.classifier)
+            pd.testing.assert_frame_equal(worker.enhanced_classify_many(records), expected)
+
+            # Read into memory the model is an ordinary copy that can be updated
+            in_memory = ContributionClassifier()
+            in_memory.load_model(registry.path(version))
+            assert in_memory.model_source is not None
+            in_memory.load_registered_model(version, registry, mmap_mode=None)
+            assert in_memory.model_source is None
+
+        in_memory.update_ml_classifier(training_frame(in_memory, 500, seed=3).assign(
+            contribution_date=in_memory.trained_through + pd.Timedelta(days=1)))
+        assert in_memory.training_data_hash != trained.training_data_hash
+
+if __name__ == "__main__":
+    import pytest
+
+    if pytest.main([__file__]) == 0:
+        print('✅ Registered models loaded, memory-mapped and shared across workers')
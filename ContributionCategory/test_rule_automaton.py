@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test that the keyword automaton finds what the per-keyword scan it replaced did
+"""
+
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contribution_classifier import ContributionClassifier
+from rule_engine import KeywordAutomaton
+from sql_parity import load_golden_corpus
+from utils import SyntheticDataGenerator
+
+def _legacy_mask(groups, text, keyword_in=lambda keyword, text: keyword in text):
+    """Group bitmask from testing every keyword of every group in turn"""
+    return sum(1 << bit for bit, keywords in enumerate(groups)
+               if any(keyword_in(keyword, text) for keyword in keywords))
+
+def test_automaton_matches_substring_scan():
+    """Overlapping keywords and keywords inside one another are all found"""
+    rng = random.Random(11)
+    for _ in range(200):
+        groups = [[''.join(rng.choice('AB ') for _ in range(rng.randint(1, 4)))
+                   for _ in range(rng.randint(1, 4))] for _ in range(rng.randint(1, 5))]
+        automaton = KeywordAutomaton()
+        for bit, keywords in enumerate(groups):
+            for keyword in keywords:
+                automaton.add(keyword, bit)
+        automaton.build()
+        for _ in range(20):
+            text = ''.join(rng.choice('AB ') for _ in range(rng.randint(0, 15)))
+            assert automaton.scan(text) == _legacy_mask(groups, text), (groups, text)
+
+def test_engine_scan_matches_legacy_scan():
+    """Every rule group of the engine matches exactly where one of its keywords does"""
+    classifier = ContributionClassifier()
+    engine = classifier.rule_engine
+    records = SyntheticDataGenerator.generate(3000)
+    golden = load_golden_corpus()
+    texts = set()
+    for column in ('contributor_employer', 'contributor_name'):
+        for value in list(records[column]) + list(golden[column]):
+            texts.add(classifier.preprocess_text(value))
+
+    for text in texts:
+        employer_mask, name_mask, _ = engine.scan(text, text, text)
+        assert employer_mask == name_mask == _legacy_mask(engine.group_keywords, text, engine.keyword_in), text
+
+if __name__ == "__main__":
+    test_automaton_matches_substring_scan()
+    test_engine_scan_matches_legacy_scan()
+    print('✅ Keyword automaton matched the per-keyword scan')
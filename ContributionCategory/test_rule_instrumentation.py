@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test rule explain traces and per-rule hit counts
+"""
+
+import os
+import sys
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contribution_classifier import ContributionClassifier
+from utils import SyntheticDataGenerator
+
+def test_explain_names_the_winning_rule():
+    """The trace marks the first matching rule as the decision and gives its reasons"""
+    classifier = ContributionClassifier()
+    rule_names = [rule.name for rule in classifier.rule_engine.rules]
+    records = SyntheticDataGenerator.generate(500, seed=21)
+
+    for employer, name in zip(records['contributor_employer'], records['contributor_name']):
+        explanation = classifier.explain(employer, name)
+        assert explanation['category'] == classifier.rule_based_classification(employer, name)
+
+        matched = [entry['rule'] for entry in explanation['trace'] if entry['matched']]
+        assert explanation['decided_by'] == (matched[0] if matched else None)
+        if explanation['decided_by'] is None:
+            assert explanation['category'] == 'Others'
+            continue
+
+        decided = rule_names.index(explanation['decided_by'])
+        entry = explanation['trace'][decided]
+        assert entry['category'] == explanation['category'] and entry['reasons']
+        assert [entry['evaluated'] for entry in explanation['trace']] == \
+            [position <= decided for position in range(len(rule_names))]
+
+    explanation = classifier.explain('Faegre Baker D', 'Jane Smith')
+    assert explanation['decided_by'] == 'legacy_lawyer'
+    assert "employer is firm 'FAEGRE BAKER DANIELS'" in explanation['trace'][
+        rule_names.index('legacy_lawyer')]['reasons']
+
+def test_rule_stats_count_hits():
+    """Each row counts as a hit of the rule that decided it, row-wise and vectorized"""
+    classifier = ContributionClassifier()
+    df = SyntheticDataGenerator.generate(2000, seed=22)
+    decided = Counter(classifier.explain(employer, name)['decided_by']
+                      for employer, name in zip(df['contributor_employer'], df['contributor_name']))
+
+    classifier.enable_instrumentation()
+    classifier.classify_frame(df)
+    vectorized = classifier.get_rule_stats()
+
+    classifier.enable_instrumentation()
+    for employer, name in zip(df['contributor_employer'], df['contributor_name']):
+        classifier.rule_based_classification(employer, name)
+    row_wise = classifier.get_rule_stats()
+
+    for stats in (vectorized, row_wise):
+        assert stats['rows'] == len(df)
+        assert stats['unmatched_rows'] == decided[None]
+        assert {entry['rule']: entry['matched'] for entry in stats['rules']} == \
+            {rule.name: decided[rule.name] for rule in classifier.rule_engine.rules}
+
+    classifier.enable_instrumentation(False)
+    assert classifier.get_rule_stats() is None
+
+if __name__ == "__main__":
+    test_explain_names_the_winning_rule()
+    test_rule_stats_count_hits()
+    print('✅ Explain traces and rule hit counts matched the classification')
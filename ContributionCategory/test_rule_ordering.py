@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test that profile-driven rule ordering never changes a classification
+"""
+
+import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contribution_classifier import ContributionClassifier
+from rule_engine import BUSINESS_ENTITIES
+from sql_parity import load_golden_corpus
+from utils import SyntheticDataGenerator
+
+def _corpora():
+    """Golden corpus plus uniform and skewed synthetic workloads"""
+    return {
+        'golden': load_golden_corpus(),
+        'uniform': SyntheticDataGenerator.generate(20000, seed=7),
+        'business-entities': SyntheticDataGenerator.generate(
+            20000, seed=8, dominant_keywords=BUSINESS_ENTITIES, dominant_share=0.7),
+        'retired': SyntheticDataGenerator.generate(
+            20000, seed=9, dominant_keywords=['Retired', 'Not Employed'], dominant_share=0.7),
+    }
+
+def test_profiled_ordering_matches_priority_order():
+    """Profiles collected on each workload give identical categories on every workload"""
+    classifier = ContributionClassifier()
+    corpora = _corpora()
+
+    expected = {name: classifier.classify_frame(df).astype(str) for name, df in corpora.items()}
+
+    for profile_name, profile_df in corpora.items():
+        classifier.enable_instrumentation()
+        classifier.classify_frame(profile_df)
+        profile = classifier.get_rule_stats()
+        classifier.enable_instrumentation(False)
+
+        for min_share in (0.0, 0.2):
+            speculative = classifier.rule_engine.apply_profile(profile, min_share=min_share)
+            for name, df in corpora.items():
+                actual = classifier.classify_frame(df).astype(str)
+                mismatches = int((actual != expected[name]).sum())
+                print(f'profile={profile_name:<18} min_share={min_share} corpus={name:<18} '
+                      f'speculative={len(speculative):>2} mismatches={mismatches}')
+                assert mismatches == 0
+
+    classifier.apply_rule_profile(None)
+
+def test_any_speculative_order_matches_priority_order():
+    """Evaluating any subset of rules speculatively, in any order, preserves priorities"""
+    classifier = ContributionClassifier()
+    engine = classifier.rule_engine
+    corpora = _corpora()
+    expected = {name: classifier.classify_frame(df).astype(str) for name, df in corpora.items()}
+    expected_masks = {name: classifier.classify_frame_multilabel(df)['category_mask'] for name, df in corpora.items()}
+
+    rng = random.Random(42)
+    for trial in range(10):
+        rule_indices = list(range(len(engine.rules)))
+        rng.shuffle(rule_indices)
+        engine.speculative_rules = rule_indices[:rng.randint(1, len(rule_indices))]
+
+        for name, df in corpora.items():
+            actual = classifier.classify_frame(df).astype(str)
+            assert int((actual != expected[name]).sum()) == 0, (trial, name, engine.speculative_rules)
+            # The multi-label pass gives the same labels and masks in any order
+            multilabel = classifier.classify_frame_multilabel(df)
+            assert (multilabel['category'].astype(str) == expected[name]).all(), (trial, name)
+            assert (multilabel['category_mask'] == expected_masks[name]).all(), (trial, name)
+
+    engine.apply_profile(None)
+
+def test_multilabel_instrumentation():
+    """The multi-label pass counts what classify_frame counts, so its profile is usable"""
+    classifier = ContributionClassifier()
+    df = SyntheticDataGenerator.generate(20000, seed=8, dominant_keywords=BUSINESS_ENTITIES, dominant_share=0.7)
+
+    classifier.enable_instrumentation()
+    classifier.classify_frame(df)
+    single = classifier.get_rule_stats()
+    classifier.enable_instrumentation()
+    classifier.classify_frame_multilabel(df)
+    multilabel = classifier.get_rule_stats()
+    classifier.enable_instrumentation(False)
+
+    assert multilabel['rows'] == single['rows'] == len(df)
+    assert multilabel['unmatched_rows'] == single['unmatched_rows']
+    assert {entry['rule']: entry['matched'] for entry in multilabel['rules']} == \
+        {entry['rule']: entry['matched'] for entry in single['rules']}
+    assert classifier.rule_engine.apply_profile(multilabel)
+
+if __name__ == "__main__":
+    test_profiled_ordering_matches_priority_order()
+    test_any_speculative_order_matches_priority_order()
+    test_multilabel_instrumentation()
+    print('✅ Profile-driven ordering produced identical classifications')
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test that TF-IDF features stay sparse from training through prediction
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+
+from contribution_classifier import ContributionClassifier
+from utils import SyntheticDataGenerator
+
+def test_combine_features_matches_dense_hstack():
+    """Numerical columns are appended as sparse columns with the same values"""
+    X_text = sparse.random(50, 40, density=0.05, format='csr', random_state=1)
+    numerical = np.random.default_rng(1).random((50, 3))
+
+    combined = ContributionClassifier.combine_features(X_text, numerical)
+    assert sparse.isspmatrix_csr(combined)
+    assert combined.shape == (50, 43)
+    np.testing.assert_array_equal(combined.toarray(), np.hstack([X_text.toarray(), numerical]))
+
+def test_forest_sees_sparse_matrices(monkeypatch, training_frame, trained_classifier):
+    """fit and predict_proba receive CSR matrices, never dense arrays"""
+    seen = []
+    fit, predict_proba = RandomForestClassifier.fit, RandomForestClassifier.predict_proba
+
+    def spy_fit(self, X, *args, **kwargs):
+        seen.append(('fit', type(X)))
+        return fit(self, X, *args, **kwargs)
+
+    def spy_predict_proba(self, X):
+        seen.append(('predict_proba', type(X)))
+        return predict_proba(self, X)
+
+    monkeypatch.setattr(RandomForestClassifier, 'fit', spy_fit)
+    monkeypatch.setattr(RandomForestClassifier, 'predict_proba', spy_predict_proba)
+
+    classifier = trained_classifier()
+    records = SyntheticDataGenerator.generate(300, seed=9)
+    classifier.predict_ml_frame(classifier.extract_features(records))
+    classifier.enhanced_classify('Faegre Baker Daniels', 'Jane Smith', 250)
+
+    assert {call for call, _ in seen} == {'fit', 'predict_proba'}
+    assert all(issubclass(kind, sparse.csr_matrix) for _, kind in seen), seen
+
+if __name__ == "__main__":
+    import pytest
+
+    if pytest.main([__file__]) == 0:
+        print('✅ Features stayed sparse through training and prediction')
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the generated classification UDF in DuckDB against the Python rules
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from contribution_classifier import ContributionClassifier
+from sql_compiler import compile_classification_udf
+from sql_parity import connect_duckdb, parse_functions, run_sql_classification
+
+# Employer, name and the category both engines must give
+CASES = [
+    ('Faegre Baker Daniels', 'Jane Smith', 'Lawyer'),
+    ('Faegre Baker D', 'Jane Smith', 'Lawyer'),
+    ('Mortensori Construction', 'Al Jones', 'Developer'),
+    ('Hillcrest Develop', 'Ann Bo', 'Developer'),
+    ('Blue Fox', 'Jane Smith', 'Others'),
+    ('Winthrop & Weinstine', 'Pat Lee', 'Lawyer'),
+    ('RETIRED / RETIRED', 'Sam Roe', 'Individual'),
+    ('Attorney at Law', 'Kim Ng', 'Lawyer'),
+    ('Capacity Partners', 'Kim Ng', 'BusinessOwner'),
+    ('Pohlad Family Foundation', 'Jim Pohlad', 'BusinessOwner'),
+    ('Not employed', 'Sara Pohlad', 'BusinessOwner'),
+    ('State of MN', 'Gov Worker', 'Individual'),
+    ('Real Estate Developer', 'Jane Smith', 'Developer'),
+    ('Edina Realty', 'Jane Smith', 'BusinessOwner'),
+    ('Acme, Inc.', 'Jane Smith', 'BusinessOwner'),
+    ("O'Brien & Sons (A+B) Co.", 'Jo Ma', 'Others'),
+    ('None.', 'Jane Smith', 'Others'),
+    ('None', 'Jane Smith', 'Individual'),
+    (None, 'Jane Smith', 'Individual'),
+    ('', None, 'Individual'),
+    (None, None, 'Individual'),
+]
+
+def test_udf_matches_python_rules():
+    """The compiled UDF gives every case the category of the Python engine"""
+    classifier = ContributionClassifier()
+    corpus = pd.DataFrame(CASES, columns=['contributor_employer', 'contributor_name', 'expected_category'])
+
+    sql = compile_classification_udf(classifier.rule_engine, 'test.classify_contribution')
+    functions = parse_functions(sql, 'sql_compiler')
+    assert len(functions) == 1
+
+    connection = connect_duckdb()
+    connection.register('corpus', corpus.assign(row_id=range(len(corpus))))
+    sql_categories, _ = run_sql_classification(connection, functions[0])
+    python_categories = classifier.classify_frame(corpus).astype(str)
+
+    assert list(python_categories) == list(corpus['expected_category'])
+    assert list(sql_categories) == list(corpus['expected_category'])
+
+if __name__ == "__main__":
+    test_udf_matches_python_rules()
+    print('✅ Generated UDF matched the Python rules in DuckDB')
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test chunked classification of contribution files against a single pass
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from contribution_classifier import ContributionClassifier
+from streaming import read_chunks, run_streaming_classification
+from utils import SyntheticDataGenerator
+
+def _mixed_amount_csv(file_path, rows=3000, whole_rows=1000):
+    """Contributions whose first whole_rows amounts are written without cents"""
+    df = SyntheticDataGenerator.generate(rows)
+    amounts = df['contribution_amount'].round().astype(int).astype(object)
+    amounts.iloc[whole_rows:] = amounts.iloc[whole_rows:] + 0.5
+    df['contribution_amount'] = amounts
+    df.to_csv(file_path, index=False)
+    return df
+
+def test_csv_amounts_read_as_floats():
+    """A chunk of whole-dollar amounts has the same dtype as the chunks with cents"""
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'contributions.csv')
+        _mixed_amount_csv(csv_path)
+        chunks = list(read_chunks(csv_path, 1000))
+        assert len(chunks) == 3
+        assert all(chunk['contribution_amount'].dtype == 'float64' for chunk in chunks)
+        assert chunks[-1]['contribution_amount'].iloc[0] % 1 == 0.5
+
+def test_chunked_output_matches_single_pass():
+    """CSV -> Parquet in chunks writes exactly what one chunk would"""
+    classifier = ContributionClassifier()
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'contributions.csv')
+        df = _mixed_amount_csv(csv_path)
+        chunked_path = os.path.join(directory, 'chunked.parquet')
+        single_path = os.path.join(directory, 'single.parquet')
+
+        assert run_streaming_classification(classifier, csv_path, chunked_path, chunk_size=1000) == len(df)
+        assert run_streaming_classification(classifier, csv_path, single_path, chunk_size=len(df)) == len(df)
+
+        pd.testing.assert_frame_equal(pd.read_parquet(chunked_path), pd.read_parquet(single_path))
+
+if __name__ == "__main__":
+    test_csv_amounts_read_as_floats()
+    test_chunked_output_matches_single_pass()
+    print('✅ Chunked classification matched a single pass')
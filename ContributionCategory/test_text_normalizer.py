@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test that the vectorized normalization engine matches per-value normalization
+"""
+
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from text_normalizer import CLEANER, PREPROCESSOR, STRING_DTYPE, TextNormalizer
+
+VALUES = ['Acme, Inc.', '  law  office!! ', 'Smith & Jones LLP', 'Co-op', 'N/A', 'dept. of ed',
+          'Café Ñandú', 'Müller & Söhne GmbH', 'straße', 'tab\tand\nnewline', 'x\x1c', '', 12, None, np.nan]
+
+def test_known_values():
+    """Punctuation collapses to spaces; clean_text also expands abbreviations"""
+    assert PREPROCESSOR.normalize('Acme, Inc.') == 'ACME INC.'
+    assert PREPROCESSOR.normalize('  law  office!! ') == 'LAW OFFICE '
+    assert PREPROCESSOR.normalize('straße') == 'STRASSE'
+    assert PREPROCESSOR.normalize(None) == ''
+    assert CLEANER.normalize('Acme, Inc.') == 'ACME INCORPORATED.'
+    assert CLEANER.normalize('Smith & Jones LLP') == 'SMITH & JONES LIMITED LIABILITY PARTNERSHIP'
+    assert CLEANER.normalize('Co-op') == 'COMPANY-OP'
+    assert CLEANER.normalize('  law  office!! ') == 'LAW OFFICE'
+
+def test_series_matches_scalar():
+    """normalize_series agrees with normalize for object and string columns"""
+    rng = random.Random(5)
+    alphabet = list("abXY09_ &-.,!/\t\x0b\x1c\x85\xa0éßÑ'") + ['co ', 'inc', 'llc', 'univ']
+    values = VALUES + [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 8))) for _ in range(2000)]
+    strings = [value for value in values if isinstance(value, str)] + [None]
+
+    for normalizer in (PREPROCESSOR, CLEANER, TextNormalizer()):
+        expected = [normalizer.normalize(value) for value in values]
+        assert normalizer.normalize_series(pd.Series(values, dtype=object)).tolist() == expected
+        expected = [normalizer.normalize(value) for value in strings]
+        for dtype in (STRING_DTYPE, 'string'):
+            index = range(10, 10 + len(strings))
+            normalized = normalizer.normalize_series(pd.Series(strings, dtype=dtype, index=index))
+            assert normalized.tolist() == expected
+            assert list(normalized.index) == list(index)
+
+if __name__ == "__main__":
+    test_known_values()
+    test_series_matches_scalar()
+    print('✅ Vectorized normalization matches per-value normalization')
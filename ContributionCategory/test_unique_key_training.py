@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test training on unique contributor keys weighted by transactions or amounts
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from contribution_classifier import ContributionClassifier
+
+def test_aggregate_training_rows(training_frame):
+    """Every transaction lands in exactly one key, counts and amounts add up"""
+    classifier = ContributionClassifier()
+    df = training_frame(classifier, 5000)
+    # Same contributor spelled differently collapses to one key
+    df.loc[1, ['contributor_employer', 'contributor_name']] = [df.loc[0, 'contributor_employer'].lower() + '  ',
+                                                               df.loc[0, 'contributor_name'].upper()]
+    df.loc[1, 'current_category'] = df.loc[0, 'current_category']
+    df = df.drop(columns=['employer_clean', 'name_clean'])
+
+    by_count = classifier.aggregate_training_rows(df, weight='count')
+    assert len(by_count) < len(df) / 2
+    assert by_count['sample_weight'].sum() == len(df)
+    assert by_count.groupby('current_category')['sample_weight'].sum().to_dict() == \
+        df['current_category'].value_counts().to_dict()
+    assert by_count['contribution_date'].max() == df['contribution_date'].max()
+    assert np.isclose((by_count['log_amount'] * by_count['sample_weight']).sum(), df['log_amount'].sum())
+
+    by_amount = classifier.aggregate_training_rows(df, weight='amount')
+    assert np.isclose(by_amount['sample_weight'].sum(), df['contribution_amount'].clip(lower=0).sum())
+
+def test_unique_key_training_matches_rows(training_frame):
+    """Both modes score about the same on the same held-out transactions"""
+    df = training_frame(rows=20000)
+    for mode in ('forest', 'incremental'):
+        rows = ContributionClassifier()
+        rows.train_ml_classifier(df, mode=mode, unique_keys=False)
+        keys = ContributionClassifier()
+        keys.train_ml_classifier(df, mode=mode, unique_keys=True)
+
+        assert keys.training_metrics['test_rows'] == rows.training_metrics['test_rows']
+        assert keys.training_metrics['train_keys'] < rows.training_metrics['train_keys'] / 2
+        assert keys.training_metrics['accuracy'] > rows.training_metrics['accuracy'] - 0.02, mode
+
+if __name__ == "__main__":
+    import pytest
+
+    if pytest.main([__file__]) == 0:
+        print('✅ Unique contributor keys trained as well as every transaction')
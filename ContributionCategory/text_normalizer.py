@@ -0,0 +1,165 @@
+"""
+Text normalization engine for Enhanced Contribution Classification System
+
+Normalizes whole columns at once instead of calling a function per cell:
+every distinct value is cleaned a single time with precompiled
+substitutions, ASCII values go through Arrow string kernels when pyarrow is
+installed, and scalar lookups (row-wise classification) are memoized.
+"""
+
+import logging
+import re
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+logger = logging.getLogger(__name__)
+
+# Runs of anything but word characters, '&', '-' and '.' become one space.
+# Same result as replacing [^\w\s&\-\.] with a space and then collapsing \s+
+SEPARATOR_PATTERN = r'[^\w&\-.]+'
+
+# Common abbreviations expanded by TextProcessor.clean_text, in order
+ABBREVIATIONS = {
+    'CORP': 'CORPORATION',
+    'INC': 'INCORPORATED',
+    'LLC': 'LIMITED LIABILITY COMPANY',
+    'LLP': 'LIMITED LIABILITY PARTNERSHIP',
+    'CO': 'COMPANY',
+    'ASSOC': 'ASSOCIATION',
+    'DEPT': 'DEPARTMENT',
+    'UNIV': 'UNIVERSITY'
+}
+
+# Distinct values memoized by TextNormalizer.normalize before it starts over
+NORMALIZE_CACHE_SIZE = 100000
+
+# dtype pandas gives a column of strings ('str' on pandas 3, object before)
+STRING_DTYPE = pd.Series([''], dtype=str).dtype
+
+
+class TextNormalizer:
+    """Precompiled text normalization for scalars, pandas Series and Arrow arrays"""
+
+    def __init__(self, abbreviations: Optional[Dict[str, str]] = None, strip: bool = False):
+        """
+        Compile the substitutions
+
+        Args:
+            abbreviations: Whole-word abbreviations to expand, applied in order
+            strip: Strip leading/trailing spaces left by the substitutions
+        """
+        self.abbreviations = dict(abbreviations or {})
+        self.strip = strip
+
+        self._separators = re.compile(SEPARATOR_PATTERN)
+        self._expansions = [(re.compile(rf'\b{re.escape(abbreviation)}\b'), full)
+                            for abbreviation, full in self.abbreviations.items()]
+        self._arrow_expansions = [(rf'\b{re.escape(abbreviation)}\b', full)
+                                  for abbreviation, full in self.abbreviations.items()]
+        self._memo: Dict[str, str] = {}
+
+    def _normalize(self, text: str) -> str:
+        """Normalize one string with the compiled regexes"""
+        text = self._separators.sub(' ', text.upper().strip())
+        for pattern, full in self._expansions:
+            text = pattern.sub(full, text)
+        return text.strip() if self.strip else text
+
+    def normalize(self, text) -> str:
+        """
+        Normalize one value
+
+        Args:
+            text: Input value (missing values allowed)
+
+        Returns:
+            Upper-case text with special characters and whitespace runs
+            collapsed to single spaces (empty string for missing values)
+        """
+        if not isinstance(text, str):
+            if text is None or pd.isna(text):
+                return ""
+            text = str(text)
+
+        normalized = self._memo.get(text)
+        if normalized is None:
+            normalized = self._normalize(text)
+            if len(self._memo) >= NORMALIZE_CACHE_SIZE:
+                self._memo.clear()
+            self._memo[text] = normalized
+        return normalized
+
+    def normalize_arrow(self, values: 'pa.Array') -> 'pa.Array':
+        """
+        Normalize an Arrow string array
+
+        Arrow's regex kernels only treat ASCII characters as word characters
+        and do not apply full Unicode case mapping ('ß' -> 'SS'), so values
+        with other characters are normalized by the Python regexes instead.
+
+        Args:
+            values: Arrow string array (nulls allowed)
+
+        Returns:
+            Arrow string array of normalized values, nulls replaced by ''
+        """
+        text = pc.utf8_trim_whitespace(pc.utf8_upper(values))
+        text = pc.replace_substring_regex(text, SEPARATOR_PATTERN, ' ')
+        for pattern, full in self._arrow_expansions:
+            text = pc.replace_substring_regex(text, pattern, full)
+        if self.strip:
+            text = pc.utf8_trim(text, ' ')
+
+        non_ascii = pc.invert(pc.fill_null(pc.string_is_ascii(values), True))
+        if pc.any(non_ascii).as_py():
+            replacements = pa.array([self.normalize(value) for value in pc.filter(values, non_ascii).to_pylist()],
+                                    type=pa.string())
+            text = pc.replace_with_mask(text, non_ascii, replacements)
+        return pc.fill_null(text, '')
+
+    def normalize_series(self, values: pd.Series) -> pd.Series:
+        """
+        Normalize a whole column, each distinct value once
+
+        Args:
+            values: Series of raw text values
+
+        Returns:
+            Series of normalized text aligned with values (empty string for
+            missing values)
+        """
+        codes, uniques = pd.factorize(values)
+        # Missing values (code -1) map to the '' appended after the uniques
+        codes = np.where(codes < 0, len(uniques), codes)
+
+        if pa is None:
+            normalized = np.array([self.normalize(value) for value in uniques] + [''], dtype=object)
+            return pd.Series(normalized[codes], index=values.index, dtype=STRING_DTYPE)
+
+        try:
+            uniques = pa.array(uniques, type=pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            uniques = pa.array([value if isinstance(value, str) else str(value) for value in uniques],
+                               type=pa.string())
+        normalized = pa.concat_arrays([self.normalize_arrow(uniques), pa.array([''], type=pa.string())])
+        result = normalized.take(pa.array(codes))
+
+        if isinstance(STRING_DTYPE, pd.StringDtype) and STRING_DTYPE.storage == 'pyarrow':
+            return pd.Series(pd.array(result, dtype=STRING_DTYPE), index=values.index)
+        return pd.Series(result.to_numpy(zero_copy_only=False), index=values.index, dtype=STRING_DTYPE)
+
+
+# Normalization of ContributionClassifier.preprocess_text, shared by feature
+# extraction and every classification path
+PREPROCESSOR = TextNormalizer()
+
+# Normalization of TextProcessor.clean_text (abbreviations expanded)
+CLEANER = TextNormalizer(ABBREVIATIONS, strip=True)
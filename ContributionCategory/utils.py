@@ -2,14 +2,17 @@
 Utility functions for Enhanced Contribution Classification System
 """
 
-import re
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
 import logging
-from collections import Counter
+import os
+import sys
+from collections import Counter, OrderedDict
 import json
 
+from text_normalizer import CLEANER
+
 logger = logging.getLogger(__name__)
 
 class TextProcessor:
@@ -26,32 +29,9 @@ class TextProcessor:
         Returns:
             Cleaned text string
         """
-        if pd.isna(text) or text is None:
-            return ""
-        
-        # Convert to string and uppercase
-        text = str(text).upper().strip()
-        
-        # Remove extra whitespace and special characters
-        text = re.sub(r'[^\w\s&\-\.]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Handle common abbreviations
-        abbreviations = {
-            'CORP': 'CORPORATION',
-            'INC': 'INCORPORATED', 
-            'LLC': 'LIMITED LIABILITY COMPANY',
-            'LLP': 'LIMITED LIABILITY PARTNERSHIP',
-            'CO': 'COMPANY',
-            'ASSOC': 'ASSOCIATION',
-            'DEPT': 'DEPARTMENT',
-            'UNIV': 'UNIVERSITY'
-        }
-        
-        for abbr, full in abbreviations.items():
-            text = re.sub(rf'\b{abbr}\b', full, text)
-        
-        return text.strip()
+        # Same normalization as preprocess_text, plus common abbreviations
+        # ('CORP', 'INC', 'LLC', ...) expanded to whole words
+        return CLEANER.normalize(text)
     
     @staticmethod
     def extract_name_parts(full_name: str) -> Dict[str, str]:
@@ -114,6 +94,314 @@ class TextProcessor:
         word_counts = Counter(all_words)
         return {word: count for word, count in word_counts.items() if count >= min_count}
 
+class KeyDeduplicator:
+    """Run expensive per-row work once per unique key and broadcast it back"""
+    
+    @staticmethod
+    def factorize(df: pd.DataFrame, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Factorize rows on a composite key
+        
+        Args:
+            df: Input DataFrame
+            columns: Columns forming the key (missing values form their own key)
+            
+        Returns:
+            Tuple of (per-row integer codes, position of the first row for each code)
+        """
+        codes = np.zeros(len(df), dtype=np.int64)
+        for column in columns:
+            column_codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+            codes = codes * max(len(uniques), 1) + column_codes
+            # Re-densify so the combined code never overflows
+            codes, _ = pd.factorize(codes)
+        
+        _, first_positions = np.unique(codes, return_index=True)
+        return codes, first_positions
+    
+    @staticmethod
+    def apply(df: pd.DataFrame, columns: List[str], func, label: str = 'Deduplicated',
+              pass_counts: bool = False) -> Any:
+        """
+        Apply func to the unique rows of df and fan the result back out
+        
+        Args:
+            df: Input DataFrame
+            columns: Columns forming the deduplication key
+            func: Callable taking the DataFrame of unique rows and returning a
+                Series, DataFrame or array with one entry per unique row
+            label: Label used when logging the dedup ratio
+            pass_counts: Also pass func the number of rows sharing each unique key
+            
+        Returns:
+            Result of func broadcast back to the rows (and index) of df
+        """
+        codes, first_positions = KeyDeduplicator.factorize(df, columns)
+        ratio = len(df) / len(first_positions) if len(first_positions) else 1.0
+        logger.info(f"{label}: {len(df):,} rows -> {len(first_positions):,} unique keys "
+                    f"(dedup ratio {ratio:.1f}x)")
+        
+        if pass_counts:
+            result = func(df.iloc[first_positions], np.bincount(codes, minlength=len(first_positions)))
+        else:
+            result = func(df.iloc[first_positions])
+        if isinstance(result, (pd.Series, pd.DataFrame)):
+            result = result.iloc[codes]
+            result.index = df.index
+            return result
+        return np.asarray(result)[codes]
+
+class ClassificationCache:
+    """Size-bounded LRU cache for per-record classification results"""
+    
+    def __init__(self, max_size: int = 10000):
+        """
+        Initialize the cache
+        
+        Args:
+            max_size: Maximum number of entries before least recently used
+                entries are evicted
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._entry_bytes: Dict[Tuple, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+    
+    @staticmethod
+    def _sizeof(key: Tuple, value: Dict) -> int:
+        """Approximate memory footprint of one entry"""
+        size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+        size += sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value.values())
+        return size
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """
+        Look up a cached result
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Copy of the cached result, or None on a miss
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(value)
+    
+    def put(self, key: Tuple, value: Dict) -> None:
+        """
+        Store a result, evicting the least recently used entries if full
+        
+        Args:
+            key: Cache key
+            value: Result dictionary
+        """
+        if self.max_size <= 0:
+            return
+        
+        if key in self._entries:
+            self.bytes -= self._entry_bytes.pop(key)
+            del self._entries[key]
+        
+        self._entries[key] = dict(value)
+        self._entry_bytes[key] = self._sizeof(key, value)
+        self.bytes += self._entry_bytes[key]
+        
+        while len(self._entries) > self.max_size:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self.bytes -= self._entry_bytes.pop(evicted_key)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        self._entries.clear()
+        self._entry_bytes.clear()
+        self.bytes = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dictionary with hits, misses, evictions, size, bytes and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'bytes': self.bytes,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+    
+    def save(self, file_path: str, model: Optional[str] = None) -> None:
+        """
+        Persist cache entries to disk (least recently used first)
+        
+        Args:
+            file_path: Path of the JSON cache file
+            model: Fingerprint of the model that produced the entries
+        """
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        entries = [[list(key), value] for key, value in self._entries.items()]
+        with open(file_path, 'w') as f:
+            json.dump({'model': model, 'entries': entries}, f, default=str)
+        logger.info(f"Saved {len(entries):,} cache entries to {file_path}")
+    
+    def load(self, file_path: str, model: Optional[str] = None) -> int:
+        """
+        Warm the cache from a file written by save
+        
+        Entries saved with a different model are not loaded.
+        
+        Args:
+            file_path: Path of the JSON cache file
+            model: Fingerprint of the current model (None for rules only)
+            
+        Returns:
+            Number of entries loaded
+        """
+        if not os.path.exists(file_path):
+            logger.info(f"No cache file found at {file_path}")
+            return 0
+        
+        with open(file_path, 'r') as f:
+            saved = json.load(f)
+        # Files written before the model was recorded hold a bare entry list
+        if isinstance(saved, list):
+            saved = {'model': None, 'entries': saved}
+        if saved.get('model') != model:
+            logger.warning(f"Cache file {file_path} was saved with a different model; not warming the cache")
+            return 0
+        
+        entries = saved['entries']
+        for key, value in entries:
+            self.put(tuple(key), value)
+        logger.info(f"Warmed cache with {len(entries):,} entries from {file_path}")
+        return len(entries)
+
+class SyntheticDataGenerator:
+    """Generate synthetic contribution records for benchmarks and offline runs"""
+    
+    FIRST_NAMES = [
+        'John', 'Mary', 'James', 'Patricia', 'Robert', 'Jennifer', 'Michael',
+        'Linda', 'David', 'Elizabeth', 'Ahmed', 'Fatima', 'Jose', 'Maria', 'Wei', 'Mai'
+    ]
+    LAST_NAMES = [
+        'Smith', 'Johnson', 'Anderson', 'Nelson', 'Olson', 'Peterson', 'Hansen',
+        'Larson', 'Nguyen', 'Garcia', 'Hassan', 'Vang', 'Pohlad', 'Kim', 'Lee'
+    ]
+    ORGANIZATION_NAMES = [
+        'Minneapolis Regional Labor Federation PAC', 'SEIU Local 26', 'Friends of the Parks Committee',
+        'Minnesota Realtors PAC', 'Building Trades Council', 'Take Action Minnesota Fund'
+    ]
+    FILLER_EMPLOYERS = [
+        'Acme', 'North Star', 'Lakes', 'Twin Cities', 'Hennepin', 'Mill City', 'Riverside',
+        'Stone Arch', 'Loring', 'Uptown', 'Nicollet', 'Prairie', 'Summit', 'Bluff'
+    ]
+    
+    @staticmethod
+    def generate(n_rows: int, n_contributors: int = None, seed: int = 42,
+                 dominant_keywords: Optional[List[str]] = None, dominant_share: float = 0.0,
+                 start_date: str = '2017-01-01', end_date: str = '2021-12-30') -> pd.DataFrame:
+        """
+        Generate a synthetic contribution DataFrame shaped like the BigQuery view
+        
+        Args:
+            n_rows: Number of contribution records
+            n_contributors: Number of distinct (employer, name) contributors,
+                defaults to roughly one per ten records
+            seed: Random seed
+            dominant_keywords: Employer keywords used for a skewed workload
+            dominant_share: Share of contributors whose employer contains one
+                of dominant_keywords
+            start_date: First contribution_date
+            end_date: Last contribution_date
+            
+        Returns:
+            DataFrame with the columns returned by ContributionClassifier.load_data
+        """
+        from config import Config
+        
+        rng = np.random.default_rng(seed)
+        n_contributors = n_contributors or max(1, n_rows // 10)
+        
+        # Employer vocabulary drawn from the configured rules plus neutral filler
+        keywords = [k for keywords in Config.ENHANCED_PATTERNS.values() for k in keywords]
+        keywords += list(Config.EMPLOYER_MAPPINGS) + ['', 'Retired', 'Self', 'Not Employed']
+        fillers = SyntheticDataGenerator.FILLER_EMPLOYERS
+        
+        employers = []
+        names = []
+        for i in range(n_contributors):
+            roll = rng.random()
+            if dominant_keywords and rng.random() < dominant_share:
+                employer = (f"{fillers[rng.integers(len(fillers))]} "
+                            f"{dominant_keywords[rng.integers(len(dominant_keywords))].title()}")
+            elif roll < 0.5:
+                employer = f"{fillers[rng.integers(len(fillers))]} {keywords[rng.integers(len(keywords))].title()}"
+            elif roll < 0.8:
+                employer = f"{fillers[rng.integers(len(fillers))]} {fillers[rng.integers(len(fillers))]}"
+            else:
+                employer = keywords[rng.integers(len(keywords))].title()
+            employers.append(employer.strip())
+            
+            if rng.random() < 0.05:
+                names.append(SyntheticDataGenerator.ORGANIZATION_NAMES[
+                    rng.integers(len(SyntheticDataGenerator.ORGANIZATION_NAMES))])
+            else:
+                first = SyntheticDataGenerator.FIRST_NAMES[rng.integers(len(SyntheticDataGenerator.FIRST_NAMES))]
+                last = SyntheticDataGenerator.LAST_NAMES[rng.integers(len(SyntheticDataGenerator.LAST_NAMES))]
+                names.append(f"{first} {last} {i}")
+        
+        # Zipf-like repetition: a few contributors give many times
+        weights = 1.0 / np.arange(1, n_contributors + 1) ** 0.8
+        contributor_ids = rng.choice(n_contributors, size=n_rows, p=weights / weights.sum())
+        
+        employer_values = np.array(employers, dtype=object)[contributor_ids]
+        name_values = np.array(names, dtype=object)[contributor_ids]
+        name_parts = [str(name).split(' ', 1) for name in name_values]
+        
+        # Most contributions are round amounts; the rest are arbitrary
+        common_amounts = np.array([25, 50, 100, 250, 500, 1000], dtype=float)
+        amounts = np.where(
+            rng.random(n_rows) < 0.8,
+            common_amounts[rng.integers(len(common_amounts), size=n_rows)],
+            np.round(rng.lognormal(mean=4.5, sigma=1.2, size=n_rows), 2)
+        )
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        dates = start + pd.to_timedelta(rng.integers(0, (end - start).days + 1, size=n_rows), unit='D')
+        
+        categories = list(Config.CATEGORIES)
+        source_types = rng.choice(['Candidate', 'Committee', 'Independent'], size=n_rows)
+        candidate_categories = rng.choice(['Mayor', 'Council', 'Park Board'], size=n_rows)
+        current_categories = rng.choice(categories, size=n_rows)
+        
+        return pd.DataFrame({
+            'contributor_name': name_values,
+            'contributor_employer': employer_values,
+            'contributor_first_name': [parts[0] for parts in name_parts],
+            'contributor_last_name': [parts[1] if len(parts) > 1 else '' for parts in name_parts],
+            'contribution_amount': amounts,
+            'contribution_date': dates,
+            'source_type': source_types,
+            'candidate_category': candidate_categories,
+            'current_category': current_categories
+        })
+
 class DataValidator:
     """Data validation utilities"""
     
@@ -221,6 +509,105 @@ class DataValidator:
         
         return report
 
+class FrameOptimizer:
+    """Memory-efficient dtypes for contribution DataFrames"""
+    
+    # Amount columns that may be stored as float32
+    AMOUNT_COLUMNS = ['contribution_amount']
+    
+    @staticmethod
+    def arrow_string_dtype():
+        """
+        Arrow-backed string dtype with NaN for missing values
+        
+        Returns:
+            The dtype ('str' on pandas 3), or None without pyarrow
+        """
+        # pandas >= 2.3 spells NaN semantics na_value=np.nan; 2.1/2.2 call it 'pyarrow_numpy'
+        for args, kwargs in ((('pyarrow',), {'na_value': np.nan}), (('pyarrow_numpy',), {})):
+            try:
+                return pd.StringDtype(*args, **kwargs)
+            except (ImportError, TypeError, ValueError):
+                continue
+        return None
+    
+    @staticmethod
+    def is_cent_exact(amounts: pd.Series) -> bool:
+        """Whether every amount survives a float32 round trip to the cent"""
+        values = amounts.to_numpy(dtype=np.float64, na_value=np.nan)
+        narrowed = values.astype(np.float32).astype(np.float64)
+        return bool(np.array_equal(np.round(values, 2), np.round(narrowed, 2), equal_nan=True) and
+                    np.array_equal(values, np.round(values, 2), equal_nan=True))
+    
+    @staticmethod
+    def optimize(df: pd.DataFrame, categorical_columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Convert columns to memory-efficient dtypes
+        
+        Low-cardinality label columns become categoricals, other text
+        columns Arrow-backed strings, and amounts float32 when no cent is lost.
+        
+        Args:
+            df: Input DataFrame (modified in place)
+            categorical_columns: Columns to make categorical, defaults to Config.CATEGORICAL_COLUMNS
+            
+        Returns:
+            The DataFrame with converted columns
+        """
+        from config import Config
+        
+        categorical_columns = Config.CATEGORICAL_COLUMNS if categorical_columns is None else categorical_columns
+        string_dtype = FrameOptimizer.arrow_string_dtype()
+        
+        for column in df.columns:
+            values = df[column]
+            if column in FrameOptimizer.AMOUNT_COLUMNS:
+                if (Config.FLOAT32_AMOUNTS and pd.api.types.is_float_dtype(values) and
+                        FrameOptimizer.is_cent_exact(values)):
+                    df[column] = values.astype(np.float32)
+                continue
+            if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+                continue
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                continue
+            
+            if column in categorical_columns and values.nunique() <= len(values) * Config.CATEGORY_MAX_UNIQUE_RATIO:
+                df[column] = values.astype('category')
+            elif string_dtype is not None and values.dtype != string_dtype:
+                # Only columns holding nothing but strings are converted
+                non_null = values.dropna()
+                if pd.api.types.infer_dtype(non_null, skipna=True) in ('string', 'empty'):
+                    df[column] = values.astype(string_dtype)
+        
+        return df
+    
+    @staticmethod
+    def memory_report(df: pd.DataFrame, baseline: Optional[pd.Series] = None) -> Dict[str, Any]:
+        """
+        Report memory use per column
+        
+        Args:
+            df: DataFrame to measure
+            baseline: Per-column bytes before optimization (DataFrame.memory_usage(deep=True))
+            
+        Returns:
+            Dictionary with dtype and MB per column and in total, plus the
+            baseline MB and reduction factor when a baseline is given
+        """
+        usage = df.memory_usage(deep=True, index=False)
+        report = {'columns': {}, 'total_mb': float(usage.sum() / 1e6)}
+        for column in df.columns:
+            entry = {'dtype': str(df[column].dtype), 'mb': float(usage[column] / 1e6)}
+            if baseline is not None and column in baseline.index:
+                entry['baseline_mb'] = float(baseline[column] / 1e6)
+            report['columns'][column] = entry
+        
+        if baseline is not None:
+            baseline_total = float(baseline.drop('Index', errors='ignore').sum() / 1e6)
+            report['baseline_total_mb'] = baseline_total
+            report['reduction'] = baseline_total / report['total_mb'] if report['total_mb'] else 1.0
+        return report
+
 class AnalysisReporter:
     """Generate analysis reports"""
     
@@ -240,16 +627,19 @@ class AnalysisReporter:
                 'total_records': len(df),
                 'unique_contributors': df['contributor_name'].nunique() if 'contributor_name' in df.columns else 0,
                 'unique_employers': df['contributor_employer'].nunique() if 'contributor_employer' in df.columns else 0,
-                'total_amount': float(df['contribution_amount'].sum()) if 'contribution_amount' in df.columns else 0
+                # Amounts may be stored as float32; money is summed in float64
+                'total_amount': (float(df['contribution_amount'].astype(np.float64).sum())
+                                 if 'contribution_amount' in df.columns else 0)
             },
             'amount_statistics': {},
             'temporal_analysis': {},
-            'category_distribution': {}
+            'category_distribution': {},
+            'industry_distribution': {}
         }
         
         # Amount statistics
         if 'contribution_amount' in df.columns:
-            amounts = df['contribution_amount'].dropna()
+            amounts = df['contribution_amount'].dropna().astype(np.float64)
             stats['amount_statistics'] = {
                 'mean': float(amounts.mean()),
                 'median': float(amounts.median()),
@@ -268,9 +658,26 @@ class AnalysisReporter:
                 'percentages': (category_counts / len(df) * 100).to_dict()
             }
         
+        # Industry distribution, overall and within each classified category
+        if 'industry' in df.columns:
+            industry = df['industry'].astype(str)
+            industry_counts = industry.value_counts()
+            stats['industry_distribution'] = {
+                'counts': industry_counts.to_dict(),
+                'percentages': (industry_counts / len(df) * 100).to_dict()
+            }
+            category_column = next((column for column in ('enhanced_current_category', 'current_category')
+                                    if column in df.columns), None)
+            if category_column is not None:
+                by_category = pd.crosstab(df[category_column].astype(str), industry)
+                stats['industry_distribution']['by_category'] = {
+                    category: {name: int(count) for name, count in row.items() if count}
+                    for category, row in by_category.iterrows()
+                }
+        
         # Temporal analysis
         if 'contribution_date' in df.columns:
-            df_copy = df.copy()
+            df_copy = df[['contribution_date', 'contribution_amount']].astype({'contribution_amount': np.float64})
             df_copy['contribution_date'] = pd.to_datetime(df_copy['contribution_date'], errors='coerce')
             df_copy = df_copy.dropna(subset=['contribution_date'])
             
@@ -278,12 +685,14 @@ class AnalysisReporter:
                 df_copy['year'] = df_copy['contribution_date'].dt.year
                 df_copy['month'] = df_copy['contribution_date'].dt.month
                 
-                yearly_stats = df_copy.groupby('year').agg({
-                    'contribution_amount': ['count', 'sum', 'mean']
-                }).round(2)
+                yearly_stats = df_copy.groupby('year')['contribution_amount'].agg(['count', 'sum', 'mean']).round(2)
                 
                 stats['temporal_analysis'] = {
-                    'by_year': yearly_stats.to_dict() if len(yearly_stats) > 0 else {},
+                    # Keyed by year as a string so the report serializes to JSON
+                    'by_year': {
+                        str(year): {'count': int(row['count']), 'sum': float(row['sum']), 'mean': float(row['mean'])}
+                        for year, row in yearly_stats.iterrows()
+                    },
                     'date_range': {
                         'start': str(df_copy['contribution_date'].min()),
                         'end': str(df_copy['contribution_date'].max())
@@ -415,6 +824,11 @@ class ModelPersistence:
             'vectorizer': classifier_obj.vectorizer,
             'categories': classifier_obj.categories,
             'is_trained': classifier_obj.is_trained,
+            'firm_index': classifier_obj.rule_engine.firm_index,
+            'trained_through': classifier_obj.trained_through,
+            'training_metrics': classifier_obj.training_metrics,
+            'training_data_hash': classifier_obj.training_data_hash,
+            'boundary_filings': classifier_obj.boundary_filings,
             'training_timestamp': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
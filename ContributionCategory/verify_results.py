@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 """
-Verify BigQuery table and create summary report
+Verify the analysis summary table and create summary report
 """
 
-from google.cloud import bigquery
+import os
+import sys
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from data_sources import create_data_source
+
 def main():
-    # Initialize BigQuery client
-    client = bigquery.Client(project='campaignanalytics-182101')
+    # Summary table of the configured data source (Config.DATA_SOURCE)
+    source = create_data_source()
+    table = source.table('Enhanced_Classification_Analysis_Summary')
     
     # Query the uploaded table
-    query = """
+    query = f"""
     SELECT 
         analysis_type,
         category,
@@ -20,7 +25,7 @@ def main():
         percentage,
         ROUND(amount_total, 2) as amount_total,
         description
-    FROM `campaignanalytics-182101.Munidata.Enhanced_Classification_Analysis_Summary`
+    FROM {table}
     ORDER BY 
         CASE analysis_type 
             WHEN 'OVERALL_SUMMARY' THEN 1
@@ -33,7 +38,7 @@ def main():
     """
     
     try:
-        results = client.query(query).to_dataframe()
+        results = source.query(query)
         print('=== ENHANCED CLASSIFICATION ANALYSIS SUMMARY TABLE ===')
         print(f'Total records in table: {len(results)}')
         print()
@@ -81,7 +86,7 @@ def main():
         
         print()
         print('✅ CLASSIFICATION ANALYSIS COMPLETE')
-        print('   Table Location: campaignanalytics-182101.Munidata.Enhanced_Classification_Analysis_Summary')
+        print(f"   Table Location: {table.strip('`')}")
         
     except Exception as e:
         print(f'❌ Error querying table: {e}')
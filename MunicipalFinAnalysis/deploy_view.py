@@ -1,7 +1,11 @@
-from google.cloud import bigquery
 import os
+import sys
 
-client = bigquery.Client(project='campaignanalytics-182101')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ContributionCategory'))
+from data_sources import BigQuerySource
+
+# The view DDL is BigQuery SQL, so this always targets BigQuery
+source = BigQuerySource('campaignanalytics-182101')
 
 # Read the SQL file
 with open('All_Contributions_View.sql', 'r') as f:
@@ -12,8 +16,7 @@ print()
 
 try:
     # Execute the view creation
-    job = client.query(view_sql)
-    job.result()  # Wait for completion
+    source.execute(view_sql)  # Waits for completion
     
     print('✅ View deployed successfully!')
     print('📍 Location: campaignanalytics-182101.Munidata.Mpls_All_Contributions_View')
@@ -34,7 +37,7 @@ try:
     '''
     
     print('🧪 Testing view with top 10 contributions...')
-    results = client.query(test_query).to_dataframe()
+    results = source.query(test_query)
     
     print('✅ Sample Results:')
     print('Name                     Employer             Classification  Amount     Candidate')
@@ -63,7 +66,7 @@ try:
     '''
     
     print('📊 Getting classification distribution...')
-    dist_results = client.query(dist_query).to_dataframe()
+    dist_results = source.query(dist_query)
     
     print('✅ Classification Distribution:')
     print('Category         Count    Percentage Total Amount')